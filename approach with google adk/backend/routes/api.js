@@ -188,7 +188,7 @@ router.post('/sessions/start', async (req, res) => {
  */
 router.post('/sessions/questionset/generate', async (req, res) => {
   try {
-    const { session_id, student_id, topic, count = 5 } = req.body;
+    const { session_id, student_id, topic, count = 5, set_number } = req.body;
 
     // Get MongoDB ObjectIDs
     const student = await Student.findOne({ student_id });
@@ -220,8 +220,8 @@ router.post('/sessions/questionset/generate', async (req, res) => {
       throw new Error(agentResult.error || 'Agent failed to generate question set');
     }
 
-    // Calculate set number based on questions answered
-    const setNumber = Math.floor(session.questions_answered / count) + 1;
+    // Clients that generate a set ahead of time send its number; otherwise derive it from answers so far
+    const setNumber = set_number || Math.floor(session.questions_answered / count) + 1;
 
     res.json({
       success: true,
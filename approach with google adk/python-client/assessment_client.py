@@ -3,11 +3,11 @@ Adaptive AI Assessment Client
 Main interface for student assessments with emotion detection
 """
 
-import requests
 import time
 import json
 from datetime import datetime
 from emotion_detector import EmotionDetector, verify_camera, test_deepface
+from http_transport import get_http_transport
 from config import API_BASE_URL, DEFAULT_GRADE, DEFAULT_QUESTIONS
 
 
@@ -15,13 +15,14 @@ class AssessmentClient:
     def __init__(self):
         self.api_url = API_BASE_URL
         self.emotion_detector = EmotionDetector()
+        self.http = get_http_transport()
         self.session_id = None
         self.student_id = None
         
     def check_api_health(self):
         """Check if API is running"""
         try:
-            response = requests.get(f"{self.api_url}/health", timeout=3)
+            response = self.http.get(f"{self.api_url}/health")
             return response.status_code == 200
         except:
             return False
@@ -75,7 +76,7 @@ class AssessmentClient:
     def start_session(self, student_id, name, grade, topic, total_questions):
         """Start assessment session"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.api_url}/sessions/start",
                 json={
                     "student_id": student_id,
@@ -83,8 +84,7 @@ class AssessmentClient:
                     "grade": grade,
                     "topic": topic,
                     "total_questions": total_questions
-                },
-                timeout=10
+                }
             )
             
             if response.status_code == 200:
@@ -114,7 +114,7 @@ class AssessmentClient:
     def get_next_question(self, topic, emotion_data, question_number):
         """Get next question from AI"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.api_url}/sessions/question/next",
                 json={
                     "session_id": self.session_id,
@@ -122,8 +122,7 @@ class AssessmentClient:
                     "topic": topic,
                     "emotion_data": emotion_data,
                     "question_number": question_number
-                },
-                timeout=30
+                }
             )
             
             if response.status_code == 200:
@@ -141,7 +140,7 @@ class AssessmentClient:
     def submit_answer(self, question, student_answer, emotion_data, time_taken):
         """Submit answer and get feedback"""
         try:
-            response = requests.post(
+            response = self.http.post(
                 f"{self.api_url}/sessions/answer/submit",
                 json={
                     "session_id": self.session_id,
@@ -158,8 +157,7 @@ class AssessmentClient:
                     "emotion_data": emotion_data,
                     "time_taken_seconds": time_taken,
                     "ai_reasoning": question.get('reasoning')
-                },
-                timeout=20
+                }
             )
             
             if response.status_code == 200:
@@ -181,15 +179,14 @@ class AssessmentClient:
                 emotion_counts[emotion] = emotion_counts.get(emotion, 0) + 1
             dominant_emotion = max(emotion_counts, key=emotion_counts.get) if emotion_counts else 'neutral'
             
-            response = requests.post(
+            response = self.http.post(
                 f"{self.api_url}/sessions/complete",
                 json={
                     "session_id": self.session_id,
                     "student_id": self.student_id,
                     "average_stress": avg_stress,
                     "dominant_emotion": dominant_emotion
-                },
-                timeout=30
+                }
             )
             
             if response.status_code == 200:
@@ -0,0 +1,261 @@
+"""
+Asynchronous Assessment API Client
+asyncio/aiohttp client for the adaptive assessment backend, so one process can drive
+many students concurrently. Connections are pooled, the number of requests in flight
+is bounded, and timeouts, retries and latency stats follow the same rules as the
+synchronous HttpTransport. Cancelling a task cancels its in-flight request.
+
+Usage:
+    async with AsyncAssessmentClient() as api:
+        student = await api.register_student(name="Student 1", grade=9)
+        session = await api.start_session(student['student_id'], subject="Biology")
+"""
+
+import asyncio
+import logging
+import time
+import uuid
+
+import aiohttp
+
+from config import (API_BASE_URL, ASYNC_MAX_CONNECTIONS, ASYNC_MAX_CONCURRENCY, HTTP_CONNECT_TIMEOUT,
+                    HTTP_DEFAULT_TIMEOUT, HTTP_TIMEOUTS, HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE,
+                    HTTP_BACKOFF_MAX)
+from http_transport import IDEMPOTENT_METHODS, EndpointStats, read_timeout_budget, retryable_status, backoff_delay
+
+
+logger = logging.getLogger(__name__)
+
+
+class AssessmentAPIError(Exception):
+    """
+    Non-success response from the assessment API
+
+    Attributes:
+        status: HTTP status
+        body: Parsed JSON body (or text)
+    """
+
+    def __init__(self, status, body):
+        message = body.get('error') if isinstance(body, dict) else body
+        super().__init__(f"HTTP {status}: {message}")
+        self.status = status
+        self.body = body
+
+
+class AsyncAssessmentClient:
+    """
+    Pooled, concurrency-limited asyncio client for the assessment API
+    """
+
+    def __init__(self, base_url=API_BASE_URL, max_connections=ASYNC_MAX_CONNECTIONS,
+                 max_concurrency=ASYNC_MAX_CONCURRENCY, timeouts=None, default_timeout=HTTP_DEFAULT_TIMEOUT,
+                 connect_timeout=HTTP_CONNECT_TIMEOUT, max_retries=HTTP_MAX_RETRIES,
+                 backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX):
+        """
+        Initialize asyncio client (connections are opened on first use)
+
+        Args:
+            base_url: API root URL
+            max_connections: Pooled keep-alive connections
+            max_concurrency: Requests in flight at once (others wait their turn)
+            timeouts: Read timeout (seconds) per endpoint name (default: HTTP_TIMEOUTS)
+            default_timeout: Read timeout for endpoints without a budget
+            connect_timeout: Seconds to establish a connection
+            max_retries: Retries after the first attempt
+            backoff_base: Retry n waits a random time up to backoff_base * 2^n seconds
+            backoff_max: Longest wait between attempts
+        """
+        self.base_url = base_url.rstrip('/')
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self.timeouts = dict(HTTP_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = None
+        self.slots = None
+        self.endpoints = {}
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+    async def open(self):
+        """Create the connection pool (called automatically by the first request)"""
+        if self.session is None:
+            connector = aiohttp.TCPConnector(limit=self.max_connections)
+            self.session = aiohttp.ClientSession(connector=connector)
+            self.slots = asyncio.Semaphore(self.max_concurrency)
+
+    async def close(self):
+        """Close pooled connections"""
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
+
+    async def request(self, method, path, endpoint=None, idempotent=None, timeout=None, **kwargs):
+        """
+        Send a request, retrying transient failures
+
+        Args:
+            method: HTTP method
+            path: Path below the API root ('/sessions/start')
+            endpoint: Name for timeout lookup and stats (default: path without slashes at the ends)
+            idempotent: Safe to repeat after the server may have processed it (default: by method)
+            timeout: Read timeout override (seconds)
+            **kwargs: Passed to aiohttp (json, params, ...)
+
+        Returns:
+            dict: Parsed JSON body
+
+        Raises:
+            AssessmentAPIError: Non-2xx response (after retries)
+            aiohttp.ClientError / asyncio.TimeoutError: The last attempt failed without a response
+        """
+        await self.open()
+        method = method.upper()
+        endpoint = endpoint or path.strip('/')
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        if timeout is None:
+            timeout = read_timeout_budget(self.timeouts, endpoint, self.default_timeout)
+        client_timeout = aiohttp.ClientTimeout(sock_connect=self.connect_timeout, sock_read=timeout)
+
+        headers = dict(kwargs.pop('headers', None) or {})
+        if method == 'POST':
+            headers.setdefault('Idempotency-Key', uuid.uuid4().hex)
+
+        attempt = 0
+        while True:
+            async with self.slots:
+                started = time.perf_counter()
+                try:
+                    async with self.session.request(method, f"{self.base_url}{path}", headers=headers,
+                                                    timeout=client_timeout, **kwargs) as response:
+                        status = response.status
+                        retry_after = response.headers.get('Retry-After')
+                        if response.content_type == 'application/json':
+                            body = await response.json()
+                        else:
+                            body = await response.text()
+                except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                    elapsed_ms = self._record(endpoint, started, failed=True)
+                    # Only a failed connect surely never reached the server; after a read timeout
+                    # or a dropped connection it may already have processed the request
+                    never_sent = isinstance(e, (aiohttp.ClientConnectorError, aiohttp.ConnectionTimeoutError))
+                    logger.info(f"{method} {endpoint} failed after {elapsed_ms:.1f} ms "
+                                f"(attempt {attempt + 1}): {e.__class__.__name__}")
+                    if not (idempotent or never_sent) or attempt >= self.max_retries:
+                        raise
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                else:
+                    elapsed_ms = self._record(endpoint, started, failed=status >= 500)
+                    logger.info(f"{method} {endpoint} -> {status} in {elapsed_ms:.1f} ms (attempt {attempt + 1})")
+                    if status < 300:
+                        return body
+                    if not retryable_status(status, idempotent) or attempt >= self.max_retries:
+                        raise AssessmentAPIError(status, body)
+                    delay = backoff_delay(attempt, self.backoff_base, self.backoff_max, retry_after)
+
+            # Back off without holding a concurrency slot
+            self.endpoints[endpoint].retries += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def _record(self, endpoint, started, failed):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = self.endpoints.get(endpoint)
+        if stats is None:
+            stats = self.endpoints[endpoint] = EndpointStats()
+        stats.record(elapsed_ms, failed)
+        return elapsed_ms
+
+    def stats(self):
+        """Get per-endpoint request, error, retry and latency counters"""
+        return {endpoint: stats.summary() for endpoint, stats in self.endpoints.items()}
+
+    # Students
+
+    async def health(self):
+        return await self.request('GET', '/health')
+
+    async def register_student(self, name, grade, student_id=None, email=None, **fields):
+        """Register a student (returns the existing one if student_id is known)"""
+        payload = {'name': name, 'grade': grade, **fields}
+        if student_id:
+            payload['student_id'] = student_id
+        if email:
+            payload['email'] = email
+        # Registering a known student_id is a lookup, so only then is a blind retry safe
+        return await self.request('POST', '/students/register', json=payload, idempotent=bool(student_id))
+
+    async def student_profile(self, student_id):
+        return await self.request('GET', f'/students/{student_id}/profile', endpoint='students/profile')
+
+    async def student_metrics(self, student_id):
+        return await self.request('GET', f'/students/{student_id}/metrics', endpoint='students/metrics')
+
+    # Sessions
+
+    async def start_session(self, student_id, topic=None, subject=None, total_questions=None, **fields):
+        """Start an assessment session (returns session_id and the student profile)"""
+        payload = {'student_id': student_id, **fields}
+        for key, value in (('topic', topic), ('subject', subject), ('total_questions', total_questions)):
+            if value is not None:
+                payload[key] = value
+        return await self.request('POST', '/sessions/start', json=payload)
+
+    async def next_question(self, session_id, student_id, topic, question_number, emotion_data=None):
+        """Generate the next adaptive question"""
+        return await self.request('POST', '/sessions/question/next', json={
+            'session_id': session_id,
+            'student_id': student_id,
+            'topic': topic,
+            'emotion_data': emotion_data,
+            'question_number': question_number
+        })
+
+    async def generate_question_set(self, session_id, student_id, topic, count=5):
+        """Generate a question set with the ADK agent"""
+        return await self.request('POST', '/sessions/questionset/generate', json={
+            'session_id': session_id,
+            'student_id': student_id,
+            'topic': topic,
+            'count': count
+        })
+
+    async def submit_answer(self, session_id, student_id, **answer):
+        """Submit an answer (fields as sent by AssessmentClient or NewFlowTestClient) and get feedback"""
+        return await self.request('POST', '/sessions/answer/submit', json={
+            'session_id': session_id,
+            'student_id': student_id,
+            **answer
+        })
+
+    async def complete_session(self, session_id, student_id, average_stress=None, dominant_emotion=None):
+        """Complete a session and get the AI summary"""
+        payload = {'session_id': session_id, 'student_id': student_id}
+        if average_stress is not None:
+            payload['average_stress'] = average_stress
+        if dominant_emotion is not None:
+            payload['dominant_emotion'] = dominant_emotion
+        return await self.request('POST', '/sessions/complete', json=payload)
+
+    # Analytics
+
+    async def student_analytics(self, student_id):
+        return await self.request('GET', f'/analytics/student/{student_id}', endpoint='analytics/student')
+
+    async def topic_analytics(self, student_id, topic):
+        return await self.request('GET', f'/analytics/topic/{student_id}/{topic}', endpoint='analytics/topic')
+
+    async def emotion_patterns(self, student_id, limit=20):
+        return await self.request('GET', f'/emotions/patterns/{student_id}', endpoint='emotions/patterns',
+                                  params={'limit': limit})
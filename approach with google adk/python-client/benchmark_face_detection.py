@@ -0,0 +1,130 @@
+"""
+Face Detection Benchmark
+Compares detection time and hit rate of the Haar cascade across detection scale factors.
+Full-resolution detection (scale 1.0) is the reference for the hit rate.
+
+Usage:
+    python benchmark_face_detection.py                          # 100 webcam frames
+    python benchmark_face_detection.py --video recording.mp4    # frames from a recording
+    python benchmark_face_detection.py --scales 1.0 0.5 0.33 0.25 --frames 200
+"""
+
+import argparse
+import time
+
+import cv2
+
+from face_detection import detect_faces_scaled, crop_face_gray
+from frame_source import get_frame_source, release_frame_source
+
+
+DEFAULT_SCALES = [1.0, 0.75, 0.5, 0.33, 0.25]
+
+
+def box_iou(a, b):
+    """Intersection over union of two (x, y, w, h) boxes"""
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    inter_w = max(0, min(ax + aw, bx + bw) - max(ax, bx))
+    inter_h = max(0, min(ay + ah, by + bh) - max(ay, by))
+    inter = inter_w * inter_h
+    union = aw * ah + bw * bh - inter
+    return inter / union if union else 0.0
+
+
+def load_frames(count, video=None):
+    """Grab frames from a video file or the webcam"""
+    frames = []
+
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        return frames
+
+    source = get_frame_source()
+    if not source.is_opened():
+        return frames
+
+    reader = source.reader()
+    while len(frames) < count:
+        ret, frame = reader.read()
+        if not ret:
+            break
+        frames.append(frame)
+    release_frame_source()
+    return frames
+
+
+def benchmark(frames, scales, iou_threshold=0.5):
+    """
+    Time detect-and-crop per scale and compare boxes against full-resolution detection
+
+    Returns:
+        list: One result dict per scale
+    """
+    reference = [detect_faces_scaled(frame, scale=1.0) for frame in frames]
+    reference_faces = sum(len(boxes) for boxes in reference)
+
+    results = []
+    for scale in scales:
+        elapsed = 0.0
+        hits = 0
+        extra = 0
+
+        for frame, expected in zip(frames, reference):
+            started = time.perf_counter()
+            boxes = detect_faces_scaled(frame, scale=scale)
+            for box in boxes:
+                crop_face_gray(frame, box)
+            elapsed += time.perf_counter() - started
+
+            matched = [box for box in boxes if any(box_iou(box, ref) >= iou_threshold for ref in expected)]
+            hits += sum(1 for ref in expected if any(box_iou(box, ref) >= iou_threshold for box in boxes))
+            extra += len(boxes) - len(matched)
+
+        results.append({
+            'scale': scale,
+            'avg_ms': elapsed / len(frames) * 1000,
+            'hit_rate': hits / reference_faces if reference_faces else 0.0,
+            'extra_boxes': extra
+        })
+
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark downscaled Haar face detection")
+    parser.add_argument('--video', help="Video file to read frames from (default: webcam)")
+    parser.add_argument('--frames', type=int, default=100, help="Number of frames to benchmark")
+    parser.add_argument('--scales', type=float, nargs='+', default=DEFAULT_SCALES,
+                        help="Detection scale factors to compare")
+    args = parser.parse_args()
+
+    print(f"📹 Collecting {args.frames} frames...")
+    frames = load_frames(args.frames, args.video)
+    if not frames:
+        print("❌ No frames available")
+        return
+
+    height, width = frames[0].shape[:2]
+    print(f"✅ {len(frames)} frames at {width}x{height}\n")
+
+    results = benchmark(frames, args.scales)
+    baseline = next((r['avg_ms'] for r in results if r['scale'] == 1.0), results[0]['avg_ms'])
+
+    print("=" * 60)
+    print(f"{'Scale':>7} {'Detect+crop (ms)':>18} {'Speedup':>9} {'Hit rate':>10} {'Extra':>7}")
+    print("=" * 60)
+    for r in results:
+        speedup = baseline / r['avg_ms'] if r['avg_ms'] else 0.0
+        print(f"{r['scale']:>7.2f} {r['avg_ms']:>18.2f} {speedup:>8.1f}x {r['hit_rate'] * 100:>9.1f}% {r['extra_boxes']:>7}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
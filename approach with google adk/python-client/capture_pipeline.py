@@ -0,0 +1,140 @@
+"""
+Capture/Inference Pipeline
+Decouples camera reads from emotion inference: the frame source's capture thread
+pushes into a small bounded queue that drops the oldest frame when full, and the
+inference stage always takes the freshest frame
+"""
+
+import threading
+import time
+from collections import deque
+
+
+class DropOldestQueue:
+    """
+    Bounded frame queue - put() never blocks, the oldest frame is dropped instead
+    """
+
+    def __init__(self, maxsize=2):
+        self.maxsize = maxsize
+        self.items = deque()
+        self.dropped = 0
+        self.queued = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        """Add item, dropping the oldest one if the queue is full"""
+        with self.condition:
+            if self.closed:
+                return
+            if len(self.items) >= self.maxsize:
+                self.items.popleft()
+                self.dropped += 1
+            self.items.append(item)
+            self.queued += 1
+            self.condition.notify()
+
+    def get_latest(self, timeout=2.0):
+        """
+        Take the newest item and discard anything older
+
+        Args:
+            timeout: Maximum seconds to wait for an item
+
+        Returns:
+            Newest item, or None on timeout / closed queue
+        """
+        deadline = time.time() + timeout
+
+        with self.condition:
+            while not self.items and not self.closed:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            if not self.items:
+                return None
+
+            item = self.items.pop()
+            self.dropped += len(self.items)
+            self.items.clear()
+            return item
+
+    def close(self):
+        """Wake up waiting consumers and reject further items"""
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+
+class CapturePipeline:
+    """
+    Producer/consumer pipeline on top of a FrameSource
+
+    The producer is the frame source's capture thread; the caller's loop is the
+    inference stage. Frame age (capture -> analysis finished) is tracked so stale
+    samples show up in the summary.
+    """
+
+    def __init__(self, source, max_queue_size=2):
+        """
+        Initialize pipeline
+
+        Args:
+            source: Started FrameSource
+            max_queue_size: Frames buffered between capture and inference
+        """
+        self.source = source
+        self.queue = DropOldestQueue(max_queue_size)
+        self.frames_analyzed = 0
+        self.last_age = 0.0
+        self.total_age = 0.0
+        self.max_age = 0.0
+
+    def start(self):
+        """Start receiving frames from the capture thread"""
+        self.source.subscribe(self.queue)
+        return self
+
+    def stop(self):
+        """Stop receiving frames"""
+        self.source.unsubscribe(self.queue)
+        self.queue.close()
+
+    def next_frame(self, timeout=2.0):
+        """
+        Get the freshest captured frame for inference
+
+        Returns:
+            Frame: (frame_id, timestamp, image) or None on timeout / camera closed
+        """
+        if not self.source.is_opened():
+            return None
+        return self.queue.get_latest(timeout)
+
+    def mark_analyzed(self, frame):
+        """Record how old frame was when its analysis finished"""
+        age = time.time() - frame.timestamp
+        self.frames_analyzed += 1
+        self.last_age = age
+        self.total_age += age
+        self.max_age = max(self.max_age, age)
+
+    def stats(self):
+        """
+        Get latency counters
+
+        Returns:
+            dict: Frame counts and frame age (ms) at analysis time
+        """
+        average_age = self.total_age / self.frames_analyzed if self.frames_analyzed else 0.0
+        return {
+            "frames_captured": self.queue.queued,
+            "frames_dropped": self.queue.dropped,
+            "frames_analyzed": self.frames_analyzed,
+            "last_frame_age_ms": round(self.last_age * 1000, 1),
+            "average_frame_age_ms": round(average_age * 1000, 1),
+            "max_frame_age_ms": round(self.max_age * 1000, 1)
+        }
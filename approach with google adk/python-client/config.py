@@ -2,10 +2,61 @@
 
 # API Configuration
 API_BASE_URL = "http://localhost:3000/api"
+EMOTION_SERVICE_URL = "http://localhost:5001"  # Python emotion service
+EMOTION_SERVICE_TIMEOUT = 10  # Seconds per emotion service request
+
+# HTTP Transport (shared keep-alive session for all backend calls)
+HTTP_POOL_SIZE = 4  # Keep-alive connections per host
+HTTP_CONNECT_TIMEOUT = 3.05  # Seconds to establish a connection
+HTTP_DEFAULT_TIMEOUT = 15  # Read timeout (seconds) for endpoints without a budget below
+HTTP_TIMEOUTS = {  # Read timeout (seconds) per endpoint
+    'health': 3,
+    'students/register': 10,
+    'sessions/start': 10,
+    'question/next': 30,
+    'questionset/generate': 60,
+    'answer/submit': 20,
+    'sessions/complete': 30,
+    'generate-questions-with-emotion': 60,
+    'detect-emotion': EMOTION_SERVICE_TIMEOUT
+}
+HTTP_MAX_RETRIES = 3  # Retries after the first attempt
+HTTP_BACKOFF_BASE = 0.25  # Seconds; retry n waits up to base * 2^n (full jitter)
+HTTP_BACKOFF_MAX = 4.0  # Longest wait between attempts
+HTTP_RETRY_AFTER_MAX = 60.0  # Longest server Retry-After honoured before retrying
+HTTP_GENERATION_DEADLINE = 75  # Seconds an LLM question generation call may take in total, retries included
+ASYNC_MAX_CONNECTIONS = 100  # Pooled connections of the asyncio client (all hosts)
+ASYNC_MAX_CONCURRENCY = 64  # Requests the asyncio client keeps in flight at once
 
 # Emotion Detection Settings
 EMOTION_DETECTION_TIMEOUT = 120  # Maximum seconds per question
 CAMERA_INDEX = 0  # Default camera
+FRAME_BUFFER_SIZE = 4  # Recent frames kept by the shared camera frame source
+EMOTION_BATCH_SIZE = 16  # Maximum face crops per emotion model call
+EMOTION_BATCH_MAX_WAIT = 0.05  # Seconds a crop may wait for its batch to fill
+FACE_DETECTION_SCALE = 0.5  # Frames are downscaled by this factor for face detection
+FACE_REDETECT_INTERVAL = 10  # Run full Haar detection at least every N frames
+FACE_TRACK_MIN_CONFIDENCE = 0.6  # Template-match score below which full detection runs again
+SAMPLER_TARGET_FPS = 5.0  # Maximum emotion analysis iterations per second
+SAMPLER_MAX_CORE_SHARE = 0.5  # Maximum share of one CPU core used by emotion analysis
+SAMPLER_CHANGE_THRESHOLD = 4.0  # Mean pixel difference (0-255) below which a face counts as unchanged
+SAMPLER_KEEPALIVE_INTERVAL = 1.0  # Seconds between analyses of an unchanged face
+CONVERGENCE_MIN_SAMPLES = 20  # Samples required before the emotion estimate may converge
+CONVERGENCE_SCORE_TOLERANCE = 3.0  # 95% half-width (percentage points) of every average emotion score
+CONVERGENCE_STRESS_TOLERANCE = 5.0  # 95% half-width of the net stress score
+CONVERGENCE_KEEPALIVE_FPS = 0.5  # Sampling rate after convergence
+PREFETCH_START_DELAY = 3.0  # Seconds of answering before next-question candidates are requested
+PREFETCH_MIN_SAMPLES = 5  # Emotion samples required before candidates are requested
+PREFETCH_STRESS_BUCKETS = [  # (name, stress levels covered, level and average emotion scores sent for a bucket the partial estimate is not in)
+    ('low', (1, 2), 2, {'neutral': 65.0, 'sad': 15.0, 'happy': 10.0, 'fear': 10.0}),
+    ('medium', (3,), 3, {'neutral': 45.0, 'sad': 25.0, 'fear': 15.0, 'happy': 10.0, 'angry': 5.0}),
+    ('high', (4, 5), 4, {'fear': 35.0, 'neutral': 30.0, 'sad': 25.0, 'happy': 5.0, 'angry': 5.0})
+]
+QUESTION_SET_PREFETCH_AFTER = 3  # Answers into a set before the next set is requested in the background
+QUESTION_SET_STRESS_DRIFT = 0.15  # Change in average stress (0-1) that makes a prefetched set stale
+QUESTION_SET_ACCURACY_DRIFT = 0.25  # Change in accuracy (0-1) that makes a prefetched set stale
+UPLOAD_FACE_SIZE = 48  # Side (px) of face crops uploaded to the emotion service (model input size)
+UPLOAD_JPEG_QUALITY = 90  # JPEG quality (0-100) of uploaded face crops
 
 # Emotion Categories
 STRESS_EMOTIONS = ['fear', 'angry', 'sad', 'disgust']
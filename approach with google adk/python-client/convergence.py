@@ -0,0 +1,108 @@
+"""
+Emotion Estimate Convergence
+Tracks a running estimate of the per-question emotion averages and stress with a
+confidence bound, so sampling can drop to a low keep-alive rate once more samples
+would no longer change the result
+"""
+
+import time
+
+from config import (CONVERGENCE_MIN_SAMPLES, CONVERGENCE_SCORE_TOLERANCE,
+                    CONVERGENCE_STRESS_TOLERANCE, CONVERGENCE_KEEPALIVE_FPS)
+from emotion_aggregator import RunningStat
+
+
+EMOTIONS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+
+# Net-stress boundaries between stress levels 1-5 (see calculate_stress_level)
+STRESS_LEVEL_THRESHOLDS = (15, 30, 50, 70)
+
+
+def net_stress(emotion_scores):
+    """
+    Linear part of calculate_stress_level: negative emotions minus half the positive ones
+
+    Because it is linear, the net stress of the average scores equals the average
+    per-sample net stress, so its confidence bound carries over to the stress level.
+    """
+    stress_score = sum(emotion_scores.get(e, 0) for e in ('angry', 'fear', 'sad', 'disgust'))
+    positive_score = emotion_scores.get('happy', 0) + emotion_scores.get('surprise', 0) * 0.5
+    return stress_score - positive_score * 0.5
+
+
+class ConvergenceMonitor:
+    """
+    Decides when the per-question emotion estimate has converged
+
+    Converged means: at least min_samples samples, every average emotion score known
+    within +/- score_tolerance percentage points, the net stress known within
+    +/- stress_tolerance, and the stress interval not crossing a stress-level boundary
+    (so calculate_stress_level cannot change with more samples at this confidence).
+    """
+
+    def __init__(self, min_samples=CONVERGENCE_MIN_SAMPLES, score_tolerance=CONVERGENCE_SCORE_TOLERANCE,
+                 stress_tolerance=CONVERGENCE_STRESS_TOLERANCE, keepalive_fps=CONVERGENCE_KEEPALIVE_FPS):
+        self.min_samples = min_samples
+        self.score_tolerance = score_tolerance
+        self.stress_tolerance = stress_tolerance
+        self.keepalive_fps = keepalive_fps
+
+        self.scores = {emotion: RunningStat() for emotion in EMOTIONS}
+        self.stress = RunningStat()
+        self.samples = 0
+        self.converged = False
+        self.converged_at = None
+        self.samples_at_convergence = None
+
+    def update(self, emotion_scores, timestamp=None):
+        """
+        Add one sample
+
+        Args:
+            emotion_scores: Seven-emotion score dict (percentages)
+            timestamp: Sample time (default: now)
+
+        Returns:
+            bool: True if this sample made the estimate converge
+        """
+        self.samples += 1
+        for emotion, stat in self.scores.items():
+            stat.update(emotion_scores.get(emotion, 0.0))
+        self.stress.update(net_stress(emotion_scores))
+
+        if self.converged or self.samples < self.min_samples or not self._is_tight():
+            return False
+
+        self.converged = True
+        self.converged_at = timestamp if timestamp is not None else time.time()
+        self.samples_at_convergence = self.samples
+        return True
+
+    def _is_tight(self):
+        """Check the confidence bounds against the tolerances"""
+        if any(stat.half_width() > self.score_tolerance for stat in self.scores.values()):
+            return False
+
+        half_width = self.stress.half_width()
+        if half_width > self.stress_tolerance:
+            return False
+
+        low = max(0.0, self.stress.mean - half_width)
+        high = max(0.0, self.stress.mean + half_width)
+        return not any(low < threshold <= high for threshold in STRESS_LEVEL_THRESHOLDS)
+
+    def summary(self, start_time):
+        """
+        Get convergence report
+
+        Args:
+            start_time: Question start (epoch) used for the relative convergence time
+        """
+        return {
+            "converged": self.converged,
+            "converged_after_seconds": round(self.converged_at - start_time, 2) if self.converged else None,
+            "samples_at_convergence": self.samples_at_convergence,
+            "max_score_half_width": round(max(stat.half_width() for stat in self.scores.values()), 2)
+                                    if self.samples >= 2 else None,
+            "stress_half_width": round(self.stress.half_width(), 2) if self.samples >= 2 else None
+        }
@@ -0,0 +1,120 @@
+"""
+Streaming Emotion Aggregator
+O(1)-per-sample running counts, means, variance (Welford), min and max for the
+emotion scores and stress of one question, so summaries are available at any time
+without keeping and re-scanning every sample
+"""
+
+import math
+
+
+class RunningStat:
+    """
+    Welford running mean/variance with min and max
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = None
+        self.max = None
+
+    def update(self, value):
+        """Add one value"""
+        self.count += 1
+        delta = value - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (value - self.mean)
+
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def variance(self, ddof=0):
+        """Population variance (ddof=0) or sample variance (ddof=1)"""
+        if self.count <= ddof:
+            return 0.0
+        return self.m2 / (self.count - ddof)
+
+    def std(self, ddof=0):
+        """Standard deviation"""
+        return math.sqrt(self.variance(ddof))
+
+    def half_width(self, z=1.96):
+        """Confidence half-width of the mean (infinite below two values)"""
+        if self.count < 2:
+            return math.inf
+        return z * math.sqrt(self.variance(ddof=1) / self.count)
+
+
+class EmotionAggregator:
+    """
+    Running summary of the emotion samples of one question
+    """
+
+    def __init__(self):
+        self.samples = 0
+        self.counts = {}
+        self.scores = {}
+        self.stress = RunningStat()
+        self.first_timestamp = None
+        self.last_timestamp = None
+
+    def update(self, dominant_emotion, emotion_scores, stress=None, timestamp=None):
+        """
+        Add one analyzed face
+
+        Args:
+            dominant_emotion: Dominant emotion label of the sample
+            emotion_scores: Emotion -> score dict
+            stress: Optional per-sample stress value
+            timestamp: Optional sample time (epoch seconds)
+        """
+        self.samples += 1
+        self.counts[dominant_emotion] = self.counts.get(dominant_emotion, 0) + 1
+
+        for emotion, score in emotion_scores.items():
+            stat = self.scores.get(emotion)
+            if stat is None:
+                stat = self.scores[emotion] = RunningStat()
+            stat.update(score)
+
+        if stress is not None:
+            self.stress.update(stress)
+
+        if timestamp is not None:
+            if self.first_timestamp is None:
+                self.first_timestamp = timestamp
+            self.last_timestamp = timestamp
+
+    def dominant_emotion(self):
+        """Most frequent dominant emotion (first seen wins ties), or None"""
+        if not self.counts:
+            return None
+        return max(self.counts, key=self.counts.get)
+
+    def emotion_counts(self):
+        """Dominant emotion -> number of samples"""
+        return dict(self.counts)
+
+    def emotion_percentages(self):
+        """Dominant emotion -> share of samples (0-100)"""
+        return {emotion: count / self.samples * 100 for emotion, count in self.counts.items()}
+
+    def average_scores(self):
+        """Emotion -> mean score"""
+        return {emotion: stat.mean for emotion, stat in self.scores.items()}
+
+    def score_stats(self):
+        """Emotion -> mean/std/min/max of the score"""
+        return {
+            emotion: {
+                "mean": stat.mean,
+                "std": stat.std(),
+                "min": stat.min,
+                "max": stat.max
+            }
+            for emotion, stat in self.scores.items()
+        }
@@ -0,0 +1,168 @@
+"""
+Batched Emotion Inference
+Collects preprocessed 48x48 face crops from several faces and frames and runs the
+emotion model once per batch instead of once per face
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from config import EMOTION_BATCH_SIZE, EMOTION_BATCH_MAX_WAIT
+from emotion_model import get_emotion_model, preprocess_face, scores_from_probabilities
+
+
+def predict_emotion_batch(inputs):
+    """Run the shared emotion model on a stacked (N, 48, 48, 1) batch"""
+    return get_emotion_model().predict(inputs)
+
+
+class BatchingEmotionEngine:
+    """
+    Background inference worker that batches face crops
+
+    A batch is run as soon as max_batch_size crops are queued, or max_wait seconds
+    after the first crop of the batch arrived - whichever comes first.
+    """
+
+    def __init__(self, max_batch_size=EMOTION_BATCH_SIZE, max_wait=EMOTION_BATCH_MAX_WAIT,
+                 predict_fn=predict_emotion_batch):
+        """
+        Initialize batching engine
+
+        Args:
+            max_batch_size: Maximum crops per model call
+            max_wait: Maximum seconds a crop waits for the batch to fill
+            predict_fn: Callable mapping (N, 48, 48, 1) inputs to (N, 7) probabilities
+        """
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.predict_fn = predict_fn
+        self.requests = queue.Queue()
+        self.is_running = False
+        self.thread = None
+        self.lock = threading.Lock()
+
+        # Counters
+        self.batches_run = 0
+        self.crops_analyzed = 0
+        self.inference_seconds = 0.0
+
+    def start(self):
+        """Start the inference worker (no-op if already running)"""
+        with self.lock:
+            if self.is_running:
+                return
+            self.is_running = True
+            self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop the worker and fail any crops still waiting"""
+        with self.lock:
+            self.is_running = False
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+        while True:
+            try:
+                _, future = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            future.set_exception(RuntimeError("Emotion engine stopped"))
+
+    def submit(self, face_roi):
+        """
+        Queue one face crop for analysis
+
+        Args:
+            face_roi: Face crop (grayscale preferred; BGR/RGB is converted)
+
+        Returns:
+            Future: Resolves to {'emotion': {...}, 'dominant_emotion': ...}
+        """
+        self.start()
+        future = Future()
+        self.requests.put((preprocess_face(face_roi), future))
+        return future
+
+    def analyze(self, face_rois, timeout=10.0):
+        """Analyze several crops and wait for all results (in input order)"""
+        futures = [self.submit(face_roi) for face_roi in face_rois]
+        return [future.result(timeout=timeout) for future in futures]
+
+    def average_crop_seconds(self):
+        """Average model time per analyzed crop (0 until the first batch ran)"""
+        return self.inference_seconds / self.crops_analyzed if self.crops_analyzed else 0.0
+
+    def stats(self):
+        """Get batching counters"""
+        average = self.crops_analyzed / self.batches_run if self.batches_run else 0.0
+        return {
+            'batches_run': self.batches_run,
+            'crops_analyzed': self.crops_analyzed,
+            'average_batch_size': round(average, 2),
+            'average_crop_ms': round(self.average_crop_seconds() * 1000, 2)
+        }
+
+    def _worker_loop(self):
+        """Collect crops into batches and run them (runs in separate thread)"""
+        while self.is_running:
+            try:
+                first = self.requests.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            batch = [first]
+            deadline = time.time() + self.max_wait
+
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.requests.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        """Run one model call and resolve the batch's futures"""
+        inputs = np.stack([face for face, _ in batch])
+        started = time.time()
+
+        try:
+            probabilities = self.predict_fn(inputs)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        self.inference_seconds += time.time() - started
+
+        for (_, future), row in zip(batch, probabilities):
+            future.set_result(scores_from_probabilities(row))
+
+        self.batches_run += 1
+        self.crops_analyzed += len(batch)
+
+
+# Process-wide shared engine
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+
+def get_emotion_engine():
+    """Get the process-wide batching engine (started on first use)"""
+    global _shared_engine
+
+    with _shared_lock:
+        if _shared_engine is None:
+            _shared_engine = BatchingEmotionEngine()
+        _shared_engine.start()
+        return _shared_engine
@@ -5,25 +5,50 @@ Handles camera and emotion detection using DeepFace
 
 import cv2
 import time
-from deepface import DeepFace
-from collections import defaultdict
+from collections import deque
 import threading
-from config import EMOTION_DETECTION_TIMEOUT, CAMERA_INDEX, STRESS_EMOTIONS
+from config import EMOTION_DETECTION_TIMEOUT, STRESS_EMOTIONS
+from frame_source import get_frame_source
+from emotion_batcher import get_emotion_engine
+from emotion_model import get_emotion_model
+from face_tracker import FaceTracker
+from face_detection import detect_faces_scaled, crop_face_gray
+from frame_sampler import AdaptiveFrameSampler
+from emotion_aggregator import EmotionAggregator
+
+
+def face_crop(frame, faces=None):
+    """
+    Crop the largest face from a frame as grayscale (only the ROI is color-converted)
+    Falls back to the whole frame when no face is found (like DeepFace with enforce_detection=False)
+    
+    Args:
+        frame: Full-resolution BGR frame
+        faces: Face boxes already located (e.g. by a FaceTracker); detected here if None
+    """
+    if faces is None:
+        faces = detect_faces_scaled(frame)
+    if len(faces) == 0:
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    
+    return crop_face_gray(frame, max(faces, key=lambda face: face[2] * face[3]))
 
 
 class EmotionDetector:
     def __init__(self):
+        self.source = None
         self.cap = None
         self.is_running = False
         self.emotion_data = {}
         self.stop_event = threading.Event()
         
     def initialize_camera(self):
-        """Initialize camera"""
+        """Attach to the shared camera frame source (opened once per session)"""
         try:
-            self.cap = cv2.VideoCapture(CAMERA_INDEX)
-            if not self.cap.isOpened():
+            self.source = get_frame_source()
+            if not self.source.is_opened():
                 raise Exception("Cannot access camera")
+            self.cap = self.source.reader()
             return True
         except Exception as e:
             print(f"❌ Camera initialization failed: {e}")
@@ -31,8 +56,9 @@ class EmotionDetector:
     
     def release_camera(self):
         """Release camera resources"""
-        if self.cap:
-            self.cap.release()
+        if self.source:
+            self.source.release()
+            self.source = None
             self.cap = None
     
     def detect_emotions_silent(self, question_number, max_duration=EMOTION_DETECTION_TIMEOUT):
@@ -40,42 +66,57 @@ class EmotionDetector:
         Silently detect emotions in background
         Returns emotion data dictionary
         """
-        if not self.cap or not self.cap.isOpened():
+        if not self.cap or not self.source.is_opened():
             print("❌ Camera not initialized")
             return None
         
         start_time = time.time()
-        emotions_detected = []
-        emotion_scores_sum = defaultdict(float)
-        frame_count = 0
+        
+        # Running counts/averages, updated as each analysis finishes
+        aggregator = EmotionAggregator()
         
         print(f"\n📹 Monitoring emotions for question {question_number}...")
         print("   (Silent mode - no camera window)")
         
+        # Face crops are analyzed in batches by the shared engine
+        engine = get_emotion_engine()
+        pending = deque()
+        
+        # Full Haar detection only every few frames; the face box is tracked in between
+        tracker = FaceTracker()
+        
+        # Holds the loop to a fps/CPU budget and skips unchanged faces
+        sampler = AdaptiveFrameSampler()
+        
+        def collect_results(wait=False):
+            while pending and (wait or pending[0].done()):
+                future = pending.popleft()
+                try:
+                    result = future.result(timeout=10)
+                except Exception:
+                    # Skip frames that fail analysis
+                    continue
+                
+                # Record emotion and accumulate scores
+                aggregator.update(result['dominant_emotion'], result['emotion'])
+        
         while not self.stop_event.is_set():
+            self.stop_event.wait(sampler.wait_time())
             ret, frame = self.cap.read()
             if not ret:
                 break
             
-            try:
-                # Analyze emotion
-                result = DeepFace.analyze(frame, actions=['emotion'], enforce_detection=False)
-                if isinstance(result, list):
-                    result = result[0]
-                
-                # Record emotion
-                dominant_emotion = result['dominant_emotion']
-                emotions_detected.append(dominant_emotion)
-                
-                # Accumulate scores
-                for emotion, score in result['emotion'].items():
-                    emotion_scores_sum[emotion] += score
-                
-                frame_count += 1
-                
-            except Exception as e:
-                # Skip frames that fail analysis
-                pass
+            work_started = time.time()
+            face_roi = face_crop(frame, tracker.update(frame))
+            analyzed = sampler.should_analyze(face_roi)
+            if analyzed:
+                pending.append(engine.submit(face_roi))
+            
+            # Wait for the backlog once a full batch is outstanding
+            collect_results(wait=len(pending) >= engine.max_batch_size)
+            
+            work = time.time() - work_started + (engine.average_crop_seconds() if analyzed else 0.0)
+            sampler.record_work(work, work_started)
             
             # Check timeout
             elapsed = time.time() - start_time
@@ -83,39 +124,29 @@ class EmotionDetector:
                 print(f"\n⏱️  Maximum time reached ({max_duration}s)")
                 break
         
+        collect_results(wait=True)
+        
         # Calculate results
-        if emotions_detected and frame_count > 0:
-            # Count emotions
-            emotion_counts = defaultdict(int)
-            for emotion in emotions_detected:
-                emotion_counts[emotion] += 1
+        frame_count = aggregator.samples
+        if frame_count > 0:
+            emotion_counts = aggregator.emotion_counts()
             
             # Find dominant emotion
-            dominant_emotion = max(emotion_counts, key=emotion_counts.get)
+            dominant_emotion = aggregator.dominant_emotion()
             
             # Calculate stress level
-            stress_count = sum(emotion_counts[e] for e in STRESS_EMOTIONS)
-            stress_level = min(5, max(1, int((stress_count / len(emotions_detected)) * 5) + 1))
-            
-            # Calculate percentages
-            emotion_percentages = {
-                emotion: (count / len(emotions_detected) * 100)
-                for emotion, count in emotion_counts.items()
-            }
-            
-            # Average scores
-            emotion_avg_scores = {
-                emotion: (total / frame_count)
-                for emotion, total in emotion_scores_sum.items()
-            }
+            stress_count = sum(emotion_counts.get(e, 0) for e in STRESS_EMOTIONS)
+            stress_level = min(5, max(1, int((stress_count / frame_count) * 5) + 1))
             
             emotion_data = {
                 'emotion': dominant_emotion,
                 'stressLevel': stress_level,
-                'emotionCounts': dict(emotion_counts),
-                'emotionPercentages': emotion_percentages,
-                'emotionScores': emotion_avg_scores,
+                'emotionCounts': emotion_counts,
+                'emotionPercentages': aggregator.emotion_percentages(),
+                'emotionScores': aggregator.average_scores(),
                 'frameCount': frame_count,
+                'faceTracking': tracker.stats(),
+                'frameSampling': sampler.stats(),
                 'analysisDuration': time.time() - start_time,
                 'questionNumber': question_number
             }
@@ -158,23 +189,16 @@ class EmotionDetector:
 def verify_camera():
     """Verify camera is accessible"""
     try:
-        cap = cv2.VideoCapture(CAMERA_INDEX)
-        if cap.isOpened():
-            cap.release()
-            return True
-        return False
+        # Opens the shared source, which then stays open for the session
+        return get_frame_source().is_opened()
     except:
         return False
 
 
 def test_deepface():
-    """Test DeepFace model loading"""
+    """Test DeepFace model loading (builds and warms the shared emotion model)"""
     try:
-        # Create a small test image
-        import numpy as np
-        test_img = np.zeros((48, 48, 3), dtype=np.uint8)
-        DeepFace.analyze(test_img, actions=['emotion'], enforce_detection=False)
-        return True
+        return get_emotion_model().warmup()
     except Exception as e:
         print(f"DeepFace test failed: {e}")
         return False
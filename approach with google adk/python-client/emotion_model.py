@@ -0,0 +1,135 @@
+"""
+Direct Emotion Model
+Loads DeepFace's emotion model once and runs pre-detected face crops straight
+through resize -> normalize -> predict, skipping DeepFace.analyze's second face
+detection, alignment and per-call setup
+"""
+
+import inspect
+import threading
+import time
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+FACE_INPUT_SIZE = 48
+
+
+def build_deepface_emotion_model():
+    """DeepFace's emotion model (0.0.90+ files it under the facial_attribute task)"""
+    if 'task' in inspect.signature(DeepFace.build_model).parameters:
+        return DeepFace.build_model('Emotion', task='facial_attribute')
+    return DeepFace.build_model('Emotion')
+
+
+def preprocess_face(face_roi):
+    """
+    Convert a face crop to the emotion model's input (same steps as DeepFace.analyze)
+
+    Args:
+        face_roi: Grayscale (preferred), BGR or RGB face crop (uint8)
+
+    Returns:
+        np.ndarray: float32 array of shape (48, 48, 1) in [0, 1]
+    """
+    if face_roi.ndim == 3:
+        face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+    face = cv2.resize(face_roi, (FACE_INPUT_SIZE, FACE_INPUT_SIZE))
+    return (face.astype(np.float32) / 255.0)[..., np.newaxis]
+
+
+def scores_from_probabilities(probabilities):
+    """
+    Convert model output to DeepFace.analyze's result shape
+
+    Returns:
+        dict: {'emotion': {label: percent}, 'dominant_emotion': label}
+    """
+    total = float(np.sum(probabilities)) or 1.0
+    emotion = {
+        label: float(100 * probabilities[i] / total)
+        for i, label in enumerate(EMOTION_LABELS)
+    }
+    return {
+        'emotion': emotion,
+        'dominant_emotion': EMOTION_LABELS[int(np.argmax(probabilities))]
+    }
+
+
+class EmotionModel:
+    """
+    Emotion classifier held in memory for the lifetime of the process
+    """
+
+    def __init__(self):
+        self.model = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self.lock = threading.Lock()
+
+    def load(self):
+        """Build the model on first use"""
+        with self.lock:
+            if self.model is None:
+                started = time.time()
+                built = build_deepface_emotion_model()
+                # Newer DeepFace versions wrap the Keras model in a client object
+                self.model = getattr(built, 'model', built)
+                self.load_seconds = time.time() - started
+            return self.model
+
+    def warmup(self):
+        """Load the model and run one dummy prediction so the first real face is fast"""
+        started = time.time()
+        self.predict(np.zeros((1, FACE_INPUT_SIZE, FACE_INPUT_SIZE, 1), dtype=np.float32))
+        self.warmup_seconds = time.time() - started
+        return True
+
+    def predict(self, inputs):
+        """
+        Run the model on a stacked batch
+
+        Args:
+            inputs: float32 array of shape (N, 48, 48, 1) in [0, 1]
+
+        Returns:
+            np.ndarray: (N, 7) class probabilities
+        """
+        model = self.load()
+        return model.predict(inputs, verbose=0)
+
+    def analyze_face(self, face_roi):
+        """
+        Fast path for one pre-detected face crop
+
+        Returns:
+            dict: {'emotion': {...}, 'dominant_emotion': ...}
+        """
+        inputs = preprocess_face(face_roi)[np.newaxis]
+        return scores_from_probabilities(self.predict(inputs)[0])
+
+    def analyze_faces(self, face_rois):
+        """Analyze several pre-detected face crops in one model call"""
+        if not face_rois:
+            return []
+        inputs = np.stack([preprocess_face(face_roi) for face_roi in face_rois])
+        return [scores_from_probabilities(row) for row in self.predict(inputs)]
+
+
+# Process-wide shared model
+_shared_model = None
+_shared_lock = threading.Lock()
+
+
+def get_emotion_model():
+    """Get the process-wide emotion model (built once, on first prediction)"""
+    global _shared_model
+
+    with _shared_lock:
+        if _shared_model is None:
+            _shared_model = EmotionModel()
+        return _shared_model
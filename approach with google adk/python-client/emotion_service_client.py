@@ -0,0 +1,204 @@
+"""
+Emotion Service Client
+Uploads frames to the Python emotion service as small face crops: the face is found
+locally (Haar detection with frame-to-frame tracking), cropped, converted to grayscale,
+resized to the model input size and JPEG-encoded, then sent with the service's
+"precropped" flag so the server skips its own face detection.
+"""
+
+import uuid
+
+import cv2
+import requests
+
+from config import (EMOTION_SERVICE_URL, EMOTION_SERVICE_TIMEOUT,
+                    UPLOAD_FACE_SIZE, UPLOAD_JPEG_QUALITY)
+from face_tracker import FaceTracker
+from face_detection import crop_face_gray
+from http_transport import get_http_transport
+
+
+def encode_face(face_gray, size=UPLOAD_FACE_SIZE, quality=UPLOAD_JPEG_QUALITY):
+    """
+    Resize a grayscale face crop to size x size and JPEG-encode it
+
+    Returns:
+        bytes: Grayscale JPEG
+    """
+    face = cv2.resize(face_gray, (size, size), interpolation=cv2.INTER_AREA)
+    ok, encoded = cv2.imencode('.jpg', face, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError("Could not JPEG-encode face crop")
+    return encoded.tobytes()
+
+
+def encode_frame(frame, quality=UPLOAD_JPEG_QUALITY):
+    """JPEG-encode a whole frame (fallback when no face was found locally)"""
+    ok, encoded = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, int(quality)])
+    if not ok:
+        raise ValueError("Could not JPEG-encode frame")
+    return encoded.tobytes()
+
+
+class EmotionServiceClient:
+    """
+    Client for the emotion service's binary upload and session endpoints
+    """
+
+    def __init__(self, base_url=EMOTION_SERVICE_URL, face_size=UPLOAD_FACE_SIZE,
+                 jpeg_quality=UPLOAD_JPEG_QUALITY, timeout=EMOTION_SERVICE_TIMEOUT,
+                 tracker=None, send_full_frame_without_face=False, transport=None, client_id=None):
+        """
+        Initialize emotion service client
+
+        Args:
+            base_url: Emotion service root URL
+            face_size: Side (px) of uploaded face crops
+            jpeg_quality: JPEG quality (0-100) of uploads
+            timeout: Seconds per request
+            tracker: FaceTracker used to locate faces (default: a new one)
+            send_full_frame_without_face: Upload the whole frame (server-side detection)
+                when no face is found locally, instead of skipping it
+            transport: HttpTransport (default: the process-wide pooled one)
+            client_id: Identity sent as X-Client-Id so the service may reuse cached results
+                for this client's near-identical faces (default: a new random id)
+        """
+        self.base_url = base_url.rstrip('/')
+        self.face_size = face_size
+        self.jpeg_quality = jpeg_quality
+        self.timeout = timeout
+        self.tracker = tracker or FaceTracker()
+        self.send_full_frame_without_face = send_full_frame_without_face
+        self.http = transport or get_http_transport()
+        self.client_id = client_id or uuid.uuid4().hex
+
+        # Counters
+        self.frames_sent = 0
+        self.faces_sent = 0
+        self.frames_without_face = 0
+        self.bytes_sent = 0
+        self.frame_bytes = 0
+
+    def prepare_frame(self, frame):
+        """
+        Locate the largest face in a frame and encode its upload crop
+
+        Args:
+            frame: Full-resolution BGR frame
+
+        Returns:
+            bytes: JPEG face crop, or None if no face was found
+        """
+        self.frame_bytes += frame.nbytes
+        faces = self.tracker.update(frame)
+        if not faces:
+            self.frames_without_face += 1
+            return None
+
+        box = max(faces, key=lambda face: face[2] * face[3])
+        return encode_face(crop_face_gray(frame, box), self.face_size, self.jpeg_quality)
+
+    def analyze_frame(self, frame):
+        """
+        Analyze one webcam frame
+
+        Returns:
+            dict: /detect-emotion response ({'emotions', 'dominantEmotion', 'stressLevel', ...}),
+            or None if no face was found and full-frame uploads are disabled
+        """
+        face_jpeg = self.prepare_frame(frame)
+        if face_jpeg is not None:
+            return self.upload(face_jpeg, precropped=True)
+        if self.send_full_frame_without_face:
+            return self.upload(encode_frame(frame, self.jpeg_quality), precropped=False)
+        return None
+
+    def upload(self, image_bytes, precropped=True):
+        """POST encoded image bytes to /detect-emotion/upload"""
+        return self._post_image('/detect-emotion/upload', image_bytes, precropped, 'detect-emotion/upload')
+
+    def create_session(self, session_id=None):
+        """
+        Start a streaming emotion session on the service
+
+        Returns:
+            str: Session id
+        """
+        response = self.http.post(f"{self.base_url}/sessions",
+                                  json={'sessionId': session_id} if session_id else {},
+                                  endpoint='emotion/sessions', timeout=self.timeout, idempotent=bool(session_id))
+        response.raise_for_status()
+        return response.json()['sessionId']
+
+    def push_session_frame(self, session_id, frame):
+        """
+        Analyze one frame as part of a session
+
+        Returns:
+            dict: /detect-emotion response plus the rolling session 'summary',
+            or None if the frame was skipped (no face found)
+        """
+        face_jpeg = self.prepare_frame(frame)
+        if face_jpeg is not None:
+            return self._post_image(f'/sessions/{session_id}/frames', face_jpeg, True, 'emotion/sessions/frames')
+        if self.send_full_frame_without_face:
+            return self._post_image(f'/sessions/{session_id}/frames',
+                                    encode_frame(frame, self.jpeg_quality), False, 'emotion/sessions/frames')
+        return None
+
+    def close_session(self, session_id):
+        """
+        End a session
+
+        Returns:
+            dict: Final session summary
+        """
+        response = self.http.delete(f"{self.base_url}/sessions/{session_id}",
+                                    endpoint='emotion/sessions', timeout=self.timeout)
+        response.raise_for_status()
+        return response.json().get('summary')
+
+    def is_ready(self):
+        """Check whether the service has its model loaded and warmed"""
+        try:
+            return self.http.get(f"{self.base_url}/ready", endpoint='emotion/ready', timeout=3).status_code == 200
+        except requests.RequestException:
+            return False
+
+    def _post_image(self, path, image_bytes, precropped, endpoint):
+        # Plain analysis is safe to repeat; a repeated session frame would be counted twice
+        response = self.http.post(
+            f"{self.base_url}{path}",
+            endpoint=endpoint,
+            params={'precropped': '1'} if precropped else None,
+            data=image_bytes,
+            headers={'Content-Type': 'image/jpeg', 'X-Client-Id': self.client_id},
+            timeout=self.timeout,
+            idempotent=path.startswith('/detect-emotion')
+        )
+        self.frames_sent += 1
+        self.bytes_sent += len(image_bytes)
+        if precropped:
+            self.faces_sent += 1
+        response.raise_for_status()
+        return response.json()
+
+    def stats(self):
+        """Get upload counters (bytes sent vs raw frame bytes)"""
+        return {
+            'frames_sent': self.frames_sent,
+            'faces_sent': self.faces_sent,
+            'frames_without_face': self.frames_without_face,
+            'bytes_sent': self.bytes_sent,
+            'average_upload_bytes': self.bytes_sent / self.frames_sent if self.frames_sent else 0.0,
+            'raw_frame_bytes': self.frame_bytes
+        }
+
+    def close(self):
+        """Close a transport passed in at construction (the shared one stays open for other clients)"""
+        if self.http is not get_http_transport():
+            self.http.close()
+
+    def transport_stats(self):
+        """Get per-endpoint latency counters of the underlying transport"""
+        return self.http.stats()
@@ -0,0 +1,158 @@
+"""
+Compact Emotion Timeline
+Array-backed per-sample emotion history: a float64 capture-time column, a float32
+score matrix (one column per emotion), a uint8 dominant-emotion code and an optional
+float32 stress column. Appends are O(1) amortized; the list-of-dicts JSON shape is
+only produced at serialization time (to_records / json_default).
+"""
+
+from datetime import datetime
+
+import numpy as np
+
+
+# Same order as the emotion model's output (emotion_model.EMOTION_LABELS); kept here
+# so the timeline can be used and serialized without loading DeepFace
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+EMOTION_CODES = {emotion: code for code, emotion in enumerate(EMOTION_LABELS)}
+
+
+class EmotionTimeline:
+    """
+    Growable columnar store of emotion samples
+    """
+
+    def __init__(self, start_time=None, with_stress=False, capacity=256):
+        """
+        Initialize timeline
+
+        Args:
+            start_time: Reference epoch for elapsed_seconds (default: first sample)
+            with_stress: Keep a per-sample stress column
+            capacity: Initial number of rows (doubled when full)
+        """
+        self.start_time = start_time
+        self.size = 0
+
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._scores = np.empty((capacity, len(EMOTION_LABELS)), dtype=np.float32)
+        self._dominant = np.empty(capacity, dtype=np.uint8)
+        self._stress = np.empty(capacity, dtype=np.float32) if with_stress else None
+
+    def __len__(self):
+        return self.size
+
+    def append(self, timestamp, dominant_emotion, emotion_scores, stress=None):
+        """
+        Add one sample
+
+        Args:
+            timestamp: Capture time (epoch seconds)
+            dominant_emotion: Dominant emotion label
+            emotion_scores: Emotion -> score dict (missing emotions count as 0)
+            stress: Per-sample stress (only stored with with_stress=True)
+        """
+        if self.size == len(self._timestamps):
+            self._grow()
+
+        row = self.size
+        self._timestamps[row] = timestamp
+        self._scores[row] = [emotion_scores.get(emotion, 0.0) for emotion in EMOTION_LABELS]
+        self._dominant[row] = EMOTION_CODES[dominant_emotion]
+        if self._stress is not None:
+            self._stress[row] = stress if stress is not None else np.nan
+
+        if self.start_time is None:
+            self.start_time = timestamp
+        self.size += 1
+
+    def _grow(self):
+        """Double the capacity of every column"""
+        capacity = max(1, len(self._timestamps)) * 2
+
+        def resized(column):
+            grown = np.empty((capacity,) + column.shape[1:], dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            return grown
+
+        self._timestamps = resized(self._timestamps)
+        self._scores = resized(self._scores)
+        self._dominant = resized(self._dominant)
+        if self._stress is not None:
+            self._stress = resized(self._stress)
+
+    @property
+    def timestamps(self):
+        """Capture times (float64 view)"""
+        return self._timestamps[:self.size]
+
+    @property
+    def scores(self):
+        """(n, 7) score matrix in EMOTION_LABELS order (float32 view)"""
+        return self._scores[:self.size]
+
+    @property
+    def dominant_codes(self):
+        """Dominant emotion codes (uint8 view)"""
+        return self._dominant[:self.size]
+
+    @property
+    def stress(self):
+        """Per-sample stress (float32 view), or None without a stress column"""
+        return self._stress[:self.size] if self._stress is not None else None
+
+    @property
+    def nbytes(self):
+        """Memory used by the stored rows"""
+        row = (self._timestamps.itemsize + self._scores.itemsize * self._scores.shape[1]
+               + self._dominant.itemsize + (self._stress.itemsize if self._stress is not None else 0))
+        return row * self.size
+
+    def dominant(self, index):
+        """Dominant emotion label of one sample (negative indices allowed)"""
+        return EMOTION_LABELS[self.dominant_codes[index]]
+
+    def iso_timestamp(self, index):
+        """Capture time of one sample as an ISO string"""
+        return datetime.fromtimestamp(float(self.timestamps[index])).isoformat()
+
+    def to_records(self):
+        """
+        Convert to the list-of-dicts JSON shape
+
+        Returns:
+            list: One {timestamp, elapsed_seconds, dominant_emotion, emotion_scores
+                  [, stress]} dict per sample
+        """
+        start = self.start_time or 0.0
+        scores = np.round(self.scores.astype(np.float64), 4).tolist()
+        stress = np.round(self.stress.astype(np.float64), 4).tolist() if self._stress is not None else None
+
+        records = []
+        for row, timestamp in enumerate(self.timestamps.tolist()):
+            record = {
+                "timestamp": datetime.fromtimestamp(timestamp).isoformat(),
+                "elapsed_seconds": round(timestamp - start, 2),
+                "dominant_emotion": EMOTION_LABELS[self._dominant[row]],
+                "emotion_scores": dict(zip(EMOTION_LABELS, scores[row]))
+            }
+            if stress is not None:
+                record["stress"] = stress[row]
+            records.append(record)
+        return records
+
+
+def json_default(obj):
+    """
+    json.dump(s) default hook for emotion data containing timelines or numpy values
+
+    Usage:
+        json.dump(summary, f, indent=2, default=json_default)
+    """
+    if isinstance(obj, EmotionTimeline):
+        return obj.to_records()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
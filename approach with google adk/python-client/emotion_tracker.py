@@ -6,8 +6,13 @@ Tracks emotions while user solves questions (runs parallel with timer)
 import cv2
 import threading
 import time
-from deepface import DeepFace
 from collections import Counter
+from frame_source import get_frame_source
+from emotion_model import get_emotion_model, EMOTION_LABELS
+from emotion_detector import face_crop
+from frame_sampler import AdaptiveFrameSampler
+from emotion_aggregator import EmotionAggregator
+from emotion_timeline import EmotionTimeline
 
 
 class EmotionTracker:
@@ -20,17 +25,19 @@ class EmotionTracker:
         Initialize emotion tracker
         
         Args:
-            capture_interval: Seconds between emotion captures (default: 2.0)
+            capture_interval: Maximum seconds between emotion captures while the
+                face is unchanged (default: 2.0); changed faces are captured sooner
         """
         self.capture_interval = capture_interval
+        self.sampler = None
         self.is_running = False
         self.thread = None
+        self.source = None
         self.cap = None
         
-        # Collected data
-        self.emotions = []
-        self.stress_levels = []
-        self.timestamps = []
+        # Collected data (the aggregator holds the running analytics)
+        self.aggregator = EmotionAggregator()
+        self.timeline = EmotionTimeline(with_stress=True)
         self.start_time = None
         self.end_time = None
         
@@ -45,18 +52,21 @@ class EmotionTracker:
             print("⚠️ Emotion tracker already running")
             return False
         
-        # Initialize webcam
-        self.cap = cv2.VideoCapture(0)
-        if not self.cap.isOpened():
+        # Attach to the shared webcam (opened once, reused across questions)
+        self.source = get_frame_source()
+        if not self.source.is_opened():
             print("❌ Failed to open webcam")
             return False
+        self.cap = self.source.reader()
+        
+        # Scene-change/CPU-budget driven sampling instead of a fixed sleep
+        self.sampler = AdaptiveFrameSampler(keepalive_interval=self.capture_interval)
         
         # Reset data
         with self.lock:
-            self.emotions = []
-            self.stress_levels = []
-            self.timestamps = []
             self.start_time = time.time()
+            self.aggregator = EmotionAggregator()
+            self.timeline = EmotionTimeline(self.start_time, with_stress=True)
             self.end_time = None
         
         # Start background thread
@@ -85,10 +95,8 @@ class EmotionTracker:
         if self.thread:
             self.thread.join(timeout=3.0)
         
-        # Release webcam
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        # Detach from webcam (the shared source keeps it open for the next question)
+        self.cap = None
         
         # Calculate analytics
         with self.lock:
@@ -103,6 +111,7 @@ class EmotionTracker:
         Background tracking loop (runs in separate thread)
         """
         while self.is_running:
+            iteration_started = time.time()
             try:
                 # Capture frame
                 ret, frame = self.cap.read()
@@ -111,67 +120,71 @@ class EmotionTracker:
                     time.sleep(self.capture_interval)
                     continue
                 
-                # Analyze emotions using DeepFace
-                result = DeepFace.analyze(
-                    frame,
-                    actions=['emotion'],
-                    enforce_detection=False,
-                    silent=True
-                )
-                
-                # Extract emotion data
-                if isinstance(result, list):
-                    result = result[0]
-                
-                emotions = result.get('emotion', {})
-                dominant_emotion = result.get('dominant_emotion', 'neutral')
-                
-                # Calculate stress level (simplified)
-                # High stress = angry + fear + disgust
-                # Low stress = happy + neutral
-                stress = (
-                    emotions.get('angry', 0) * 0.4 +
-                    emotions.get('fear', 0) * 0.4 +
-                    emotions.get('disgust', 0) * 0.2
-                ) / 100.0  # Normalize to 0-1
-                
-                # Store data (thread-safe)
-                with self.lock:
-                    self.emotions.append({
-                        'dominant': dominant_emotion,
-                        'scores': emotions
-                    })
-                    self.stress_levels.append(stress)
-                    self.timestamps.append(time.time())
-                
-                # Display frame (optional, can be disabled for performance)
-                cv2.putText(frame, f"Emotion: {dominant_emotion}", (10, 30),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.putText(frame, f"Stress: {stress:.2f}", (10, 60),
-                           cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                cv2.imshow('Emotion Detection', frame)
-                
-                # Check for 'q' key to quit (non-blocking)
-                if cv2.waitKey(1) & 0xFF == ord('q'):
-                    self.is_running = False
+                # Skip the model entirely while the face has not changed
+                face_roi = face_crop(frame)
+                if self.sampler.should_analyze(face_roi):
+                    self._analyze_face(frame, face_roi)
                 
             except Exception as e:
                 print(f"⚠️ Error in tracking loop: {e}")
             
-            # Wait for next capture
-            time.sleep(self.capture_interval)
+            # Wait for next capture - inference time counts against the interval
+            self.sampler.record_work(time.time() - iteration_started, iteration_started)
+            time.sleep(self.sampler.wait_time())
         
         # Clean up OpenCV windows
         cv2.destroyAllWindows()
     
+    def _analyze_face(self, frame, face_roi):
+        """
+        Analyze one face crop and store the sample
+        """
+        # A few samples per second at most, so the direct model path is used
+        # instead of the batching engine
+        result = get_emotion_model().analyze_face(face_roi)
+        
+        # Extract emotion data
+        emotions = result.get('emotion', {})
+        dominant_emotion = result.get('dominant_emotion', 'neutral')
+        
+        # Calculate stress level (simplified)
+        # High stress = angry + fear + disgust
+        # Low stress = happy + neutral
+        stress = (
+            emotions.get('angry', 0) * 0.4 +
+            emotions.get('fear', 0) * 0.4 +
+            emotions.get('disgust', 0) * 0.2
+        ) / 100.0  # Normalize to 0-1
+        
+        # Store data (thread-safe)
+        with self.lock:
+            self.aggregator.update(dominant_emotion, emotions, stress=stress)
+            self.timeline.append(time.time(), dominant_emotion, emotions, stress)
+        
+        # Display frame (optional, can be disabled for performance)
+        # Draw on a copy - the frame buffer is shared with other consumers
+        display = frame.copy()
+        cv2.putText(display, f"Emotion: {dominant_emotion}", (10, 30),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.putText(display, f"Stress: {stress:.2f}", (10, 60),
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+        cv2.imshow('Emotion Detection', display)
+        
+        # Check for 'q' key to quit (non-blocking)
+        if cv2.waitKey(1) & 0xFF == ord('q'):
+            self.is_running = False
+    
     def _calculate_analytics(self):
         """
         Calculate emotion analytics from collected data
+        Cheap enough to call mid-question: statistics come from the running aggregator
         
         Returns:
             dict: Analytics summary
         """
-        if not self.emotions:
+        aggregator = self.aggregator
+        timeline = self.timeline
+        if not aggregator.samples:
             return {
                 'success': False,
                 'error': 'No emotion data collected'
@@ -180,45 +193,30 @@ class EmotionTracker:
         # Duration
         duration = self.end_time - self.start_time if self.end_time else 0
         
-        # Dominant emotions
-        dominant_emotions = [e['dominant'] for e in self.emotions]
-        emotion_counts = Counter(dominant_emotions)
-        most_common_emotion = emotion_counts.most_common(1)[0][0]
-        
-        # Stress analytics
-        avg_stress = sum(self.stress_levels) / len(self.stress_levels)
-        peak_stress = max(self.stress_levels)
-        min_stress = min(self.stress_levels)
-        
-        # Stress stability (standard deviation)
-        mean_stress = avg_stress
-        variance = sum((x - mean_stress) ** 2 for x in self.stress_levels) / len(self.stress_levels)
-        std_dev = variance ** 0.5
-        
         # Emotion distribution (average scores)
-        avg_emotions = {}
-        for emotion_key in ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']:
-            scores = [e['scores'].get(emotion_key, 0) for e in self.emotions]
-            avg_emotions[emotion_key] = sum(scores) / len(scores) if scores else 0
+        average_scores = aggregator.average_scores()
+        avg_emotions = {emotion: average_scores.get(emotion, 0) for emotion in EMOTION_LABELS}
         
         return {
             'success': True,
             'duration': duration,
-            'samples_count': len(self.emotions),
-            'dominant_emotion': most_common_emotion,
-            'emotion_distribution': dict(emotion_counts),
-            'average_stress': avg_stress,
-            'peak_stress': peak_stress,
-            'min_stress': min_stress,
-            'stress_stability': std_dev,
+            'samples_count': aggregator.samples,
+            'dominant_emotion': aggregator.dominant_emotion(),
+            'emotion_distribution': aggregator.emotion_counts(),
+            'average_stress': aggregator.stress.mean,
+            'peak_stress': aggregator.stress.max,
+            'min_stress': aggregator.stress.min,
+            'stress_stability': aggregator.stress.std(),
             'average_emotions': avg_emotions,
             'timeline': [
                 {
                     'timestamp': ts - self.start_time,
-                    'emotion': self.emotions[i]['dominant'],
-                    'stress': self.stress_levels[i]
+                    'emotion': EMOTION_LABELS[code],
+                    'stress': stress
                 }
-                for i, ts in enumerate(self.timestamps)
+                for ts, code, stress in zip(timeline.timestamps.tolist(),
+                                            timeline.dominant_codes.tolist(),
+                                            timeline.stress.tolist())
             ]
         }
 
@@ -0,0 +1,73 @@
+"""
+Downscaled Face Detection
+Finds faces on a reduced-size grayscale copy of the frame, maps the boxes back to
+full resolution and color-converts only the face ROI
+"""
+
+import cv2
+
+from config import FACE_DETECTION_SCALE
+
+
+# Load face cascade classifier
+face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+
+def downscale_gray(frame, scale=FACE_DETECTION_SCALE):
+    """
+    Shrink a frame and convert it to grayscale (resize first, so fewer pixels are converted)
+
+    Args:
+        frame: BGR or grayscale frame
+        scale: Resize factor (1.0 keeps full resolution)
+    """
+    if scale != 1.0:
+        frame = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    if frame.ndim == 3:
+        frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    return frame
+
+
+def remap_boxes(boxes, scale, frame_shape):
+    """
+    Map boxes found on a downscaled frame back to full-resolution coordinates
+
+    Returns:
+        list: (x, y, w, h) boxes clipped to the full frame
+    """
+    frame_h, frame_w = frame_shape[:2]
+    remapped = []
+    for (x, y, w, h) in boxes:
+        x, y = int(x / scale), int(y / scale)
+        w = min(int(w / scale), frame_w - x)
+        h = min(int(h / scale), frame_h - y)
+        remapped.append((x, y, w, h))
+    return remapped
+
+
+def detect_faces_scaled(frame, cascade=face_cascade, scale=FACE_DETECTION_SCALE, min_size=(30, 30)):
+    """
+    Detect faces on a downscaled grayscale copy of frame
+
+    Args:
+        frame: Full-resolution BGR or grayscale frame
+        cascade: Loaded cv2.CascadeClassifier
+        scale: Detection resize factor
+        min_size: Minimum face size in full-resolution pixels
+
+    Returns:
+        list: Face boxes (x, y, w, h) in full-resolution coordinates
+    """
+    small_gray = downscale_gray(frame, scale)
+    small_min = (max(1, int(min_size[0] * scale)), max(1, int(min_size[1] * scale)))
+    faces = cascade.detectMultiScale(small_gray, scaleFactor=1.1, minNeighbors=5, minSize=small_min)
+    return remap_boxes(faces, scale, frame.shape)
+
+
+def crop_face_gray(frame, box):
+    """Crop a full-resolution face ROI and convert only that ROI to grayscale"""
+    x, y, w, h = box
+    face_roi = frame[y:y + h, x:x + w]
+    if face_roi.ndim == 3:
+        face_roi = cv2.cvtColor(face_roi, cv2.COLOR_BGR2GRAY)
+    return face_roi
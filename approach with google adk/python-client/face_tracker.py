@@ -0,0 +1,137 @@
+"""
+Frame-to-Frame Face Tracker
+Runs the Haar cascade only every N frames (or when the track is lost) and follows
+the face boxes in between with cheap template matching. Detection and tracking both
+run on a downscaled grayscale frame; boxes are returned in full resolution.
+"""
+
+import cv2
+
+from config import FACE_REDETECT_INTERVAL, FACE_TRACK_MIN_CONFIDENCE, FACE_DETECTION_SCALE
+from face_detection import face_cascade, downscale_gray, remap_boxes
+
+
+class FaceTracker:
+    """
+    Detect-then-track face locator for consecutive frames
+    """
+
+    def __init__(self, cascade=face_cascade, redetect_interval=FACE_REDETECT_INTERVAL,
+                 min_confidence=FACE_TRACK_MIN_CONFIDENCE, search_margin=0.5,
+                 scale=FACE_DETECTION_SCALE):
+        """
+        Initialize face tracker
+
+        Args:
+            cascade: Loaded cv2.CascadeClassifier used for full detection
+            redetect_interval: Run full detection at least every N frames
+            min_confidence: Template-match score (0-1) below which the track is lost
+            search_margin: Search window padding around the last box (fraction of box size)
+            scale: Resize factor of the frame used for detection and tracking
+        """
+        self.cascade = cascade
+        self.scale = scale
+        self.redetect_interval = redetect_interval
+        self.min_confidence = min_confidence
+        self.search_margin = search_margin
+
+        # (template, box) per tracked face, in downscaled coordinates
+        self.tracks = []
+        self.frames_since_detection = 0
+
+        # Counters
+        self.frames = 0
+        self.detections_run = 0
+        self.tracked_frames = 0
+        self.tracks_lost = 0
+
+    def update(self, frame):
+        """
+        Locate faces in the next frame
+
+        Args:
+            frame: Full-resolution BGR or grayscale frame
+
+        Returns:
+            list: Face boxes as (x, y, w, h) in full-resolution coordinates
+        """
+        self.frames += 1
+        small_gray = downscale_gray(frame, self.scale)
+        return remap_boxes(self._locate(small_gray), self.scale, frame.shape)
+
+    def reset(self):
+        """Forget tracked faces so the next frame runs full detection"""
+        self.tracks = []
+        self.frames_since_detection = 0
+
+    def stats(self):
+        """Get detection/tracking counters"""
+        detection_rate = self.detections_run / self.frames if self.frames else 0.0
+        return {
+            "frames": self.frames,
+            "full_detections": self.detections_run,
+            "tracked_frames": self.tracked_frames,
+            "tracks_lost": self.tracks_lost,
+            "detection_rate": round(detection_rate, 3)
+        }
+
+    def _locate(self, gray_frame):
+        """Detect or track faces on the downscaled grayscale frame"""
+        if not self.tracks or self.frames_since_detection >= self.redetect_interval:
+            return self._detect(gray_frame)
+
+        boxes = []
+        for template, box in self.tracks:
+            new_box = self._follow(gray_frame, template, box)
+            if new_box is None:
+                # Low confidence - fall back to a full detection on this frame
+                self.tracks_lost += 1
+                return self._detect(gray_frame)
+            boxes.append(new_box)
+
+        self.tracks = [(template, box) for (template, _), box in zip(self.tracks, boxes)]
+        self.frames_since_detection += 1
+        self.tracked_frames += 1
+        return boxes
+
+    def _detect(self, gray_frame):
+        """Run the Haar cascade and restart tracks from its boxes"""
+        min_size = max(1, int(30 * self.scale))
+        faces = self.cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5,
+                                              minSize=(min_size, min_size))
+
+        self.tracks = [
+            (gray_frame[y:y + h, x:x + w].copy(), (int(x), int(y), int(w), int(h)))
+            for (x, y, w, h) in faces
+        ]
+        self.frames_since_detection = 0
+        self.detections_run += 1
+        return [box for _, box in self.tracks]
+
+    def _follow(self, gray_frame, template, box):
+        """
+        Find template near its last box
+
+        Returns:
+            tuple: New (x, y, w, h), or None if the match is below min_confidence
+        """
+        x, y, w, h = box
+        frame_h, frame_w = gray_frame.shape[:2]
+        pad_x = int(w * self.search_margin)
+        pad_y = int(h * self.search_margin)
+
+        left = max(0, x - pad_x)
+        top = max(0, y - pad_y)
+        right = min(frame_w, x + w + pad_x)
+        bottom = min(frame_h, y + h + pad_y)
+
+        window = gray_frame[top:bottom, left:right]
+        if window.shape[0] < h or window.shape[1] < w:
+            return None
+
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        _, score, _, location = cv2.minMaxLoc(result)
+        if score < self.min_confidence:
+            return None
+
+        return (left + location[0], top + location[1], w, h)
@@ -0,0 +1,115 @@
+"""
+Adaptive Frame Sampler
+Decides when the emotion loop should look at the next frame and whether a face is
+worth analyzing: frames whose face ROI has not changed are skipped, and the sampling
+rate is held to a target fps and a maximum share of one CPU core
+"""
+
+import time
+
+import cv2
+import numpy as np
+
+from config import (SAMPLER_TARGET_FPS, SAMPLER_MAX_CORE_SHARE,
+                    SAMPLER_CHANGE_THRESHOLD, SAMPLER_KEEPALIVE_INTERVAL)
+
+
+SIGNATURE_SIZE = 16
+
+
+class AdaptiveFrameSampler:
+    """
+    Scene-change and CPU-budget driven sampling scheduler
+    """
+
+    def __init__(self, target_fps=SAMPLER_TARGET_FPS, max_core_share=SAMPLER_MAX_CORE_SHARE,
+                 change_threshold=SAMPLER_CHANGE_THRESHOLD, keepalive_interval=SAMPLER_KEEPALIVE_INTERVAL):
+        """
+        Initialize sampler
+
+        Args:
+            target_fps: Maximum analysis iterations per second
+            max_core_share: Maximum fraction of one core the loop may use (0-1)
+            change_threshold: Mean absolute pixel difference (0-255) of the 16x16 face
+                signature below which a face counts as unchanged
+            keepalive_interval: Analyze an unchanged face at least this often (seconds)
+        """
+        self.target_fps = target_fps
+        self.max_core_share = max_core_share
+        self.change_threshold = change_threshold
+        self.keepalive_interval = keepalive_interval
+
+        self.interval = 1.0 / target_fps
+        self.average_work = 0.0
+        self.next_allowed = 0.0
+        self.last_signature = None
+        self.last_analyzed = 0.0
+
+        # Counters
+        self.iterations = 0
+        self.analyzed = 0
+        self.skipped_static = 0
+
+    def set_target_fps(self, target_fps):
+        """Change the target rate (e.g. drop to keep-alive sampling)"""
+        self.target_fps = target_fps
+        self.interval = max(1.0 / target_fps, self.average_work / self.max_core_share)
+        self.next_allowed = self.last_analyzed + self.interval
+
+    def wait_time(self):
+        """Seconds to sleep before the next iteration to stay within budget"""
+        return max(0.0, self.next_allowed - time.time())
+
+    def should_analyze(self, face_roi):
+        """
+        Check whether a face ROI changed enough since the last analyzed one
+
+        Args:
+            face_roi: Grayscale face crop
+
+        Returns:
+            bool: True if the face should be sent to the emotion model
+        """
+        now = time.time()
+        signature = cv2.resize(face_roi, (SIGNATURE_SIZE, SIGNATURE_SIZE),
+                               interpolation=cv2.INTER_AREA).astype(np.float32)
+
+        if self.last_signature is not None and now - self.last_analyzed < self.keepalive_interval:
+            difference = float(np.mean(np.abs(signature - self.last_signature)))
+            if difference < self.change_threshold:
+                self.skipped_static += 1
+                return False
+
+        self.last_signature = signature
+        self.last_analyzed = now
+        self.analyzed += 1
+        return True
+
+    def record_work(self, seconds, started=None):
+        """
+        Record CPU time spent on one iteration and schedule the next one
+
+        Args:
+            seconds: Work done this iteration (detection + inference cost)
+            started: When the iteration started (default: now - seconds)
+        """
+        self.iterations += 1
+        if started is None:
+            started = time.time() - seconds
+
+        # Exponential moving average smooths out single slow batches
+        self.average_work = seconds if self.iterations == 1 else 0.8 * self.average_work + 0.2 * seconds
+
+        # Work / interval must stay below the core share
+        self.interval = max(1.0 / self.target_fps, self.average_work / self.max_core_share)
+        self.next_allowed = started + self.interval
+
+    def stats(self):
+        """Get sampling counters"""
+        return {
+            "iterations": self.iterations,
+            "faces_analyzed": self.analyzed,
+            "skipped_unchanged": self.skipped_static,
+            "current_interval_ms": round(self.interval * 1000, 1),
+            "average_work_ms": round(self.average_work * 1000, 1)
+        }
@@ -0,0 +1,214 @@
+"""
+Shared Camera Frame Source
+Opens the webcam once per process and keeps the newest frames in a ring buffer
+so every consumer (detector, tracker, readiness check) reads from the same device
+"""
+
+import atexit
+import threading
+import time
+from collections import deque, namedtuple
+
+import cv2
+
+from config import CAMERA_INDEX, FRAME_BUFFER_SIZE
+
+
+# One captured frame: monotonically increasing id, capture time (epoch) and BGR image.
+# The image is shared between consumers and must be treated as read-only.
+Frame = namedtuple('Frame', ['frame_id', 'timestamp', 'image'])
+
+
+class FrameSource:
+    """
+    Background camera reader that owns the only cv2.VideoCapture in the process
+    """
+
+    def __init__(self, camera_index=CAMERA_INDEX, buffer_size=FRAME_BUFFER_SIZE):
+        """
+        Initialize frame source
+
+        Args:
+            camera_index: OpenCV camera index (default: config.CAMERA_INDEX)
+            buffer_size: Number of recent frames kept in the ring buffer
+        """
+        self.camera_index = camera_index
+        self.buffer = deque(maxlen=buffer_size)
+        self.cap = None
+        self.thread = None
+        self.is_running = False
+        self.frame_count = 0
+        self.opened_at = None
+        self.subscribers = []
+
+        # Guards the buffer and wakes up readers waiting for a new frame
+        self.condition = threading.Condition()
+
+    def start(self):
+        """
+        Open the camera and start the reader thread (no-op if already running)
+
+        Returns:
+            bool: Whether the camera is open
+        """
+        with self.condition:
+            if self.is_running:
+                return True
+
+            self.cap = cv2.VideoCapture(self.camera_index)
+            if not self.cap.isOpened():
+                self.cap.release()
+                self.cap = None
+                return False
+
+            self.is_running = True
+            self.opened_at = time.time()
+
+        self.thread = threading.Thread(target=self._reader_loop, daemon=True)
+        self.thread.start()
+        return True
+
+    def release(self):
+        """Stop the reader thread and release the camera"""
+        with self.condition:
+            if not self.is_running:
+                return
+            self.is_running = False
+            self.condition.notify_all()
+
+        if self.thread:
+            self.thread.join(timeout=2.0)
+            self.thread = None
+
+        if self.cap:
+            self.cap.release()
+            self.cap = None
+
+        with self.condition:
+            self.buffer.clear()
+
+    def is_opened(self):
+        """Check whether the camera is open and being read"""
+        return self.is_running
+
+    def _reader_loop(self):
+        """Read frames as fast as the camera delivers them (runs in separate thread)"""
+        while self.is_running:
+            ret, image = self.cap.read()
+            if not ret:
+                # Transient read failure - consumers time out if it persists
+                time.sleep(0.05)
+                continue
+
+            with self.condition:
+                self.frame_count += 1
+                frame = Frame(self.frame_count, time.time(), image)
+                self.buffer.append(frame)
+                subscribers = list(self.subscribers)
+                self.condition.notify_all()
+
+            # Push to pipeline queues outside the lock (queues never block)
+            for subscriber in subscribers:
+                subscriber.put(frame)
+
+    def latest(self):
+        """Get the newest buffered frame (or None)"""
+        with self.condition:
+            return self.buffer[-1] if self.buffer else None
+
+    def wait_for_frame(self, after_id=0, timeout=2.0):
+        """
+        Wait for a frame newer than after_id
+
+        Args:
+            after_id: Id of the last frame the caller has already seen
+            timeout: Maximum seconds to wait
+
+        Returns:
+            Frame: Newest frame, or None on timeout / camera closed
+        """
+        deadline = time.time() + timeout
+
+        with self.condition:
+            while self.is_running and self.frame_count <= after_id:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return None
+                self.condition.wait(remaining)
+
+            if not self.is_running or not self.buffer:
+                return None
+            return self.buffer[-1]
+
+    def subscribe(self, queue):
+        """Push every new frame into queue (must provide a non-blocking put)"""
+        with self.condition:
+            self.subscribers.append(queue)
+
+    def unsubscribe(self, queue):
+        """Stop pushing frames into queue"""
+        with self.condition:
+            if queue in self.subscribers:
+                self.subscribers.remove(queue)
+
+    def reader(self, timeout=2.0):
+        """Create a per-consumer cursor over this source"""
+        return FrameReader(self, timeout)
+
+
+class FrameReader:
+    """
+    Per-consumer cursor with a cv2.VideoCapture-style read()
+    Each read returns the freshest frame this reader has not seen yet
+    """
+
+    def __init__(self, source, timeout=2.0):
+        self.source = source
+        self.timeout = timeout
+        self.last_id = 0
+        self.last_timestamp = None
+
+    def read(self):
+        """
+        Read the next unseen frame
+
+        Returns:
+            tuple: (ret, image) like cv2.VideoCapture.read()
+        """
+        frame = self.source.wait_for_frame(self.last_id, self.timeout)
+        if frame is None:
+            return False, None
+
+        self.last_id = frame.frame_id
+        self.last_timestamp = frame.timestamp
+        return True, frame.image
+
+
+# Process-wide shared source
+_shared_source = None
+_shared_lock = threading.Lock()
+
+
+def get_frame_source(camera_index=CAMERA_INDEX):
+    """
+    Get the process-wide frame source, opening the camera on first use
+
+    Returns:
+        FrameSource: Shared source (check is_opened() for camera availability)
+    """
+    global _shared_source
+
+    with _shared_lock:
+        if _shared_source is None:
+            _shared_source = FrameSource(camera_index)
+            atexit.register(_shared_source.release)
+
+        _shared_source.start()
+        return _shared_source
+
+
+def release_frame_source():
+    """Release the shared camera (e.g. at the end of an assessment session)"""
+    with _shared_lock:
+        if _shared_source is not None:
+            _shared_source.release()
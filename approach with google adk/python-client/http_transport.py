@@ -0,0 +1,263 @@
+"""
+Shared HTTP Transport
+One pooled keep-alive session for every backend call, with per-endpoint timeout
+budgets, retries with jittered exponential backoff and per-request latency logging.
+
+POST requests carry an Idempotency-Key header that is reused across retries, so a
+server can recognize a repeated request (the backend does not yet). Every request is
+retried when it never reached the server (connection refused, connect timeout) or was
+turned away before processing (429, 503). Gateway errors (502, 504), read timeouts and
+connections dropped mid-request are only retried for requests marked idempotent,
+because the server may already have processed them.
+"""
+
+import logging
+import random
+import threading
+import time
+import uuid
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+from config import (HTTP_POOL_SIZE, HTTP_CONNECT_TIMEOUT, HTTP_DEFAULT_TIMEOUT, HTTP_TIMEOUTS,
+                    HTTP_MAX_RETRIES, HTTP_BACKOFF_BASE, HTTP_BACKOFF_MAX, HTTP_RETRY_AFTER_MAX)
+
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+RETRY_STATUSES = {429, 502, 503, 504}
+# Statuses a server answers before processing the request, so even non-idempotent requests may repeat
+REJECTED_STATUSES = {429, 503}
+
+
+def retryable_status(status, idempotent):
+    """Whether a response status may be retried"""
+    return status in (RETRY_STATUSES if idempotent else REJECTED_STATUSES)
+
+
+def endpoint_name(url):
+    """Endpoint label of a URL: its path without slashes at the ends ('api/sessions/start')"""
+    return urlsplit(url).path.strip('/') or '/'
+
+
+def read_timeout_budget(timeouts, endpoint, default):
+    """
+    Read timeout of an endpoint from a budget table
+    Budgets are matched on the end of the path ('sessions/start' covers 'api/sessions/start');
+    the longest matching key wins
+    """
+    matches = [key for key in timeouts if endpoint == key or endpoint.endswith('/' + key)]
+    return timeouts[max(matches, key=len)] if matches else default
+
+
+def request_never_sent(error):
+    """Whether a requests failure happened before the request reached the server"""
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def backoff_delay(attempt, base, cap, retry_after=None, retry_after_cap=HTTP_RETRY_AFTER_MAX):
+    """
+    Full-jitter exponential backoff (at most `cap`), but at least the server's Retry-After
+    (seconds form, at most `retry_after_cap`)
+    """
+    delay = random.uniform(0, min(cap, base * (2 ** attempt)))
+    if retry_after is not None:
+        try:
+            delay = max(delay, min(retry_after_cap, float(retry_after)))
+        except ValueError:
+            pass
+    return delay
+
+
+class EndpointStats:
+    """
+    Request count, errors, retries and latency of one endpoint
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.errors = 0
+        self.retries = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = None
+
+    def record(self, elapsed_ms, failed):
+        self.requests += 1
+        self.errors += 1 if failed else 0
+        self.total_ms += elapsed_ms
+        self.max_ms = max(self.max_ms, elapsed_ms)
+        self.last_ms = elapsed_ms
+
+    def summary(self):
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'mean_ms': round(self.total_ms / self.requests, 1) if self.requests else None,
+            'max_ms': round(self.max_ms, 1),
+            'last_ms': round(self.last_ms, 1) if self.last_ms is not None else None
+        }
+
+
+class HttpTransport:
+    """
+    Pooled requests.Session with timeouts, retries and latency stats per endpoint
+    """
+
+    def __init__(self, pool_size=HTTP_POOL_SIZE, timeouts=None, default_timeout=HTTP_DEFAULT_TIMEOUT,
+                 connect_timeout=HTTP_CONNECT_TIMEOUT, max_retries=HTTP_MAX_RETRIES,
+                 backoff_base=HTTP_BACKOFF_BASE, backoff_max=HTTP_BACKOFF_MAX):
+        """
+        Initialize HTTP transport
+
+        Args:
+            pool_size: Keep-alive connections kept per host
+            timeouts: Read timeout (seconds) per endpoint name (default: HTTP_TIMEOUTS)
+            default_timeout: Read timeout for endpoints without a budget
+            connect_timeout: Seconds to establish a connection
+            max_retries: Retries after the first attempt
+            backoff_base: Retry n waits a random time up to backoff_base * 2^n seconds
+            backoff_max: Longest wait between attempts
+        """
+        self.timeouts = dict(HTTP_TIMEOUTS if timeouts is None else timeouts)
+        self.default_timeout = default_timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+        self.stats_lock = threading.Lock()
+        self.endpoints = {}
+
+    def timeout_for(self, endpoint):
+        """(connect, read) timeout of an endpoint"""
+        return (self.connect_timeout, read_timeout_budget(self.timeouts, endpoint, self.default_timeout))
+
+    def request(self, method, url, endpoint=None, timeout=None, idempotent=None, headers=None,
+                max_retries=None, deadline=None, **kwargs):
+        """
+        Send a request, retrying transient failures
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            endpoint: Name for timeout lookup and stats (default: the URL path)
+            timeout: Read timeout override (seconds)
+            idempotent: Safe to repeat after the server may have processed it (default: by method)
+            headers: Extra headers
+            max_retries: Retry limit override
+            deadline: Seconds all attempts and waits together may take; read timeouts are
+                shortened to fit and no retry starts past it (default: no limit)
+            **kwargs: Passed to requests (json, data, params, ...)
+
+        Returns:
+            requests.Response: Last response (may be an error status)
+
+        Raises:
+            requests.RequestException: The last attempt failed without a response
+        """
+        method = method.upper()
+        endpoint = endpoint or endpoint_name(url)
+        if idempotent is None:
+            idempotent = method in IDEMPOTENT_METHODS
+        timeout = self.timeout_for(endpoint) if timeout is None else (self.connect_timeout, timeout)
+        if max_retries is None:
+            max_retries = self.max_retries
+        give_up_at = time.perf_counter() + deadline if deadline is not None else None
+
+        headers = dict(headers or {})
+        if method == 'POST':
+            headers.setdefault('Idempotency-Key', uuid.uuid4().hex)
+
+        attempt = 0
+        while True:
+            started = time.perf_counter()
+            attempt_timeout = timeout
+            if give_up_at is not None:
+                attempt_timeout = (timeout[0], max(0.1, min(timeout[1], give_up_at - started)))
+            try:
+                response = self.session.request(method, url, headers=headers, timeout=attempt_timeout, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                elapsed_ms = self._record(endpoint, started, failed=True)
+                retryable = idempotent or request_never_sent(e)
+                logger.info(f"{method} {endpoint} failed after {elapsed_ms:.1f} ms "
+                            f"(attempt {attempt + 1}): {e.__class__.__name__}")
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                if not retryable or attempt >= max_retries or self._past(give_up_at, delay):
+                    raise
+            else:
+                elapsed_ms = self._record(endpoint, started, failed=response.status_code >= 500)
+                logger.info(f"{method} {endpoint} -> {response.status_code} in {elapsed_ms:.1f} ms "
+                            f"(attempt {attempt + 1})")
+                if not retryable_status(response.status_code, idempotent) or attempt >= max_retries:
+                    return response
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max,
+                                      response.headers.get('Retry-After'))
+                if self._past(give_up_at, delay):
+                    return response
+                response.close()
+
+            with self.stats_lock:
+                self.endpoints[endpoint].retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url, **kwargs):
+        return self.request('DELETE', url, **kwargs)
+
+    @staticmethod
+    def _past(give_up_at, delay):
+        """Whether waiting `delay` seconds would reach the request deadline"""
+        return give_up_at is not None and time.perf_counter() + delay >= give_up_at
+
+    def _record(self, endpoint, started, failed):
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.stats_lock:
+            stats = self.endpoints.get(endpoint)
+            if stats is None:
+                stats = self.endpoints[endpoint] = EndpointStats()
+            stats.record(elapsed_ms, failed)
+        return elapsed_ms
+
+    def stats(self):
+        """Get per-endpoint request, error, retry and latency counters"""
+        with self.stats_lock:
+            return {endpoint: stats.summary() for endpoint, stats in self.endpoints.items()}
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+
+# Process-wide shared transport
+_shared_transport = None
+_shared_lock = threading.Lock()
+
+
+def get_http_transport():
+    """Get the process-wide HTTP transport"""
+    global _shared_transport
+
+    with _shared_lock:
+        if _shared_transport is None:
+            _shared_transport = HttpTransport()
+        return _shared_transport
@@ -0,0 +1,340 @@
+"""
+Backend Load Generator
+Replays recorded assessments (realtime_assessment_*.json, integrated_output_*.json,
+emotion_summary_*.json) as per-student scripts and drives N concurrent virtual
+students through the session endpoints with the asyncio client. Think times and
+emotion payloads come from the recordings. Reports throughput, p50/p95/p99 latency
+and error rate per endpoint.
+
+Usage:
+    python load_generator.py --students 200 --ramp-up 60
+    python load_generator.py --students 50 --think-scale 0.1 --recorded-questions
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+import random
+import time
+from collections import Counter
+from datetime import datetime
+
+from async_client import AsyncAssessmentClient, AssessmentAPIError
+from config import API_BASE_URL, ASYNC_MAX_CONCURRENCY, DEFAULT_GRADE, DEFAULT_QUESTIONS
+
+
+# Recordings are written to the repository root by the assessment scripts
+RECORDINGS_DIR = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+DEFAULT_RECORDINGS = ['realtime_assessment_*.json', 'integrated_output_*.json', 'emotion_summary_*.json']
+
+MIN_THINK_SECONDS = 1.0
+THINK_JITTER = 0.2  # Think times vary by +/- this fraction between virtual students
+
+
+def session_emotion_data(summary, question_number):
+    """Convert a recorded emotion summary to the session API's emotion_data payload"""
+    return {
+        'emotion': summary.get('overall_dominant_emotion', 'neutral'),
+        'stressLevel': summary.get('stress_level', 3),
+        'emotionPercentages': summary.get('dominant_emotion_percentages', {}),
+        'emotionScores': summary.get('average_emotion_scores', {}),
+        'frameCount': summary.get('total_frames_analyzed', 0),
+        'analysisDuration': summary.get('analysis_duration_seconds', 0),
+        'questionNumber': question_number
+    }
+
+
+def load_script(path):
+    """
+    Turn one recording into a student script
+
+    Returns:
+        dict: {'source', 'topic', 'grade', 'steps': [{'think_seconds', 'emotion', 'question',
+               'answer', 'is_correct'}, ...]}, or None if the file is not a known recording
+    """
+    with open(path) as f:
+        recording = json.load(f)
+
+    if 'questions_and_answers' in recording:
+        # Realtime assessment: one step per answered question
+        steps = [{
+            'think_seconds': qa['emotion_data_during_answer'].get('analysis_duration_seconds', MIN_THINK_SECONDS),
+            'emotion': qa['emotion_data_during_answer'],
+            'question': qa['question'],
+            'answer': qa['student_answer'].get('answer'),
+            'is_correct': qa.get('is_correct')
+        } for qa in recording['questions_and_answers'] if qa.get('emotion_data_during_answer')]
+        return {'source': path, 'topic': recording.get('topic', 'General Knowledge'),
+                'grade': recording.get('grade', DEFAULT_GRADE), 'steps': steps}
+
+    if 'emotionData' in recording:
+        # Integrated assessment: one emotion reading, then a generated question set
+        questions = recording.get('questions', {}).get('data', {}).get('questions', [])
+        summary = recording['emotionData']
+        steps = [{
+            'think_seconds': summary.get('analysis_duration_seconds', MIN_THINK_SECONDS),
+            'emotion': summary,
+            'question': question,
+            'answer': None,
+            'is_correct': None
+        } for question in questions]
+        topic = questions[0].get('topic', 'General Knowledge') if questions else 'General Knowledge'
+        return {'source': path, 'topic': topic, 'grade': DEFAULT_GRADE, 'steps': steps}
+
+    if 'overall_dominant_emotion' in recording:
+        # Bare emotion summary: the same reading for a default-length session
+        steps = [{
+            'think_seconds': recording.get('analysis_duration_seconds', MIN_THINK_SECONDS),
+            'emotion': recording,
+            'question': None,
+            'answer': None,
+            'is_correct': None
+        } for _ in range(DEFAULT_QUESTIONS)]
+        return {'source': path, 'topic': 'General Knowledge', 'grade': DEFAULT_GRADE, 'steps': steps}
+
+    return None
+
+
+def load_scripts(patterns):
+    """Load every recording matching the glob patterns (relative to the repository root)"""
+    scripts = []
+    for pattern in patterns:
+        if not os.path.isabs(pattern) and not glob.glob(pattern):
+            pattern = os.path.join(RECORDINGS_DIR, pattern)
+        for path in sorted(glob.glob(pattern)):
+            script = load_script(path)
+            if script and script['steps']:
+                scripts.append(script)
+    return scripts
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an ascending list"""
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100.0 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class LoadRecorder:
+    """
+    End-to-end latency (including client retries) and errors per endpoint
+    """
+
+    def __init__(self):
+        self.latencies_ms = {}
+        self.errors = {}
+        self.students_started = 0
+        self.students_completed = 0
+        self.student_errors = Counter()
+        self.skipped_answers = 0
+
+    async def timed(self, endpoint, call):
+        """Await an API call, recording its latency or error; returns its result (None on error)"""
+        started = time.perf_counter()
+        try:
+            result = await call
+        except AssessmentAPIError as e:
+            error = f"HTTP {e.status}"
+            result = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            error = e.__class__.__name__
+            result = None
+        else:
+            error = None
+
+        self.latencies_ms.setdefault(endpoint, []).append((time.perf_counter() - started) * 1000)
+        if error:
+            self.errors.setdefault(endpoint, Counter())[error] += 1
+        return result
+
+    def student_failed(self, error):
+        """Record an exception that aborted a virtual student's script"""
+        self.student_errors[error.__class__.__name__] += 1
+
+    def report(self, elapsed_seconds):
+        """Per-endpoint throughput, latency percentiles and error rate"""
+        rows = {}
+        for endpoint, latencies in self.latencies_ms.items():
+            ordered = sorted(latencies)
+            errors = self.errors.get(endpoint, Counter())
+            rows[endpoint] = {
+                'requests': len(ordered),
+                'throughput_rps': round(len(ordered) / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+                'p50_ms': round(percentile(ordered, 50), 1),
+                'p95_ms': round(percentile(ordered, 95), 1),
+                'p99_ms': round(percentile(ordered, 99), 1),
+                'max_ms': round(ordered[-1], 1),
+                'error_rate': round(sum(errors.values()) / len(ordered), 4),
+                'errors': dict(errors)
+            }
+        return rows
+
+
+async def run_student(api, recorder, student_id, script, think_scale, recorded_questions):
+    """Drive one virtual student through a recorded session"""
+    recorder.students_started += 1
+    # Each student thinks a little faster or slower than the recording
+    pace = think_scale * random.uniform(1 - THINK_JITTER, 1 + THINK_JITTER)
+    topic = script['topic']
+
+    student = await recorder.timed('students/register', api.register_student(
+        name=f"Load Test {student_id}", grade=script['grade'], student_id=student_id))
+    if student is None:
+        return
+
+    session = await recorder.timed('sessions/start', api.start_session(
+        student_id, topic=topic, total_questions=len(script['steps'])))
+    if session is None:
+        return
+    session_id = session['session_id']
+
+    stress_levels = []
+    emotions = Counter()
+    for question_number, step in enumerate(script['steps'], start=1):
+        emotion_data = session_emotion_data(step['emotion'], question_number)
+        stress_levels.append(emotion_data['stressLevel'])
+        emotions[emotion_data['emotion']] += 1
+
+        question = step['question']
+        if not recorded_questions:
+            generated = await recorder.timed('sessions/question/next', api.next_question(
+                session_id, student_id, topic, question_number, emotion_data))
+            if generated and generated.get('question'):
+                question = generated['question']
+
+        think_seconds = max(MIN_THINK_SECONDS, step['think_seconds']) * pace
+        await asyncio.sleep(think_seconds)
+
+        # The backend needs both answers to grade; without a question there is nothing to submit
+        correct_answer = (question.get('correctAnswer') or question.get('correct_answer')) if question else None
+        if not correct_answer:
+            recorder.skipped_answers += 1
+            continue
+        options = question.get('options') or []
+        answer = step['answer'] or (random.choice(options) if options else correct_answer)
+        await recorder.timed('sessions/answer/submit', api.submit_answer(
+            session_id, student_id,
+            topic=question.get('topic', topic),
+            question_number=question_number,
+            question_text=question.get('questionText') or question.get('question') or f"Load test question {question_number}",
+            question_type=question.get('type', 'multiple_choice'),
+            options=options,
+            difficulty_level=question.get('difficulty', 3),
+            bloom_level=question.get('bloomLevel', 'Understand'),
+            student_answer=answer,
+            correct_answer=correct_answer,
+            emotion_data=emotion_data,
+            time_taken_seconds=round(think_seconds, 2)
+        ))
+
+    await recorder.timed('sessions/complete', api.complete_session(
+        session_id, student_id,
+        average_stress=sum(stress_levels) / len(stress_levels),
+        dominant_emotion=emotions.most_common(1)[0][0]))
+    recorder.students_completed += 1
+
+
+async def run_load(scripts, students, ramp_up, think_scale, base_url, max_concurrency, recorded_questions):
+    """
+    Start `students` virtual students spread evenly over `ramp_up` seconds and wait for all
+
+    Returns:
+        tuple: (LoadRecorder, elapsed seconds, AsyncAssessmentClient stats)
+    """
+    recorder = LoadRecorder()
+    run_id = datetime.now().strftime('%Y%m%d%H%M%S')
+
+    async with AsyncAssessmentClient(base_url, max_connections=max_concurrency,
+                                     max_concurrency=max_concurrency) as api:
+        async def delayed_student(index):
+            await asyncio.sleep(ramp_up * index / students if students else 0)
+            try:
+                await run_student(api, recorder, f"loadtest_{run_id}_{index:04d}", scripts[index % len(scripts)],
+                                  think_scale, recorded_questions)
+            except Exception as e:
+                recorder.student_failed(e)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(delayed_student(index) for index in range(students)))
+        elapsed = time.perf_counter() - started
+        return recorder, elapsed, api.stats()
+
+
+def print_report(report, recorder, elapsed):
+    print("\n" + "=" * 100)
+    print(f"📊 LOAD TEST REPORT - {recorder.students_completed}/{recorder.students_started} students "
+          f"completed in {elapsed:.1f}s")
+    print("=" * 100)
+    print(f"{'Endpoint':<26} {'Requests':>9} {'RPS':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+          f"{'max ms':>9} {'Errors':>8}")
+    print("-" * 100)
+    for endpoint, row in report.items():
+        print(f"{endpoint:<26} {row['requests']:>9} {row['throughput_rps']:>8.2f} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['max_ms']:>9.1f} {row['error_rate'] * 100:>7.2f}%")
+        for error, count in row['errors'].items():
+            print(f"{'':<26} ↳ {error}: {count}")
+    if recorder.student_errors:
+        print("-" * 100)
+        print(f"❌ Students aborted by errors: {sum(recorder.student_errors.values())}")
+        for error, count in recorder.student_errors.items():
+            print(f"{'':<26} ↳ {error}: {count}")
+    if recorder.skipped_answers:
+        print(f"⏭️  Answers not submitted (no question with a correct answer): {recorder.skipped_answers}")
+    print("=" * 100)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded assessments against the backend")
+    parser.add_argument('--recordings', nargs='+', default=DEFAULT_RECORDINGS,
+                        help="Recording files or glob patterns (default: recordings in the repository root)")
+    parser.add_argument('--students', type=int, default=10, help="Number of concurrent virtual students")
+    parser.add_argument('--ramp-up', type=float, default=10.0, help="Seconds over which students are started")
+    parser.add_argument('--think-scale', type=float, default=1.0,
+                        help="Multiplier on recorded think times (0.1 = ten times faster students)")
+    parser.add_argument('--base-url', default=API_BASE_URL, help="Backend API root URL")
+    parser.add_argument('--max-concurrency', type=int, default=ASYNC_MAX_CONCURRENCY,
+                        help="Requests in flight at once")
+    parser.add_argument('--recorded-questions', action='store_true',
+                        help="Answer the recorded questions instead of calling /sessions/question/next "
+                             "(answer feedback and session summaries still call the LLM)")
+    parser.add_argument('--output', help="Write the report as JSON to this file")
+    args = parser.parse_args()
+
+    scripts = load_scripts(args.recordings)
+    if not scripts:
+        print("❌ No recordings found")
+        return
+
+    print(f"📂 {len(scripts)} recorded sessions loaded")
+    print(f"🚀 Starting {args.students} virtual students over {args.ramp_up:.0f}s against {args.base_url}")
+
+    recorder, elapsed, client_stats = asyncio.run(run_load(
+        scripts, args.students, args.ramp_up, args.think_scale, args.base_url,
+        args.max_concurrency, args.recorded_questions))
+    report = recorder.report(elapsed)
+    print_report(report, recorder, elapsed)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({
+                'students': args.students,
+                'students_completed': recorder.students_completed,
+                'ramp_up_seconds': args.ramp_up,
+                'think_scale': args.think_scale,
+                'elapsed_seconds': round(elapsed, 2),
+                'recordings': [script['source'] for script in scripts],
+                'endpoints': report,
+                'student_errors': dict(recorder.student_errors),
+                'skipped_answers': recorder.skipped_answers,
+                'client_attempts': client_stats
+            }, f, indent=2)
+        print(f"💾 Report saved to: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
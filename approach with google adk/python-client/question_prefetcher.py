@@ -0,0 +1,178 @@
+"""
+Speculative Next-Question Prefetch
+While the student is still answering, requests one candidate next question per
+stress bucket (low/medium/high) from the partial emotion estimate. When the answer
+lands, the candidate of the final stress bucket is kept and the others are cancelled
+or discarded, so the question generation latency overlaps the answering time.
+
+Each round gets its own worker threads, so losing candidates that are still running
+never delay the next question's candidates.
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import PREFETCH_START_DELAY, PREFETCH_MIN_SAMPLES, PREFETCH_STRESS_BUCKETS
+
+
+def stress_bucket(stress_level, buckets=PREFETCH_STRESS_BUCKETS):
+    """Name of the bucket covering a 1-5 stress level (nearest bucket if none covers it)"""
+    for name, levels, *_ in buckets:
+        if stress_level in levels:
+            return name
+    return min(buckets, key=lambda bucket: min(abs(stress_level - level) for level in bucket[1]))[0]
+
+
+def bucket_emotion_data(emotion_data, bucket):
+    """
+    Emotion summary for a candidate of a bucket the partial estimate is not in:
+    the bucket's representative stress level with matching emotion scores
+    """
+    _, _, stress_level, scores = bucket
+    return {
+        'overall_dominant_emotion': max(scores, key=scores.get),
+        'dominant_emotion_percentages': dict(scores),
+        'average_emotion_scores': dict(scores),
+        'stress_level': stress_level,
+        'total_frames_analyzed': emotion_data['total_frames_analyzed']
+    }
+
+
+class QuestionPrefetcher:
+    """
+    Background generation of candidate next questions, one per stress bucket
+    """
+
+    def __init__(self, generate_fn, buckets=PREFETCH_STRESS_BUCKETS,
+                 start_delay=PREFETCH_START_DELAY, min_samples=PREFETCH_MIN_SAMPLES):
+        """
+        Initialize question prefetcher
+
+        Args:
+            generate_fn: Callable (emotion_data, question_number, previous_answers) -> question (or None)
+            buckets: (name, stress levels, representative level, representative scores) per bucket
+            start_delay: Seconds after start() before candidates may be requested
+            min_samples: Emotion samples the partial estimate needs first
+        """
+        self.generate_fn = generate_fn
+        self.buckets = buckets
+        self.start_delay = start_delay
+        self.min_samples = min_samples
+        self.executor = None
+
+        self.candidates = {}
+        self.lock = threading.Lock()
+        self.answered = threading.Event()
+        self.launcher = None
+
+        # Counters
+        self.rounds = 0
+        self.launched_rounds = 0
+        self.hits = 0
+        self.ready_hits = 0
+        self.discarded = 0
+
+    def start(self, partial_emotion_data, question_number, previous_answers):
+        """
+        Begin prefetching for the question being answered
+
+        Args:
+            partial_emotion_data: Callable returning the running emotion_data estimate
+                (with 'total_frames_analyzed'), or None while nothing has been analyzed
+            question_number: Number of the question the candidates are for
+            previous_answers: Answers so far (copied, so later answers do not leak in)
+        """
+        self.discard()
+        self.answered.clear()
+        self.rounds += 1
+        self.launcher = threading.Thread(target=self._launch_when_ready,
+                                         args=(partial_emotion_data, question_number, list(previous_answers)),
+                                         daemon=True)
+        self.launcher.start()
+
+    def commit(self, emotion_data):
+        """
+        The answer has landed: keep the candidate of the final stress bucket
+
+        Args:
+            emotion_data: Final emotion summary of the answered question
+
+        Returns:
+            Future: Resolves to the next question, or None if no candidate was requested
+            (the caller generates the question itself)
+        """
+        self._stop_launcher()
+
+        bucket = stress_bucket(emotion_data['stress_level'], self.buckets)
+        with self.lock:
+            candidate = self.candidates.pop(bucket, None)
+        self.discard()
+
+        if candidate is not None:
+            self.hits += 1
+            self.ready_hits += 1 if candidate.done() else 0
+        return candidate
+
+    def cancel(self):
+        """The question was skipped: stop waiting for samples and drop every candidate"""
+        self._stop_launcher()
+        self.discard()
+
+    def discard(self):
+        """
+        Cancel candidates not yet running and drop the rest (their results are ignored)
+        The round's worker threads are released without waiting; running ones finish on their own
+        """
+        with self.lock:
+            candidates, self.candidates = self.candidates, {}
+            executor, self.executor = self.executor, None
+        for future in candidates.values():
+            future.cancel()
+            self.discarded += 1
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    def shutdown(self):
+        """Stop prefetching and release the worker threads"""
+        self.cancel()
+
+    def _stop_launcher(self):
+        self.answered.set()
+        if self.launcher:
+            self.launcher.join()
+            self.launcher = None
+
+    def _launch_when_ready(self, partial_emotion_data, question_number, previous_answers):
+        """Wait for enough of the answer's emotion samples, then request one candidate per bucket"""
+        started = time.time()
+        while not self.answered.wait(0.25):
+            if time.time() - started < self.start_delay:
+                continue
+
+            emotion_data = partial_emotion_data()
+            if emotion_data is None or emotion_data['total_frames_analyzed'] < self.min_samples:
+                continue
+
+            current = stress_bucket(emotion_data['stress_level'], self.buckets)
+            with self.lock:
+                # A fresh pool per round: the previous round's losers may still be running
+                self.executor = ThreadPoolExecutor(max_workers=len(self.buckets), thread_name_prefix='prefetch')
+                for bucket in self.buckets:
+                    # The partial estimate's own bucket is sent as measured
+                    name = bucket[0]
+                    candidate_data = emotion_data if name == current else bucket_emotion_data(emotion_data, bucket)
+                    self.candidates[name] = self.executor.submit(self.generate_fn, candidate_data,
+                                                                 question_number, previous_answers)
+            self.launched_rounds += 1
+            return
+
+    def stats(self):
+        """Get prefetch counters"""
+        return {
+            'rounds': self.rounds,
+            'launched_rounds': self.launched_rounds,
+            'hits': self.hits,
+            'ready_hits': self.ready_hits,
+            'discarded': self.discarded
+        }
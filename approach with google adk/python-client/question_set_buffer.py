@@ -0,0 +1,165 @@
+"""
+Double-Buffered Question Sets
+Requests question set N+1 in the background while set N is still being answered,
+based on the answers and emotion analytics collected so far. When set N ends, the
+prefetched set is used unless the adaptation signals (stress, accuracy, dominant
+emotion) moved too far since it was requested - then it is regenerated, provided the
+prefetch had not started yet. A generation already in flight cannot be aborted, so
+its set is used rather than paying for a second agent call.
+"""
+
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from config import QUESTION_SET_STRESS_DRIFT, QUESTION_SET_ACCURACY_DRIFT
+
+
+def adaptation_signals(results):
+    """
+    Signals the agent adapts the next set to
+
+    Args:
+        results: (is_correct, emotion_analytics) per answered question
+
+    Returns:
+        dict: answered, accuracy (0-1), average_stress (0-1, None without emotion data),
+        dominant_emotion (None without emotion data)
+    """
+    analytics = [a for _, a in results if a and a.get('success')]
+    stresses = [a['average_stress'] for a in analytics]
+    emotions = Counter(a['dominant_emotion'] for a in analytics)
+    return {
+        'answered': len(results),
+        'accuracy': sum(1 for correct, _ in results if correct) / len(results) if results else None,
+        'average_stress': sum(stresses) / len(stresses) if stresses else None,
+        'dominant_emotion': emotions.most_common(1)[0][0] if emotions else None
+    }
+
+
+def signal_drift(requested, final, stress_drift=QUESTION_SET_STRESS_DRIFT,
+                 accuracy_drift=QUESTION_SET_ACCURACY_DRIFT):
+    """
+    Why a set requested with `requested` signals no longer fits `final` (None if it still does)
+    """
+    if requested['accuracy'] is not None and final['accuracy'] is not None:
+        if abs(final['accuracy'] - requested['accuracy']) > accuracy_drift:
+            return f"accuracy {requested['accuracy']:.0%} -> {final['accuracy']:.0%}"
+
+    if (requested['average_stress'] is None) != (final['average_stress'] is None):
+        return "emotion data appeared/disappeared"
+    if requested['average_stress'] is not None:
+        if abs(final['average_stress'] - requested['average_stress']) > stress_drift:
+            return f"stress {requested['average_stress']:.3f} -> {final['average_stress']:.3f}"
+
+    if requested['dominant_emotion'] != final['dominant_emotion']:
+        return f"dominant emotion {requested['dominant_emotion']} -> {final['dominant_emotion']}"
+
+    return None
+
+
+class QuestionSetBuffer:
+    """
+    Holds at most one question set generated in the background
+    """
+
+    def __init__(self, generate_fn, stress_drift=QUESTION_SET_STRESS_DRIFT,
+                 accuracy_drift=QUESTION_SET_ACCURACY_DRIFT):
+        """
+        Initialize question set buffer
+
+        Args:
+            generate_fn: Callable (set_number) returning the generated set (or None)
+            stress_drift: Average stress change that makes a prefetched set stale
+            accuracy_drift: Accuracy change that makes a prefetched set stale
+        """
+        self.generate_fn = generate_fn
+        self.stress_drift = stress_drift
+        self.accuracy_drift = accuracy_drift
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='questionset')
+
+        self.pending = None
+        self.requested_signals = None
+        self.requested_set_number = None
+        self.lock = threading.Lock()
+
+        # Counters
+        self.prefetched = 0
+        self.used = 0
+        self.regenerated = 0
+        self.kept_in_flight = 0
+        self.discarded = 0
+
+    def request(self, signals, set_number):
+        """Start generating set `set_number` in the background (no-op if one is already pending)"""
+        with self.lock:
+            if self.pending is not None:
+                return
+            self.pending = self.executor.submit(self.generate_fn, set_number)
+            self.requested_signals = signals
+            self.requested_set_number = set_number
+            self.prefetched += 1
+
+    def take(self, signals, set_number):
+        """
+        Get the next set, reconciling the prefetched one with the final signals of the set
+
+        Args:
+            signals: adaptation_signals() of the completed set
+            set_number: Number of the set to return
+
+        Returns:
+            tuple: (generated set or None, note on why it is not the prefetched set as
+            requested, or None)
+        """
+        with self.lock:
+            pending, requested, self.pending = self.pending, self.requested_signals, None
+            requested_set_number = self.requested_set_number
+
+        reason = "not prefetched"
+        if pending is not None and requested_set_number != set_number:
+            pending.cancel()
+            reason = f"prefetched set #{requested_set_number}, not #{set_number}"
+        elif pending is not None:
+            drift = signal_drift(requested, signals, self.stress_drift, self.accuracy_drift)
+            # cancel() only succeeds while the generation has not started
+            if drift is not None and pending.cancel():
+                reason = f"regenerated: {drift}"
+            else:
+                try:
+                    result = pending.result()
+                except Exception:
+                    result = None
+                if result is not None:
+                    if drift is None:
+                        self.used += 1
+                        return result, None
+                    self.kept_in_flight += 1
+                    return result, f"kept the set already being generated despite {drift}"
+                reason = "prefetch failed"
+
+        self.regenerated += 1
+        return self.generate_fn(set_number), reason
+
+    def discard(self):
+        """Drop a pending set (the student stopped)"""
+        with self.lock:
+            pending, self.pending = self.pending, None
+        if pending is not None:
+            pending.cancel()
+            self.discarded += 1
+
+    def shutdown(self):
+        """Release the worker thread"""
+        self.discard()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        """Get prefetch counters"""
+        return {
+            'prefetched': self.prefetched,
+            'used': self.used,
+            'regenerated': self.regenerated,
+            'kept_in_flight': self.kept_in_flight,
+            'discarded': self.discarded
+        }
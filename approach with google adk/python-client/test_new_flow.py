@@ -11,12 +11,15 @@ NEW FLOW:
    - Submit answer + emotion analytics
 3. After 5 questions, agent analyzes all data
 4. Generate next 5 questions (adapted)
+   - Requested in the background while the current set is still being answered,
+     and regenerated only if stress/accuracy moved too far by the end of the set
 """
 
-import requests
 import time
 from emotion_tracker import EmotionTracker, QuestionSetTracker
-from config import API_BASE_URL
+from http_transport import get_http_transport
+from question_set_buffer import QuestionSetBuffer, adaptation_signals
+from config import API_BASE_URL, HTTP_GENERATION_DEADLINE, QUESTION_SET_PREFETCH_AFTER
 
 
 class NewFlowTestClient:
@@ -28,12 +31,18 @@ class NewFlowTestClient:
         self.student_id = None
         self.questions_answered = 0
         self.set_tracker = QuestionSetTracker()
+        self.http = get_http_transport()
+        
+        # (is_correct, emotion_analytics) of the current set, and the next set
+        # being generated in the background
+        self.set_results = []
+        self.set_buffer = None
     
     def register_student(self, name, grade, subject):
         """Register a new student"""
         print(f"\n📝 Registering student: {name}")
         
-        response = requests.post(f"{self.base_url}/students/register", json={
+        response = self.http.post(f"{self.base_url}/students/register", json={
             "name": name,
             "grade": grade,
             "initial_subject": subject
@@ -52,7 +61,7 @@ class NewFlowTestClient:
         """Start assessment session"""
         print(f"\n🎯 Starting assessment session for {subject}")
         
-        response = requests.post(f"{self.base_url}/sessions/start", json={
+        response = self.http.post(f"{self.base_url}/sessions/start", json={
             "student_id": self.student_id,
             "subject": subject
         })
@@ -66,34 +75,40 @@ class NewFlowTestClient:
             print(f"❌ Failed to start session: {response.text}")
             return False
     
-    def generate_question_set(self, topic, count=5):
+    def generate_question_set(self, topic, count=5, quiet=False, set_number=None):
         """
         Generate a set of questions (NEW FLOW)
         
         Args:
             topic: Subject topic
             count: Number of questions (default: 5)
+            quiet: Print nothing (background prefetch while a set is answered)
+            set_number: Set being generated (default: the backend derives it from answers so far)
         
         Returns:
             list: Question set or None
         """
-        print(f"\n🤖 Generating question set ({count} questions) with ADK Agent...")
+        if not quiet:
+            print(f"\n🤖 Generating question set ({count} questions) with ADK Agent...")
         
-        response = requests.post(f"{self.base_url}/sessions/questionset/generate", json={
+        response = self.http.post(f"{self.base_url}/sessions/questionset/generate", json={
             "session_id": self.session_id,
             "student_id": self.student_id,
             "topic": topic,
-            "count": count
-        })
+            "count": count,
+            "set_number": set_number
+        }, deadline=HTTP_GENERATION_DEADLINE)
         
         if response.status_code == 200:
             data = response.json()
-            print(f"✅ Received {data['totalQuestions']} questions (Set #{data['setNumber']})")
-            print(f"🧠 Agent Reasoning: {data.get('reasoning', 'N/A')[:200]}...")
-            print(f"🔄 Agent Iterations: {data.get('iterations', 'N/A')}")
+            if not quiet:
+                print(f"✅ Received {data['totalQuestions']} questions (Set #{data['setNumber']})")
+                print(f"🧠 Agent Reasoning: {data.get('reasoning', 'N/A')[:200]}...")
+                print(f"🔄 Agent Iterations: {data.get('iterations', 'N/A')}")
             return data['questionSet']
         else:
-            print(f"❌ Failed to generate question set: {response.text}")
+            if not quiet:
+                print(f"❌ Failed to generate question set: {response.text}")
             return None
     
     def ask_question_with_emotion_tracking(self, question, question_num):
@@ -173,7 +188,7 @@ class NewFlowTestClient:
             }
         
         # Submit to backend
-        response = requests.post(f"{self.base_url}/sessions/answer/submit", json={
+        response = self.http.post(f"{self.base_url}/sessions/answer/submit", json={
             "session_id": self.session_id,
             "student_id": self.student_id,
             "question": question['question'],
@@ -207,7 +222,7 @@ class NewFlowTestClient:
         """Complete assessment session"""
         print(f"\n🏁 Completing session...")
         
-        response = requests.post(f"{self.base_url}/sessions/complete", json={
+        response = self.http.post(f"{self.base_url}/sessions/complete", json={
             "session_id": self.session_id,
             "student_id": self.student_id
         })
@@ -231,13 +246,15 @@ class NewFlowTestClient:
             print(f"❌ Failed to complete session: {response.text}")
             return False
     
-    def run_question_set(self, topic, set_number=1):
+    def run_question_set(self, topic, set_number=1, questions=None, prefetch_next=False):
         """
         Run one complete question set (5 questions) - NEW FLOW
         
         Args:
             topic: Subject topic
             set_number: Set number (1, 2, 3, ...)
+            questions: Already generated set (generated here if None)
+            prefetch_next: Request the next set in the background while this one is answered
         
         Returns:
             bool: Success status
@@ -247,12 +264,14 @@ class NewFlowTestClient:
         print(f"{'#'*60}")
         
         # Step 1: Generate 5 questions
-        questions = self.generate_question_set(topic, count=5)
+        if questions is None:
+            questions = self.generate_question_set(topic, count=5)
         if not questions:
             return False
         
         # Start set tracking
         self.set_tracker.start_set()
+        self.set_results = []
         
         # Step 2: Loop through questions
         for i, question in enumerate(questions, start=1):
@@ -267,6 +286,12 @@ class NewFlowTestClient:
             # Add to set tracker
             if emotion_analytics:
                 self.set_tracker.add_question_analytics(i, emotion_analytics)
+            self.set_results.append((is_correct, emotion_analytics))
+            
+            # Answers and emotions so far are stored by the backend - the agent can
+            # already start on the next set
+            if prefetch_next and i == min(QUESTION_SET_PREFETCH_AFTER, len(questions)):
+                self.set_buffer.request(adaptation_signals(self.set_results), set_number + 1)
             
             # Pause before next question
             if i < len(questions):
@@ -309,9 +334,14 @@ class NewFlowTestClient:
         if not self.start_session(subject):
             return
         
+        # The next set is generated in the background while the current one is answered
+        self.set_buffer = QuestionSetBuffer(
+            lambda set_number: self.generate_question_set(topic, count=5, quiet=True, set_number=set_number))
+        
         # Run question sets
+        questions = None
         for set_num in range(1, num_sets + 1):
-            if not self.run_question_set(topic, set_num):
+            if not self.run_question_set(topic, set_num, questions, prefetch_next=set_num < num_sets):
                 break
             
             # Ask if user wants to continue to next set
@@ -321,10 +351,18 @@ class NewFlowTestClient:
                 
                 if continue_choice not in ['yes', 'y']:
                     print("\n🛑 Stopping test. Completing session...")
+                    self.set_buffer.discard()
                     break
                 
-                print(f"\n⏳ Starting next set...")
-                time.sleep(1)
+                # Use the prefetched set unless the set's signals changed too much since
+                questions, note = self.set_buffer.take(adaptation_signals(self.set_results), set_num + 1)
+                if note is None:
+                    print(f"\n⚡ Next set was prepared while you answered")
+                else:
+                    print(f"\n🔄 Next set: {note}")
+        
+        self.set_buffer.shutdown()
+        print(f"📦 Question set prefetch: {self.set_buffer.stats()}")
         
         # Complete session
         self.complete_session()
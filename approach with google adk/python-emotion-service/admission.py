@@ -0,0 +1,159 @@
+"""
+Admission Control
+Bounds the number of analyses in flight and how long requests may wait for a slot.
+Requests that cannot be served within their deadline are rejected up front (instead
+of queueing work nobody will read) with a Retry-After hint.
+"""
+
+import math
+import os
+import threading
+import time
+
+from micro_batcher import MICRO_BATCH_MAX_SIZE
+
+
+# At least one full micro-batch may be in flight, or batches never fill
+MAX_IN_FLIGHT = int(os.environ.get('EMOTION_MAX_IN_FLIGHT', MICRO_BATCH_MAX_SIZE))
+MAX_QUEUE = int(os.environ.get('EMOTION_MAX_QUEUE', 32))
+MAX_QUEUE_MS = float(os.environ.get('EMOTION_MAX_QUEUE_MS', 2000))
+
+
+class AdmissionRejected(Exception):
+    """
+    Request refused by admission control
+
+    Attributes:
+        status: HTTP status (429 = would miss its deadline, 503 = overloaded/expired)
+        retry_after: Suggested seconds before retrying
+        reason: 'queue_full', 'deadline' or 'expired'
+    """
+
+    def __init__(self, status, retry_after, reason):
+        super().__init__(f"Request rejected ({reason}), retry after {retry_after}s")
+        self.status = status
+        self.retry_after = retry_after
+        self.reason = reason
+
+
+class AdmissionController:
+    """
+    In-flight limit with a bounded, deadline-aware wait queue
+    """
+
+    def __init__(self, max_in_flight=MAX_IN_FLIGHT, max_queue=MAX_QUEUE, max_queue_ms=MAX_QUEUE_MS):
+        """
+        Args:
+            max_in_flight: Requests processed concurrently
+            max_queue: Requests allowed to wait for a slot
+            max_queue_ms: Longest a request may wait for a slot
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.max_queue_ms = max_queue_ms
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.condition = threading.Condition()
+
+        # Smoothed time a request holds its slot, used to predict queue wait
+        self.average_service_ms = None
+
+        # Counters
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_deadline = 0
+        self.expired = 0
+
+    def predicted_wait_ms(self):
+        """Expected wait for a new request given the current queue (caller holds the lock)"""
+        if self.in_flight < self.max_in_flight or self.average_service_ms is None:
+            return 0.0
+        # Everyone ahead (waiting + the one about to finish) drains max_in_flight at a time
+        return (self.waiting + 1) * self.average_service_ms / self.max_in_flight
+
+    def acquire(self, deadline_ms=None):
+        """
+        Wait for a processing slot
+
+        Args:
+            deadline_ms: Client's remaining time budget for waiting and processing
+
+        Returns:
+            float: perf_counter() when the slot was granted (pass to release)
+
+        Raises:
+            AdmissionRejected: Queue full, deadline unreachable, or waited too long
+        """
+        with self.condition:
+            # A request is only worth starting if its wait plus its own processing fits the deadline
+            service_ms = self.average_service_ms or 0.0
+            budget_ms = self.max_queue_ms
+            if deadline_ms is not None:
+                budget_ms = min(budget_ms, deadline_ms - service_ms)
+                predicted_ms = self.predicted_wait_ms()
+                if predicted_ms + service_ms > deadline_ms:
+                    self.rejected_deadline += 1
+                    raise AdmissionRejected(429, self._retry_after(predicted_ms), 'deadline')
+
+            if self.in_flight < self.max_in_flight and not self.waiting:
+                return self._grant()
+
+            if self.waiting >= self.max_queue:
+                self.rejected_queue_full += 1
+                raise AdmissionRejected(503, self._retry_after(), 'queue_full')
+
+            predicted_ms = self.predicted_wait_ms()
+            if predicted_ms > budget_ms:
+                self.rejected_deadline += 1
+                raise AdmissionRejected(429, self._retry_after(predicted_ms), 'deadline')
+
+            self.waiting += 1
+            try:
+                granted = self.condition.wait_for(lambda: self.in_flight < self.max_in_flight,
+                                                  timeout=budget_ms / 1000.0)
+            finally:
+                self.waiting -= 1
+
+            if not granted:
+                self.expired += 1
+                raise AdmissionRejected(503, self._retry_after(), 'expired')
+            return self._grant()
+
+    def release(self, granted_at):
+        """Free the slot taken by acquire() and record its service time"""
+        service_ms = (time.perf_counter() - granted_at) * 1000
+        with self.condition:
+            self.in_flight -= 1
+            if self.average_service_ms is None:
+                self.average_service_ms = service_ms
+            else:
+                self.average_service_ms = 0.8 * self.average_service_ms + 0.2 * service_ms
+            self.condition.notify()
+
+    def _grant(self):
+        self.in_flight += 1
+        self.admitted += 1
+        return time.perf_counter()
+
+    def _retry_after(self, predicted_ms=None):
+        """Seconds until the backlog has likely drained (at least 1)"""
+        if predicted_ms is None:
+            predicted_ms = self.predicted_wait_ms()
+        return max(1, math.ceil(predicted_ms / 1000.0))
+
+    def stats(self):
+        """Get admission counters"""
+        with self.condition:
+            return {
+                'maxInFlight': self.max_in_flight,
+                'maxQueue': self.max_queue,
+                'maxQueueMs': self.max_queue_ms,
+                'inFlight': self.in_flight,
+                'waiting': self.waiting,
+                'averageServiceMs': round(self.average_service_ms, 3) if self.average_service_ms is not None else None,
+                'admitted': self.admitted,
+                'rejectedQueueFull': self.rejected_queue_full,
+                'rejectedDeadline': self.rejected_deadline,
+                'expired': self.expired
+            }
@@ -3,23 +3,287 @@ Python Emotion Detection Service
 Flask API for real-time emotion detection from webcam images
 """
 
-from flask import Flask, request, jsonify
+from flask import Flask, request, jsonify, Response, stream_with_context, g
 from flask_cors import CORS
+from werkzeug.exceptions import RequestEntityTooLarge
 import cv2
 import numpy as np
 from deepface import DeepFace
 import base64
-import io
-from PIL import Image
+import functools
+import json
 import logging
+import os
+import threading
+import time
+
+from emotion_engine import get_emotion_engine, crop_largest_face, to_gray
+from micro_batcher import get_micro_batcher
+from session_store import SessionStore
+from result_cache import ResultCache, dhash
+from admission import AdmissionController, AdmissionRejected
+from metrics import ServiceMetrics, render_prometheus
 
 app = Flask(__name__)
-CORS(app)  # Enable CORS for all routes
+CORS(app, expose_headers=['Retry-After'])  # Enable CORS for all routes; browsers may read Retry-After
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Upload limits (overridable via environment)
+MAX_UPLOAD_BYTES = int(os.environ.get('EMOTION_MAX_UPLOAD_BYTES', 5 * 1024 * 1024))
+MAX_DECODE_DIMENSION = int(os.environ.get('EMOTION_MAX_DECODE_DIMENSION', 1280))  # 0 = no cap
+UPLOAD_CHUNK_SIZE = 64 * 1024
+MAX_BATCH_FRAMES = int(os.environ.get('EMOTION_MAX_BATCH_FRAMES', 32))
+# Whole request body (JSON base64 and batch requests included)
+MAX_REQUEST_BYTES = int(os.environ.get('EMOTION_MAX_REQUEST_BYTES', 16 * 1024 * 1024))
+app.config['MAX_CONTENT_LENGTH'] = MAX_REQUEST_BYTES
+
+# Coalesce concurrent single-image requests into batched forward passes
+MICRO_BATCHING = os.environ.get('EMOTION_MICRO_BATCHING', '1') == '1'
+
+# Reuse results for near-identical face crops from the same client (only for requests
+# that identify their client: X-Client-Id header, clientId/sessionId field or query parameter)
+RESULT_CACHING = os.environ.get('EMOTION_RESULT_CACHE', '1') == '1'
+result_cache = ResultCache()
+
+# Stage latency histograms and request/error counters for /metrics
+service_metrics = ServiceMetrics()
+
+# Bounded in-flight analyses; requests that would miss their deadline are shed early
+admission = AdmissionController()
+
+# Debug mode only when asked for (never the reloader - it would load TensorFlow twice)
+DEBUG = os.environ.get('EMOTION_DEBUG', '0') == '1'
+
+# Set once the emotion model is loaded and warmed in this process
+model_ready = threading.Event()
+
+# Streaming per-session aggregates (held in this process - sessions need a single worker)
+SESSIONS_ENABLED = os.environ.get('EMOTION_SESSIONS', '1') == '1'
+session_store = SessionStore()
+SSE_HEARTBEAT_SECONDS = 15
+
+
+class StageTimer:
+    """
+    Collects per-stage wall-clock timings (ms) for one request
+    
+    Usage:
+        timer = StageTimer()
+        with timer.stage('decode'):
+            ...
+        timer.timings  # {'decode': 1.23}
+    """
+    
+    def __init__(self):
+        self.timings = {}
+    
+    def stage(self, name):
+        return _Stage(self, name)
+
+
+def request_timer():
+    """StageTimer for the current request (its stages are recorded in /metrics)"""
+    g.stage_timer = StageTimer()
+    return g.stage_timer
+
+
+def json_response(body, timer, status=200):
+    """Serialize a response body, timed as the 'serialization' stage"""
+    with timer.stage('serialization'):
+        response = jsonify(body)
+    return response, status
+
+
+class _Stage:
+    def __init__(self, timer, name):
+        self.timer = timer
+        self.name = name
+    
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+    
+    def __exit__(self, *exc):
+        elapsed_ms = (time.perf_counter() - self.started) * 1000
+        self.timer.timings[self.name] = round(self.timer.timings.get(self.name, 0.0) + elapsed_ms, 3)
+        return False
+
+
+class UploadTooLargeError(ValueError):
+    """Upload body exceeds MAX_UPLOAD_BYTES"""
+
+
+# Reduced JPEG decode modes (decoder scales by 1/2, 1/4, 1/8 while decoding)
+REDUCED_DECODE_FLAGS = [
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2)
+]
+
+# JPEG start-of-frame markers carrying the image size (SOF0-SOF15 minus DHT/JPG/DAC)
+JPEG_SOF_MARKERS = set(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def jpeg_dimensions(data):
+    """
+    Read (width, height) from a JPEG's start-of-frame header without decoding
+    
+    Returns:
+        tuple: (width, height), or None if data is not a JPEG with a readable header
+    """
+    if len(data) < 4 or data[0] != 0xFF or data[1] != 0xD8:
+        return None
+    
+    i = 2
+    while i + 9 <= len(data):
+        if data[i] != 0xFF:
+            return None
+        marker = data[i + 1]
+        if marker == 0xFF:
+            # Fill byte
+            i += 1
+            continue
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            # Markers without a length field
+            i += 2
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height = (data[i + 5] << 8) | data[i + 6]
+            width = (data[i + 7] << 8) | data[i + 8]
+            return width, height
+        length = (data[i + 2] << 8) | data[i + 3]
+        i += 2 + length
+    return None
+
+
+def decode_image(image_bytes, max_dimension=None):
+    """
+    Decode encoded image bytes (JPEG/PNG/...) straight to a BGR numpy array
+    No temp file and no PIL round trip: one decode, in memory
+    
+    Args:
+        image_bytes: Encoded image (bytes, bytearray or memoryview)
+        max_dimension: Cap on the longest side; large JPEGs are decoded at 1/2, 1/4
+            or 1/8 size directly, anything still larger is downscaled
+    
+    Raises:
+        ValueError: If the bytes are not a decodable image
+    """
+    flags = cv2.IMREAD_COLOR
+    if max_dimension:
+        size = jpeg_dimensions(image_bytes)
+        if size:
+            largest = max(size)
+            for factor, reduced_flag in REDUCED_DECODE_FLAGS:
+                if largest // factor >= max_dimension:
+                    flags = reduced_flag
+                    break
+    
+    buffer = np.frombuffer(image_bytes, dtype=np.uint8)
+    image_np = cv2.imdecode(buffer, flags)
+    if image_np is None:
+        raise ValueError('Could not decode image data')
+    
+    if max_dimension and max(image_np.shape[:2]) > max_dimension:
+        scale = max_dimension / max(image_np.shape[:2])
+        image_np = cv2.resize(image_np, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    return image_np
+
+
+# Per-thread upload buffer, grown to the largest body seen and reused across requests
+_upload_buffers = threading.local()
+
+
+def read_into_buffer(stream, length):
+    """
+    Stream length bytes into the thread's preallocated upload buffer
+    
+    Returns:
+        memoryview: The body (valid until this thread's next upload)
+    """
+    if length > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f'Upload of {length} bytes exceeds {MAX_UPLOAD_BYTES} bytes')
+    
+    buffer = getattr(_upload_buffers, 'buffer', None)
+    if buffer is None or len(buffer) < length:
+        buffer = _upload_buffers.buffer = bytearray(max(length, UPLOAD_CHUNK_SIZE))
+    view = memoryview(buffer)
+    
+    received = 0
+    while received < length:
+        chunk = stream.read(min(UPLOAD_CHUNK_SIZE, length - received))
+        if not chunk:
+            raise ValueError(f'Incomplete upload ({received} of {length} bytes)')
+        view[received:received + len(chunk)] = chunk
+        received += len(chunk)
+    return view[:length]
+
+
+def read_upload():
+    """
+    Read the image from a raw or multipart upload request
+    
+    Returns:
+        memoryview or bytes: Encoded image
+    """
+    if request.mimetype == 'multipart/form-data':
+        upload = request.files.get('image') or next(iter(request.files.values()), None)
+        if upload is None:
+            return None
+        # Werkzeug has already spooled the part; read it without another copy per chunk
+        stream = upload.stream
+        stream.seek(0, 2)
+        length = stream.tell()
+        stream.seek(0)
+        return read_into_buffer(stream, length)
+    
+    if request.content_length is None:
+        # Chunked transfer - size unknown up front
+        data = request.stream.read(MAX_UPLOAD_BYTES + 1)
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise UploadTooLargeError(f'Upload exceeds {MAX_UPLOAD_BYTES} bytes')
+        return data
+    
+    return read_into_buffer(request.stream, request.content_length)
+
+def admission_controlled(view):
+    """
+    Run the view only once admission control grants a processing slot
+    Clients may send X-Request-Deadline-Ms with the time they can wait for the result (queue + analysis)
+    Rejected requests get 429/503 with Retry-After
+    """
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        deadline_ms = request.headers.get('X-Request-Deadline-Ms', type=float)
+        try:
+            granted_at = admission.acquire(deadline_ms)
+        except AdmissionRejected as e:
+            logger.warning(str(e))
+            response = jsonify({'error': str(e), 'reason': e.reason, 'success': False})
+            response.status_code = e.status
+            response.headers['Retry-After'] = str(e.retry_after)
+            return response
+        
+        try:
+            return view(*args, **kwargs)
+        finally:
+            admission.release(granted_at)
+    
+    return wrapper
+
+def sessions_required(view):
+    """404 for session endpoints when streaming sessions are disabled"""
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        if not SESSIONS_ENABLED:
+            return jsonify({'error': 'Streaming sessions are disabled', 'success': False}), 404
+        return view(*args, **kwargs)
+    
+    return wrapper
+
 @app.route('/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
@@ -29,98 +293,563 @@ def health_check():
         'service': 'python-emotion-service'
     }), 200
 
+def warm_model():
+    """Load and warm the emotion model in this process, then mark the service ready"""
+    engine = get_emotion_engine()
+    engine.load()
+    engine.warmup()
+    if not MICRO_BATCHING:
+        # Also builds DeepFace.analyze's face detector
+        DeepFace.analyze(img_path=np.zeros((48, 48, 3), dtype=np.uint8), actions=['emotion'],
+                         enforce_detection=False, silent=True)
+    model_ready.set()
+    logger.info(f"✅ Emotion model ready (load {engine.load_seconds:.2f}s, warmup {engine.warmup_seconds:.2f}s)")
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness endpoint - 200 only after the model is loaded and warmed"""
+    if not model_ready.is_set():
+        return jsonify({
+            'status': 'warming',
+            'message': 'Emotion model is loading'
+        }), 503
+    
+    engine = get_emotion_engine()
+    return jsonify({
+        'status': 'ready',
+        'modelLoadSeconds': engine.load_seconds,
+        'modelWarmupSeconds': engine.warmup_seconds
+    }), 200
+
+@app.before_request
+def reject_oversized_body():
+    """413 for a declared body over MAX_REQUEST_BYTES, before it is read or a slot is taken"""
+    if request.content_length is not None and request.content_length > MAX_REQUEST_BYTES:
+        return jsonify({'error': f'Request body of {request.content_length} bytes exceeds {MAX_REQUEST_BYTES} bytes',
+                        'success': False}), 413
+
+@app.after_request
+def record_request_metrics(response):
+    """Count every request and record the stage timings of analysis requests"""
+    service_metrics.count_request(request.endpoint or 'unknown', response.status_code)
+    timer = g.get('stage_timer')
+    if timer is not None:
+        service_metrics.observe_stages(timer.timings)
+    return response
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Stage latency histograms (parse, decode, color_conversion, face_detection,
+    cache_lookup, inference, serialization), request/error/fallback/face counters
+    and model load/warmup times
+    Prometheus text format by default, JSON with ?format=json
+    """
+    engine = get_emotion_engine()
+    gauges = {
+        'model_load_seconds': engine.load_seconds,
+        'model_warmup_seconds': engine.warmup_seconds,
+        'model_ready': 1 if model_ready.is_set() else 0,
+        'in_flight': admission.in_flight,
+        'waiting': admission.waiting
+    }
+    histograms = {}
+    if MICRO_BATCHING:
+        batcher = get_micro_batcher()
+        histograms = {'queue_wait_ms': batcher.queue_wait_ms, 'batch_size': batcher.batch_sizes}
+    
+    if request.args.get('format') == 'json':
+        snapshot = service_metrics.snapshot()
+        snapshot['gauges'] = gauges
+        snapshot['histograms'] = {name: histogram.snapshot() for name, histogram in histograms.items()}
+        return jsonify(snapshot), 200
+    
+    return Response(render_prometheus(service_metrics, gauges, histograms),
+                    mimetype='text/plain; version=0.0.4')
+
+@app.route('/stats', methods=['GET'])
+def stats():
+    """Scheduler statistics (queue wait and batch size histograms)"""
+    return jsonify({
+        'microBatching': get_micro_batcher().stats() if MICRO_BATCHING else None,
+        'sessions': session_store.stats(),
+        'resultCache': result_cache.stats() if RESULT_CACHING else None,
+        'admission': admission.stats()
+    }), 200
+
+def calculate_stress_level(emotions):
+    """
+    Calculate stress level (0-1 scale) from emotion percentages
+    
+    DeepFace returns emotion values as percentages (0-100)
+    High stress emotions: angry, fear, sad
+    Low stress emotions: happy, surprise, neutral
+    """
+    stress_emotions = ['angry', 'fear', 'sad']
+    calm_emotions = ['happy', 'surprise', 'neutral']
+    
+    stress_score = sum(emotions.get(e, 0) for e in stress_emotions)
+    calm_score = sum(emotions.get(e, 0) for e in calm_emotions)
+    
+    # Normalize stress level (0-1)
+    # DeepFace already returns 0-100, so divide by 100 to get 0-1
+    total = stress_score + calm_score
+    if total > 0:
+        stress_level = (stress_score / total)
+        # Ensure it's in 0-1 range (DeepFace percentages sum to 100)
+        if stress_level > 1.0:
+            stress_level = stress_level / 100.0
+    else:
+        stress_level = 0.0
+    
+    return stress_level
+
+def is_precropped(data=None):
+    """
+    Whether the client sent a face crop instead of a whole frame
+    (query parameter ?precropped=1, or "precropped": true in a JSON body)
+    """
+    if data and data.get('precropped'):
+        return True
+    return request.args.get('precropped', '0').lower() in ('1', 'true')
+
+def request_client_id(data=None):
+    """
+    Client identity the request sends for the result cache, or None
+    (X-Client-Id header, "clientId"/"sessionId" in a JSON body, or ?clientId=)
+    The remote address is never used: clients behind one NAT or proxy would share results
+    """
+    client_id = request.headers.get('X-Client-Id') or request.args.get('clientId')
+    if not client_id and data:
+        client_id = data.get('clientId') or data.get('sessionId')
+    return client_id or None
+
+def analyze_image(image_np, timer, cache_scope=None, precropped=False):
+    """
+    Run emotion analysis on a decoded BGR image
+    Returns the /detect-emotion response body
+    
+    Args:
+        image_np: BGR image
+        timer: StageTimer for the request
+        cache_scope: Client identity for the result cache (None = the cache is not used)
+        precropped: image_np is already a face crop (face detection is skipped)
+    """
+    use_cache = RESULT_CACHING and cache_scope is not None
+    face = None
+    if precropped:
+        with timer.stage('color_conversion'):
+            face = to_gray(image_np)
+        service_metrics.increment('precropped_frames')
+    elif MICRO_BATCHING or use_cache:
+        with timer.stage('color_conversion'):
+            gray = to_gray(image_np)
+        with timer.stage('face_detection'):
+            face, face_found = crop_largest_face(gray)
+        if face_found:
+            service_metrics.increment('faces_found')
+    
+    result = None
+    if use_cache:
+        with timer.stage('cache_lookup'):
+            cache_key = dhash(face)
+            result = result_cache.lookup(cache_scope, cache_key)
+    
+    if result is None:
+        result = run_inference(image_np, face, timer, precropped)
+        if use_cache:
+            result_cache.store(cache_scope, cache_key, result)
+    
+    # Extract emotion data
+    emotions = result.get('emotion', {})
+    dominant_emotion = result.get('dominant_emotion', 'neutral')
+    stress_level = calculate_stress_level(emotions)
+    
+    logger.info(f"Emotion detected: {dominant_emotion}, Stress: {stress_level:.2f}, Timings (ms): {timer.timings}")
+    
+    return {
+        'emotions': emotions,
+        'dominantEmotion': dominant_emotion,
+        'stressLevel': stress_level,
+        'timings': timer.timings,
+        'success': True
+    }
+
+def run_inference(image_np, face, timer, precropped=False):
+    """
+    Get the emotion result for one image
+    Micro-batched on the face crop, or DeepFace.analyze on the whole image
+    (with detection skipped for pre-cropped faces)
+    """
+    with timer.stage('inference'):
+        if MICRO_BATCHING:
+            # Queued with concurrent requests and analyzed in one batch
+            result = get_micro_batcher().analyze(face)
+        else:
+            # Analyze emotion using DeepFace (accepts the BGR array directly)
+            result = DeepFace.analyze(
+                img_path=image_np,
+                actions=['emotion'],
+                enforce_detection=False,
+                detector_backend='skip' if precropped else 'opencv',
+                silent=True
+            )
+    
+    if isinstance(result, list):
+        result = result[0]
+    return result
+
+def error_response(e):
+    """500 response with a neutral emotion payload so clients can carry on"""
+    service_metrics.increment('errors')
+    logger.error(f"Error detecting emotion: {str(e)}")
+    return jsonify({
+        'error': str(e),
+        'success': False,
+        'emotions': {},
+        'dominantEmotion': 'neutral',
+        'stressLevel': 0.0
+    }), 500
+
 @app.route('/detect-emotion', methods=['POST'])
+@admission_controlled
 def detect_emotion():
     """
     Detect emotion from base64 encoded image
-    Expected JSON: { "image": "base64_string" }
+    Expected JSON: { "image": "base64_string", "precropped": false }
+    With "precropped": true the image is taken to be a face crop and face detection is skipped
     Returns: { "emotions": {...}, "dominant_emotion": "...", "stress_level": 0.0-1.0 }
     """
+    timer = request_timer()
     try:
         # Get image data from request
-        data = request.get_json()
+        with timer.stage('parse'):
+            data = request.get_json()
         
         if not data or 'image' not in data:
             return jsonify({'error': 'No image data provided'}), 400
         
-        # Decode base64 image
-        image_data = data['image']
+        with timer.stage('decode'):
+            # Decode base64 image
+            image_data = data['image']
+            
+            # Remove data URL prefix if present
+            if ',' in image_data:
+                image_data = image_data.split(',')[1]
+            
+            # Decode base64 to bytes, then to a BGR array in memory (no temp file,
+            # so concurrent requests never share state)
+            image_bytes = base64.b64decode(image_data)
+            image_np = decode_image(image_bytes, MAX_DECODE_DIMENSION)
+        
+        return json_response(analyze_image(image_np, timer, cache_scope=request_client_id(data),
+                                           precropped=is_precropped(data)), timer)
+        
+    except RequestEntityTooLarge as e:
+        # Chunked body that outgrew MAX_REQUEST_BYTES while being read
+        logger.warning(str(e))
+        return jsonify({'error': f'Request body exceeds {MAX_REQUEST_BYTES} bytes', 'success': False}), 413
+    except ValueError as e:
+        # Bad base64 or undecodable image bytes
+        logger.warning(f"Invalid image data: {str(e)}")
+        return jsonify({'error': f'Invalid image data: {str(e)}', 'success': False}), 400
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/detect-emotion/upload', methods=['POST'])
+@admission_controlled
+def detect_emotion_upload():
+    """
+    Detect emotion from a binary image upload (no base64/JSON overhead)
+    Accepts a raw body (Content-Type: image/jpeg, image/png, application/octet-stream)
+    or multipart/form-data with the image in the 'image' field
+    Query: ?precropped=1 when the image is a client-side face crop (face detection is skipped)
+    Returns: same response as /detect-emotion
+    """
+    timer = request_timer()
+    try:
+        with timer.stage('parse'):
+            image_bytes = read_upload()
+        
+        if not image_bytes:
+            return jsonify({'error': 'No image data provided'}), 400
+        
+        with timer.stage('decode'):
+            image_np = decode_image(image_bytes, MAX_DECODE_DIMENSION)
+        
+        return json_response(analyze_image(image_np, timer, cache_scope=request_client_id(),
+                                           precropped=is_precropped()), timer)
         
+    except (UploadTooLargeError, RequestEntityTooLarge) as e:
+        logger.warning(str(e))
+        return jsonify({'error': str(e), 'success': False}), 413
+    except ValueError as e:
+        logger.warning(f"Invalid image data: {str(e)}")
+        return jsonify({'error': f'Invalid image data: {str(e)}', 'success': False}), 400
+    except Exception as e:
+        return error_response(e)
+
+def read_batch_frames():
+    """
+    Collect the encoded frames of a batch request
+    
+    Returns:
+        list: base64 strings (JSON body) or bytes (multipart, one file per frame)
+    
+    Raises:
+        UploadTooLargeError: More than MAX_BATCH_FRAMES frames, or a frame over MAX_UPLOAD_BYTES
+    """
+    if request.mimetype == 'multipart/form-data':
+        uploads = [upload for _, upload in request.files.items(multi=True)]
+        check_batch_size(len(uploads))
+        frames = []
+        for upload in uploads:
+            # Check each spooled part's size before reading it into memory
+            upload.stream.seek(0, 2)
+            check_frame_size(upload.stream.tell())
+            upload.stream.seek(0)
+            frames.append(upload.read())
+        return frames
+    
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('images'), list):
+        return []
+    check_batch_size(len(data['images']))
+    for frame in data['images']:
+        if isinstance(frame, str):
+            # base64: 4 characters per 3 bytes
+            check_frame_size(len(frame) * 3 // 4)
+    return data['images']
+
+def check_batch_size(count):
+    if count > MAX_BATCH_FRAMES:
+        raise UploadTooLargeError(f'Batch of {count} frames exceeds {MAX_BATCH_FRAMES}')
+
+def check_frame_size(length):
+    if length > MAX_UPLOAD_BYTES:
+        raise UploadTooLargeError(f'Frame of {length} bytes exceeds {MAX_UPLOAD_BYTES} bytes')
+
+def decode_frame(frame):
+    """Decode one batch frame (base64 string or raw bytes) to a BGR array"""
+    if isinstance(frame, str):
         # Remove data URL prefix if present
-        if ',' in image_data:
-            image_data = image_data.split(',')[1]
-        
-        # Decode base64 to bytes
-        image_bytes = base64.b64decode(image_data)
-        
-        # Convert to PIL Image
-        image = Image.open(io.BytesIO(image_bytes))
-        
-        # Convert to numpy array (BGR format for OpenCV)
-        image_np = np.array(image)
-        
-        # Convert RGB to BGR if needed
-        if len(image_np.shape) == 3 and image_np.shape[2] == 3:
-            image_np = cv2.cvtColor(image_np, cv2.COLOR_RGB2BGR)
-        
-        # Save temporary image for DeepFace
-        temp_path = 'temp_emotion_image.jpg'
-        cv2.imwrite(temp_path, image_np)
-        
-        # Analyze emotion using DeepFace
-        result = DeepFace.analyze(
-            img_path=temp_path,
-            actions=['emotion'],
-            enforce_detection=False,
-            silent=True
-        )
-        
-        # Extract emotion data
-        if isinstance(result, list):
-            result = result[0]
-        
-        emotions = result.get('emotion', {})
-        dominant_emotion = result.get('dominant_emotion', 'neutral')
-        
-        # Calculate stress level (0-1 scale)
-        # DeepFace returns emotion values as percentages (0-100)
-        # High stress emotions: angry, fear, sad
-        # Low stress emotions: happy, surprise, neutral
-        stress_emotions = ['angry', 'fear', 'sad']
-        calm_emotions = ['happy', 'surprise', 'neutral']
-        
-        stress_score = sum(emotions.get(e, 0) for e in stress_emotions)
-        calm_score = sum(emotions.get(e, 0) for e in calm_emotions)
-        
-        # Normalize stress level (0-1)
-        # DeepFace already returns 0-100, so divide by 100 to get 0-1
-        total = stress_score + calm_score
-        if total > 0:
-            stress_level = (stress_score / total)
-            # Ensure it's in 0-1 range (DeepFace percentages sum to 100)
-            if stress_level > 1.0:
-                stress_level = stress_level / 100.0
-        else:
-            stress_level = 0.0
+        if ',' in frame:
+            frame = frame.split(',')[1]
+        frame = base64.b64decode(frame)
+    return decode_image(frame, MAX_DECODE_DIMENSION)
+
+def summarize_batch(analyses, stress_levels):
+    """
+    Aggregate per-frame analyses of a batch
+    Stress of the summary uses the service formula on the average emotions
+    """
+    if not analyses:
+        return None
+    
+    emotion_counts = {}
+    for analysis in analyses:
+        dominant = analysis['dominant_emotion']
+        emotion_counts[dominant] = emotion_counts.get(dominant, 0) + 1
+    
+    average_emotions = {
+        emotion: sum(analysis['emotion'][emotion] for analysis in analyses) / len(analyses)
+        for emotion in analyses[0]['emotion']
+    }
+    
+    return {
+        'frameCount': len(analyses),
+        'facesDetected': sum(1 for analysis in analyses if analysis['face_detected']),
+        'dominantEmotion': max(emotion_counts, key=emotion_counts.get),
+        'emotionCounts': emotion_counts,
+        'averageEmotions': average_emotions,
+        'stressLevel': calculate_stress_level(average_emotions),
+        'averageStressLevel': sum(stress_levels) / len(stress_levels),
+        'peakStressLevel': max(stress_levels)
+    }
+
+@app.route('/detect-emotion/batch', methods=['POST'])
+@admission_controlled
+def detect_emotion_batch():
+    """
+    Detect emotions for several frames with one batched model call
+    Expected: JSON { "images": ["base64_string", ...] } or multipart/form-data with one file per frame
+    Returns: { "results": [{ "emotions", "dominantEmotion", "stressLevel", "faceDetected" }, ...],
+               "summary": {...}, "timings": {...} }
+    Frames that cannot be decoded get { "error": ..., "success": false } in their slot
+    With ?precropped=1 (or "precropped": true in the JSON body) every frame is taken to be a face crop
+    """
+    timer = request_timer()
+    try:
+        with timer.stage('parse'):
+            frames = read_batch_frames()
         
-        logger.info(f"Emotion detected: {dominant_emotion}, Stress: {stress_level:.2f}")
+        if not frames:
+            return jsonify({'error': 'No image data provided'}), 400
         
-        return jsonify({
-            'emotions': emotions,
-            'dominantEmotion': dominant_emotion,
-            'stressLevel': stress_level,
+        results = [None] * len(frames)
+        decoded = []
+        with timer.stage('decode'):
+            for index, frame in enumerate(frames):
+                try:
+                    decoded.append((index, decode_frame(frame)))
+                except ValueError as e:
+                    results[index] = {'error': f'Invalid image data: {str(e)}', 'success': False}
+        
+        analyses = get_emotion_engine().analyze_images([image for _, image in decoded], timer,
+                                                       precropped=is_precropped(request.get_json(silent=True)))
+        stress_levels = [calculate_stress_level(analysis['emotion']) for analysis in analyses]
+        
+        for (index, _), analysis, stress_level in zip(decoded, analyses, stress_levels):
+            results[index] = {
+                'emotions': analysis['emotion'],
+                'dominantEmotion': analysis['dominant_emotion'],
+                'stressLevel': stress_level,
+                'faceDetected': analysis['face_detected'],
+                'success': True
+            }
+        
+        summary = summarize_batch(analyses, stress_levels)
+        logger.info(f"Batch analyzed: {len(analyses)}/{len(frames)} frames, Timings (ms): {timer.timings}")
+        
+        service_metrics.increment('faces_found', sum(1 for analysis in analyses if analysis['face_detected']))
+        
+        return json_response({
+            'results': results,
+            'summary': summary,
+            'timings': timer.timings,
             'success': True
-        }), 200
+        }, timer)
         
+    except (UploadTooLargeError, RequestEntityTooLarge) as e:
+        logger.warning(str(e))
+        return jsonify({'error': str(e), 'success': False}), 413
     except Exception as e:
-        logger.error(f"Error detecting emotion: {str(e)}")
-        return jsonify({
-            'error': str(e),
-            'success': False,
-            'emotions': {},
-            'dominantEmotion': 'neutral',
-            'stressLevel': 0.0
-        }), 500
+        service_metrics.increment('errors')
+        logger.error(f"Error detecting emotions in batch: {str(e)}")
+        return jsonify({'error': str(e), 'success': False}), 500
+
+def read_request_image(timer):
+    """
+    Decode the image of a JSON ({ "image": base64 }) or binary (raw/multipart) request
+    
+    Returns:
+        np.ndarray: BGR image, or None if the request carries no image
+    """
+    with timer.stage('parse'):
+        if request.mimetype == 'application/json':
+            data = request.get_json(silent=True)
+            encoded = data.get('image') if data else None
+        else:
+            encoded = read_upload()
+    
+    if not encoded:
+        return None
+    
+    with timer.stage('decode'):
+        return decode_frame(encoded)
+
+@app.route('/sessions', methods=['POST'])
+@sessions_required
+def create_session():
+    """
+    Start a streaming emotion session
+    Optional JSON: { "sessionId": "..." } (generated if omitted)
+    Returns: { "sessionId": "...", "ttlSeconds": ... }
+    """
+    data = request.get_json(silent=True) or {}
+    session = session_store.create(data.get('sessionId'))
+    return jsonify({
+        'sessionId': session.session_id,
+        'ttlSeconds': session_store.ttl_seconds,
+        'success': True
+    }), 201
+
+@app.route('/sessions/<session_id>/frames', methods=['POST'])
+@sessions_required
+@admission_controlled
+def push_session_frame(session_id):
+    """
+    Analyze one frame of a session and fold it into the session aggregate
+    Accepts the same bodies (and precropped flag) as /detect-emotion (JSON) and /detect-emotion/upload (binary)
+    Returns: the /detect-emotion response plus the rolling session "summary"
+    """
+    session = session_store.get(session_id, touch=True)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    
+    timer = request_timer()
+    try:
+        image_np = read_request_image(timer)
+        if image_np is None:
+            return jsonify({'error': 'No image data provided'}), 400
+        
+        result = analyze_image(image_np, timer, cache_scope=session_id,
+                               precropped=is_precropped(request.get_json(silent=True)))
+        session.update(result['emotions'], result['dominantEmotion'], result['stressLevel'])
+        result['summary'] = session.summary()
+        return json_response(result, timer)
+        
+    except (UploadTooLargeError, RequestEntityTooLarge) as e:
+        logger.warning(str(e))
+        return jsonify({'error': str(e), 'success': False}), 413
+    except ValueError as e:
+        logger.warning(f"Invalid image data: {str(e)}")
+        return jsonify({'error': f'Invalid image data: {str(e)}', 'success': False}), 400
+    except Exception as e:
+        return error_response(e)
+
+@app.route('/sessions/<session_id>', methods=['GET'])
+@sessions_required
+def get_session_summary(session_id):
+    """Current rolling summary of a session"""
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    return jsonify({'summary': session.summary(), 'success': True}), 200
+
+@app.route('/sessions/<session_id>', methods=['DELETE'])
+@sessions_required
+def close_session(session_id):
+    """End a session and return its final summary"""
+    session = session_store.close(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    return jsonify({'summary': session.summary(), 'success': True}), 200
+
+@app.route('/sessions/<session_id>/stream', methods=['GET'])
+@sessions_required
+def stream_session(session_id):
+    """
+    Server-Sent Events stream of a session's rolling summary
+    One "data:" event per update (plus keep-alive comments), ends when the session closes
+    Each stream holds a worker thread, so at most MAX_STREAMS are open at once (503 beyond that)
+    """
+    session = session_store.get(session_id)
+    if session is None:
+        return jsonify({'error': 'Unknown or expired session', 'success': False}), 404
+    if not session_store.open_stream():
+        response = jsonify({'error': f'Too many open streams (max {session_store.max_streams})', 'success': False})
+        response.status_code = 503
+        response.headers['Retry-After'] = str(SSE_HEARTBEAT_SECONDS)
+        return response
+    
+    def events():
+        version = -1
+        while True:
+            current = session.wait_for_update(version, timeout=SSE_HEARTBEAT_SECONDS)
+            if current == version and not session.closed:
+                yield ': keep-alive\n\n'
+                continue
+            version = current
+            yield f"data: {json.dumps(session.summary())}\n\n"
+            if session.closed:
+                break
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if the client left before the first event
+    response.call_on_close(session_store.close_stream)
+    return response
 
 @app.route('/detect-emotion-simple', methods=['POST'])
 def detect_emotion_simple():
@@ -134,6 +863,8 @@ def detect_emotion_simple():
         if not data or 'image' not in data:
             return jsonify({'error': 'No image data provided'}), 400
         
+        service_metrics.increment('mock_fallbacks')
+        
         # Return mock emotion data
         return jsonify({
             'emotions': {
@@ -163,7 +894,17 @@ if __name__ == '__main__':
     logger.info("📍 Service will run on http://127.0.0.1:5001")
     logger.info("🔍 Endpoints:")
     logger.info("   - GET  /health              - Health check")
+    logger.info("   - GET  /ready               - Readiness (model loaded and warmed)")
     logger.info("   - POST /detect-emotion      - Emotion detection (DeepFace)")
+    logger.info("   - POST /detect-emotion/upload - Emotion detection (raw JPEG/PNG or multipart)")
+    logger.info("   - POST /detect-emotion/batch - Batched emotion detection (N frames)")
     logger.info("   - POST /detect-emotion-simple - Simple detection (fallback)")
+    logger.info("   - GET  /stats               - Micro-batching, session, cache and admission statistics")
+    logger.info("   - GET  /metrics             - Stage latency histograms and counters (Prometheus)")
+    logger.info("   - POST /sessions            - Start a streaming session (then POST /sessions/<id>/frames,")
+    logger.info("                                 GET /sessions/<id>/stream for SSE summaries, DELETE to end)")
     
-    app.run(host='0.0.0.0', port=5001, debug=True)
+    # Development server; use `gunicorn -c gunicorn.conf.py` for multi-worker serving
+    # Warm in the background so /health answers at once and /ready flips when done
+    threading.Thread(target=warm_model, daemon=True).start()
+    app.run(host='0.0.0.0', port=5001, debug=DEBUG, use_reloader=False, threaded=True)
@@ -0,0 +1,162 @@
+"""
+Batched Emotion Engine
+Crops the largest face of each frame with a Haar cascade and runs all crops through
+DeepFace's emotion model in one forward pass (DeepFace.analyze handles one image per call)
+"""
+
+import threading
+import time
+from contextlib import nullcontext
+
+import cv2
+import numpy as np
+from deepface import DeepFace
+
+
+# Output order of DeepFace's emotion model
+EMOTION_LABELS = ['angry', 'disgust', 'fear', 'happy', 'sad', 'surprise', 'neutral']
+FACE_INPUT_SIZE = 48
+
+face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+
+
+def to_gray(image_np):
+    """BGR (or already grayscale) image to grayscale"""
+    return cv2.cvtColor(image_np, cv2.COLOR_BGR2GRAY) if image_np.ndim == 3 else image_np
+
+
+def crop_largest_face(image_np):
+    """
+    Grayscale crop of the largest face, or the whole frame if none is found
+    (same fallback as DeepFace.analyze with enforce_detection=False)
+
+    Args:
+        image_np: BGR or grayscale image
+
+    Returns:
+        tuple: (gray crop, face_found)
+    """
+    gray = to_gray(image_np)
+    faces = face_cascade.detectMultiScale(gray, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+    if len(faces) == 0:
+        return gray, False
+
+    x, y, w, h = max(faces, key=lambda box: box[2] * box[3])
+    return gray[y:y + h, x:x + w], True
+
+
+def preprocess_face(face_gray):
+    """Resize and normalize a grayscale face crop to the model input (48, 48, 1)"""
+    face = cv2.resize(face_gray, (FACE_INPUT_SIZE, FACE_INPUT_SIZE))
+    return (face.astype(np.float32) / 255.0)[..., np.newaxis]
+
+
+class EmotionEngine:
+    """
+    Loads the emotion model once and analyzes batches of frames
+    """
+
+    def __init__(self):
+        self.model = None
+        self.load_seconds = None
+        self.warmup_seconds = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Build the emotion model (once)"""
+        with self._lock:
+            if self.model is None:
+                started = time.perf_counter()
+                built = DeepFace.build_model('Emotion')
+                self.model = getattr(built, 'model', built)
+                self.load_seconds = time.perf_counter() - started
+        return self.model
+
+    def warmup(self):
+        """Run one dummy batch so the first real request does not pay graph setup"""
+        model = self.load()
+        started = time.perf_counter()
+        model.predict(np.zeros((1, FACE_INPUT_SIZE, FACE_INPUT_SIZE, 1), dtype=np.float32), verbose=0)
+        self.warmup_seconds = time.perf_counter() - started
+        return True
+
+    def predict(self, inputs):
+        """
+        Run preprocessed faces through the model
+
+        Args:
+            inputs: float32 array (N, 48, 48, 1)
+
+        Returns:
+            np.ndarray: (N, 7) probabilities in EMOTION_LABELS order
+        """
+        return self.load().predict(inputs, verbose=0)
+
+    def analyze_faces(self, faces, timer=None):
+        """
+        Analyze grayscale face crops with one batched model call
+
+        Args:
+            faces: List of grayscale face crops
+            timer: Optional StageTimer ('inference' stage)
+
+        Returns:
+            list: Per face {'emotion': {...percent}, 'dominant_emotion': str}
+        """
+        if not faces:
+            return []
+
+        with _stage(timer, 'inference'):
+            inputs = np.stack([preprocess_face(face) for face in faces])
+            probabilities = self.predict(inputs)
+
+        return [
+            {
+                'emotion': {label: float(p) * 100 for label, p in zip(EMOTION_LABELS, row)},
+                'dominant_emotion': EMOTION_LABELS[int(np.argmax(row))]
+            }
+            for row in probabilities
+        ]
+
+    def analyze_images(self, images, timer=None, precropped=False):
+        """
+        Analyze decoded BGR frames with one batched model call
+
+        Args:
+            images: List of BGR numpy arrays
+            timer: Optional StageTimer ('color_conversion', 'face_detection' and 'inference' stages)
+            precropped: Frames are already face crops (face detection is skipped)
+
+        Returns:
+            list: Per frame {'emotion': {...percent}, 'dominant_emotion': str, 'face_detected': bool}
+        """
+        with _stage(timer, 'color_conversion'):
+            grays = [to_gray(image) for image in images]
+
+        if precropped:
+            crops = [(gray, True) for gray in grays]
+        else:
+            with _stage(timer, 'face_detection'):
+                crops = [crop_largest_face(gray) for gray in grays]
+
+        results = self.analyze_faces([face for face, _ in crops], timer)
+        for result, (_, face_found) in zip(results, crops):
+            result['face_detected'] = face_found
+        return results
+
+
+def _stage(timer, name):
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_emotion_engine():
+    """Get the process-wide emotion engine"""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = EmotionEngine()
+        return _engine
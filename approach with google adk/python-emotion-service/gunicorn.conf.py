@@ -0,0 +1,69 @@
+"""
+Gunicorn Configuration for the Emotion Service (production serving mode)
+
+Usage (Linux/macOS):
+    gunicorn -c gunicorn.conf.py
+
+With preload (the default) the app is imported and the emotion model's Keras
+weights are loaded once in the master, before the workers fork, so the weights are
+shared copy-on-write. The master never runs a prediction: TensorFlow is not
+fork-safe once a session or inference thread pool exists. Each worker runs its
+own warmup prediction in the background after it is forked; /ready answers 503
+until that is done, so a load balancer only routes analyses to warm workers.
+If the TensorFlow build in use still hangs in forked workers, set
+EMOTION_PRELOAD=0 to load the model separately in each worker instead.
+
+Streaming sessions (EMOTION_SESSIONS=1, the default) live in one worker's memory:
+run them with EMOTION_WORKERS=1, or behind a load balancer that routes each
+session id to the same instance.
+"""
+
+import os
+
+wsgi_app = 'app:app'
+bind = os.environ.get('EMOTION_BIND', '0.0.0.0:5001')
+
+# Processes x threads; inference runs in each worker's micro-batcher thread
+workers = int(os.environ.get('EMOTION_WORKERS', 2))
+worker_class = 'gthread'
+# Enough threads for a full micro-batch in flight (EMOTION_MAX_IN_FLIGHT) plus SSE streams and probes
+threads = int(os.environ.get('EMOTION_THREADS', 24))
+
+preload_app = os.environ.get('EMOTION_PRELOAD', '1') == '1'
+sessions_enabled = os.environ.get('EMOTION_SESSIONS', '1') == '1'
+
+# Model loading can take a while on first start
+timeout = int(os.environ.get('EMOTION_WORKER_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+loglevel = os.environ.get('EMOTION_LOG_LEVEL', 'info')
+
+
+def on_starting(server):
+    """Warn when streaming sessions are combined with several workers"""
+    if sessions_enabled and server.cfg.workers > 1:
+        server.log.warning("!" * 72)
+        server.log.warning(f"Streaming sessions are enabled with {server.cfg.workers} workers. Sessions live in "
+                           "one worker's memory, so frame pushes, streams and DELETEs that reach another "
+                           "worker get 404. Set EMOTION_WORKERS=1, route session ids to one instance, "
+                           "or set EMOTION_SESSIONS=0.")
+        server.log.warning("!" * 72)
+
+
+def when_ready(server):
+    """Master is up (app already imported with preload): load the weights before forking, no prediction"""
+    if preload_app:
+        import app as service
+        service.get_emotion_engine().load()
+        server.log.info("Emotion model weights loaded in master (shared copy-on-write by workers)")
+
+
+def post_fork(server, worker):
+    """Warm the model in the background; the worker serves /health at once and /ready once warm"""
+    import threading
+    import app as service
+    service.model_ready.clear()
+    threading.Thread(target=service.warm_model, daemon=True).start()
+    server.log.info(f"Worker {worker.pid} warming up")
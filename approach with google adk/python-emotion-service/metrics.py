@@ -0,0 +1,187 @@
+"""
+Service Metrics
+Thread-safe fixed-bucket histograms for latency and size distributions, a registry
+of per-stage timings and counters, and Prometheus text rendering for /metrics
+"""
+
+import bisect
+import threading
+
+
+# Bucket upper bounds in milliseconds
+LATENCY_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000]
+
+
+class Histogram:
+    """
+    Cumulative-bucket histogram with count, sum, min and max
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        """
+        Args:
+            buckets: Ascending bucket upper bounds (an implicit +Inf bucket is added)
+        """
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min = None
+        self.max = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        """Record one value"""
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q):
+        """
+        Approximate percentile (upper bound of the bucket containing it)
+
+        Args:
+            q: Fraction 0-1
+        """
+        with self._lock:
+            if not self.count:
+                return None
+            target = q * self.count
+            cumulative = 0
+            for bound, count in zip(self.buckets, self.counts):
+                cumulative += count
+                if cumulative >= target:
+                    return round(min(bound, self.max), 3)
+            return round(self.max, 3)
+
+    def snapshot(self):
+        """Get summary and per-bucket counts"""
+        p50, p95, p99 = self.percentile(0.5), self.percentile(0.95), self.percentile(0.99)
+        with self._lock:
+            cumulative = 0
+            buckets = {}
+            for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+                cumulative += count
+                buckets[str(bound)] = cumulative
+            return {
+                'count': self.count,
+                'sum': round(self.sum, 3),
+                'mean': round(self.sum / self.count, 3) if self.count else None,
+                'min': round(self.min, 3) if self.min is not None else None,
+                'max': round(self.max, 3) if self.max is not None else None,
+                'p50': p50,
+                'p95': p95,
+                'p99': p99,
+                'buckets': buckets
+            }
+
+
+class ServiceMetrics:
+    """
+    Registry of per-stage latency histograms, request counts and named counters
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.requests = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe_stages(self, timings):
+        """
+        Record one request's stage timings
+
+        Args:
+            timings: Stage name -> milliseconds (StageTimer.timings)
+        """
+        for stage, elapsed_ms in timings.items():
+            histogram = self.stages.get(stage)
+            if histogram is None:
+                with self._lock:
+                    histogram = self.stages.setdefault(stage, Histogram())
+            histogram.observe(elapsed_ms)
+
+    def count_request(self, endpoint, status):
+        """Count a finished request by endpoint and HTTP status"""
+        with self._lock:
+            key = (endpoint, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+
+    def increment(self, name, amount=1):
+        """Increase a named counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self):
+        """Get all metrics as a dict"""
+        with self._lock:
+            requests = [
+                {'endpoint': endpoint, 'status': status, 'count': count}
+                for (endpoint, status), count in sorted(self.requests.items())
+            ]
+            counters = dict(self.counters)
+            stages = dict(self.stages)
+        return {
+            'requests': requests,
+            'counters': counters,
+            'stagesMs': {stage: histogram.snapshot() for stage, histogram in stages.items()}
+        }
+
+
+def _labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(metrics, gauges=None, histograms=None, prefix='emotion'):
+    """
+    Render metrics in the Prometheus text exposition format
+
+    Args:
+        metrics: ServiceMetrics
+        gauges: Extra name -> value gauges (None values are skipped)
+        histograms: Extra name -> Histogram (e.g. micro-batching queue wait)
+    """
+    snapshot = metrics.snapshot()
+    lines = []
+
+    lines.append(f'# TYPE {prefix}_requests_total counter')
+    for entry in snapshot['requests']:
+        labels = _labels({'endpoint': entry['endpoint'], 'status': entry['status']})
+        lines.append(f"{prefix}_requests_total{labels} {entry['count']}")
+
+    for name, value in sorted(snapshot['counters'].items()):
+        lines.append(f'# TYPE {prefix}_{name}_total counter')
+        lines.append(f'{prefix}_{name}_total {value}')
+
+    lines.append(f'# TYPE {prefix}_stage_duration_ms histogram')
+    for stage, stage_snapshot in sorted(snapshot['stagesMs'].items()):
+        lines.extend(_histogram_lines(f'{prefix}_stage_duration_ms', {'stage': stage}, stage_snapshot))
+
+    for name, histogram in sorted((histograms or {}).items()):
+        lines.append(f'# TYPE {prefix}_{name} histogram')
+        lines.extend(_histogram_lines(f'{prefix}_{name}', {}, histogram.snapshot()))
+
+    for name, value in sorted((gauges or {}).items()):
+        if value is None:
+            continue
+        lines.append(f'# TYPE {prefix}_{name} gauge')
+        lines.append(f'{prefix}_{name} {float(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def _histogram_lines(name, labels, snapshot):
+    lines = []
+    for bound, cumulative in snapshot['buckets'].items():
+        lines.append(f'{name}_bucket{_labels({**labels, "le": bound})} {cumulative}')
+    lines.append(f"{name}_sum{_labels(labels)} {snapshot['sum']}")
+    lines.append(f"{name}_count{_labels(labels)} {snapshot['count']}")
+    return lines
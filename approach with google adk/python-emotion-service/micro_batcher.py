@@ -0,0 +1,142 @@
+"""
+Micro-Batching Scheduler
+Coalesces concurrent single-image requests: face crops are queued for up to a few
+milliseconds (or until the batch is full), analyzed with one batched forward pass,
+and each waiting request gets its own result back. Face detection stays in the
+request threads, so only the forward pass is serialized.
+"""
+
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from emotion_engine import get_emotion_engine
+from metrics import Histogram
+
+
+MICRO_BATCH_MAX_SIZE = int(os.environ.get('EMOTION_MICRO_BATCH_SIZE', 16))
+MICRO_BATCH_MAX_WAIT_MS = float(os.environ.get('EMOTION_MICRO_BATCH_WAIT_MS', 5))
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64]
+
+
+class MicroBatcher:
+    """
+    Queue + worker thread that runs queued face crops through the engine in batches
+    """
+
+    def __init__(self, engine=None, max_batch_size=MICRO_BATCH_MAX_SIZE, max_wait_ms=MICRO_BATCH_MAX_WAIT_MS):
+        """
+        Args:
+            engine: EmotionEngine (default: the process-wide one)
+            max_batch_size: Largest batch per forward pass
+            max_wait_ms: Longest time the first queued crop waits for others
+        """
+        self.engine = engine or get_emotion_engine()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000.0
+
+        self.queue = queue.Queue()
+        self.thread = None
+        self.running = False
+
+        self.queue_wait_ms = Histogram()
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.batches_failed = 0
+
+    def start(self):
+        """Start the worker thread"""
+        if self.running:
+            return self
+        self.running = True
+        self.thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """Stop the worker thread (queued requests are still answered)"""
+        self.running = False
+        self.queue.put(None)
+        if self.thread:
+            self.thread.join(timeout=5)
+
+    def submit(self, face_gray):
+        """
+        Queue a grayscale face crop
+
+        Returns:
+            Future: Resolves to {'emotion': {...}, 'dominant_emotion': ...}
+        """
+        future = Future()
+        self.queue.put((face_gray, future, time.perf_counter()))
+        return future
+
+    def analyze(self, face_gray, timeout=30):
+        """Queue a face crop and wait for its result"""
+        return self.submit(face_gray).result(timeout=timeout)
+
+    def _worker_loop(self):
+        while self.running or not self.queue.empty():
+            item = self.queue.get()
+            if item is None:
+                continue
+
+            batch = [item]
+            # The first request's wait bounds the whole batch's added latency
+            deadline = item[2] + self.max_wait
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    break
+                batch.append(item)
+
+            self._run_batch(batch)
+
+    def _run_batch(self, batch):
+        started = time.perf_counter()
+        for _, _, enqueued in batch:
+            self.queue_wait_ms.observe((started - enqueued) * 1000)
+        self.batch_sizes.observe(len(batch))
+
+        try:
+            results = self.engine.analyze_faces([face for face, _, _ in batch])
+        except Exception as e:
+            self.batches_failed += 1
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def stats(self):
+        """Get queue-wait and batch-size histograms"""
+        return {
+            'maxBatchSize': self.max_batch_size,
+            'maxWaitMs': self.max_wait * 1000,
+            'queueDepth': self.queue.qsize(),
+            'batchesFailed': self.batches_failed,
+            'queueWaitMs': self.queue_wait_ms.snapshot(),
+            'batchSize': self.batch_sizes.snapshot()
+        }
+
+
+_batcher = None
+_batcher_lock = threading.Lock()
+
+
+def get_micro_batcher():
+    """Get the process-wide (per worker process) micro-batcher, started on first use"""
+    global _batcher
+    with _batcher_lock:
+        if _batcher is None:
+            _batcher = MicroBatcher().start()
+        return _batcher
@@ -0,0 +1,137 @@
+"""
+Perceptual-Hash Result Cache
+Reuses emotion results for near-duplicate face crops: each crop is reduced to a
+64-bit difference hash (dHash) and a cached result is returned when a recent crop
+from the same client is within a small Hamming distance. Bounded by size (LRU) and TTL.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+RESULT_CACHE_SIZE = int(os.environ.get('EMOTION_CACHE_SIZE', 512))
+RESULT_CACHE_TTL_SECONDS = float(os.environ.get('EMOTION_CACHE_TTL', 5))
+RESULT_CACHE_MAX_DISTANCE = int(os.environ.get('EMOTION_CACHE_MAX_DISTANCE', 4))  # of 64 bits
+
+
+def dhash(gray, hash_size=8):
+    """
+    Difference hash of a grayscale image: compares horizontally adjacent pixels
+    of a (hash_size + 1) x hash_size thumbnail
+
+    Returns:
+        int: hash_size * hash_size bit hash
+    """
+    thumbnail = cv2.resize(gray, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = thumbnail[:, 1:] > thumbnail[:, :-1]
+    return int.from_bytes(np.packbits(bits).tobytes(), 'big')
+
+
+def hamming_distance(a, b):
+    """Number of differing bits"""
+    return bin(a ^ b).count('1')
+
+
+class ResultCache:
+    """
+    LRU + TTL cache of emotion results keyed by (client scope, dHash)
+    Entries are indexed per scope, so a near-duplicate search only scans its own client's entries
+    """
+
+    def __init__(self, max_entries=RESULT_CACHE_SIZE, ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+                 max_distance=RESULT_CACHE_MAX_DISTANCE):
+        """
+        Args:
+            max_entries: Cache size bound (least recently used evicted first)
+            ttl_seconds: Entries older than this are never reused
+            max_distance: Largest Hamming distance that counts as the same face
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_distance = max_distance
+        self.entries = OrderedDict()  # (scope, key) -> None, least recently used first
+        self.scopes = {}  # scope -> OrderedDict(key -> (result, stored_at)), least recently used first
+        self.lock = threading.Lock()
+
+        # Counters
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def lookup(self, scope, key):
+        """
+        Find a cached result for a face hash
+
+        Args:
+            scope: Client identity (session or client id) - results never cross clients
+            key: dHash of the face crop
+
+        Returns:
+            dict: Cached result, or None
+        """
+        cutoff = time.time() - self.ttl_seconds
+        with self.lock:
+            scope_entries = self.scopes.get(scope)
+            if not scope_entries:
+                self.misses += 1
+                return None
+
+            entry = scope_entries.get(key)
+            if entry is not None and entry[1] >= cutoff:
+                self._touch(scope, key)
+                self.hits += 1
+                return entry[0]
+
+            # Newest first: a steady face most likely matches the latest entry
+            for entry_key, (result, stored_at) in reversed(scope_entries.items()):
+                if stored_at < cutoff:
+                    continue
+                if hamming_distance(entry_key, key) <= self.max_distance:
+                    self._touch(scope, entry_key)
+                    self.hits += 1
+                    self.near_hits += 1
+                    return result
+
+            self.misses += 1
+            return None
+
+    def store(self, scope, key, result):
+        """Cache a result (resets its age)"""
+        with self.lock:
+            scope_entries = self.scopes.setdefault(scope, OrderedDict())
+            scope_entries.pop(key, None)
+            scope_entries[key] = (result, time.time())
+            self.entries.pop((scope, key), None)
+            self.entries[(scope, key)] = None
+            while len(self.entries) > self.max_entries:
+                (old_scope, old_key), _ = self.entries.popitem(last=False)
+                old_entries = self.scopes[old_scope]
+                del old_entries[old_key]
+                if not old_entries:
+                    del self.scopes[old_scope]
+
+    def _touch(self, scope, key):
+        """Mark an entry recently used (caller holds the lock)"""
+        self.entries.move_to_end((scope, key))
+        self.scopes[scope].move_to_end(key)
+
+    def stats(self):
+        """Get hit/miss counters"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self.entries),
+                'scopes': len(self.scopes),
+                'maxEntries': self.max_entries,
+                'ttlSeconds': self.ttl_seconds,
+                'maxDistance': self.max_distance,
+                'hits': self.hits,
+                'nearDuplicateHits': self.near_hits,
+                'misses': self.misses,
+                'hitRate': round(self.hits / lookups, 4) if lookups else 0.0
+            }
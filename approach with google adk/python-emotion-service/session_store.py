@@ -0,0 +1,213 @@
+"""
+Session Store
+Per-student streaming emotion aggregates: each pushed frame updates running counts,
+mean scores and stress statistics in O(1). Sessions expire after a TTL of inactivity
+and the store holds at most a fixed number of them (least recently used evicted first).
+
+Sessions live in the worker process that created them, so they need a single worker
+(EMOTION_WORKERS=1; gunicorn.conf.py warns at startup otherwise); scale out with more
+single-worker instances behind a load balancer that routes by session id. Each open SSE stream holds a worker
+thread, so the number of concurrent streams is capped.
+"""
+
+import math
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+
+SESSION_TTL_SECONDS = float(os.environ.get('EMOTION_SESSION_TTL', 600))
+MAX_SESSIONS = int(os.environ.get('EMOTION_MAX_SESSIONS', 500))
+MAX_STREAMS = int(os.environ.get('EMOTION_MAX_STREAMS', 4))  # Leave worker threads for analysis requests
+
+
+class SessionAggregate:
+    """
+    Online aggregate of one session's frames
+    """
+
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.created = time.time()
+        self.last_seen = self.created
+        self.frames = 0
+        self.emotion_counts = {}
+        self.emotion_means = {}
+
+        # Welford stress statistics
+        self.stress_mean = 0.0
+        self.stress_m2 = 0.0
+        self.stress_min = None
+        self.stress_max = None
+        self.last_stress = None
+
+        # Bumped on every update; stream readers wait on it
+        self.version = 0
+        self.closed = False
+        self.changed = threading.Condition()
+
+    def update(self, emotions, dominant_emotion, stress_level):
+        """Fold one analyzed frame into the aggregate"""
+        stress_level = float(stress_level)
+        with self.changed:
+            self.frames += 1
+            self.last_seen = time.time()
+            self.emotion_counts[dominant_emotion] = self.emotion_counts.get(dominant_emotion, 0) + 1
+
+            for emotion, score in emotions.items():
+                score = float(score)
+                mean = self.emotion_means.get(emotion, 0.0)
+                self.emotion_means[emotion] = mean + (score - mean) / self.frames
+
+            delta = stress_level - self.stress_mean
+            self.stress_mean += delta / self.frames
+            self.stress_m2 += delta * (stress_level - self.stress_mean)
+            self.stress_min = stress_level if self.stress_min is None else min(self.stress_min, stress_level)
+            self.stress_max = stress_level if self.stress_max is None else max(self.stress_max, stress_level)
+            self.last_stress = stress_level
+
+            self.version += 1
+            self.changed.notify_all()
+
+    def close(self):
+        """Mark the session finished and wake stream readers"""
+        with self.changed:
+            self.closed = True
+            self.changed.notify_all()
+
+    def wait_for_update(self, after_version, timeout):
+        """
+        Block until the aggregate changes past after_version, the session closes, or timeout
+
+        Returns:
+            int: Current version
+        """
+        with self.changed:
+            self.changed.wait_for(lambda: self.version > after_version or self.closed, timeout=timeout)
+            return self.version
+
+    def summary(self):
+        """Rolling summary of the session so far"""
+        with self.changed:
+            dominant = max(self.emotion_counts, key=self.emotion_counts.get) if self.emotion_counts else None
+            return {
+                'sessionId': self.session_id,
+                'frames': self.frames,
+                'dominantEmotion': dominant,
+                'emotionCounts': dict(self.emotion_counts),
+                'averageEmotions': dict(self.emotion_means),
+                'stress': {
+                    'current': self.last_stress,
+                    'mean': self.stress_mean if self.frames else None,
+                    'std': math.sqrt(self.stress_m2 / self.frames) if self.frames else None,
+                    'min': self.stress_min,
+                    'max': self.stress_max
+                },
+                'durationSeconds': round(self.last_seen - self.created, 2),
+                'version': self.version,
+                'closed': self.closed
+            }
+
+
+class SessionStore:
+    """
+    TTL + LRU bounded collection of session aggregates
+    """
+
+    def __init__(self, ttl_seconds=SESSION_TTL_SECONDS, max_sessions=MAX_SESSIONS, max_streams=MAX_STREAMS):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_streams = max_streams
+        self.sessions = OrderedDict()
+        self.lock = threading.Lock()
+        self.open_streams = 0
+
+        # Counters
+        self.created = 0
+        self.expired = 0
+        self.evicted = 0
+        self.streams_rejected = 0
+
+    def create(self, session_id=None):
+        """Start a session (a new id is generated if none is given)"""
+        session_id = session_id or uuid.uuid4().hex
+        with self.lock:
+            self._evict_expired()
+            while len(self.sessions) >= self.max_sessions:
+                _, oldest = self.sessions.popitem(last=False)
+                oldest.close()
+                self.evicted += 1
+
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = SessionAggregate(session_id)
+                self.created += 1
+            self.sessions.move_to_end(session_id)
+            return session
+
+    def get(self, session_id, touch=False):
+        """
+        Get a live session, or None if unknown/expired
+
+        Args:
+            session_id: Session id
+            touch: Mark the session active (frame pushes only; reads do not extend it)
+        """
+        with self.lock:
+            self._evict_expired()
+            session = self.sessions.get(session_id)
+            if session is not None and touch:
+                session.last_seen = time.time()
+                self.sessions.move_to_end(session_id)
+            return session
+
+    def open_stream(self):
+        """Claim one of the stream slots (False if all are taken)"""
+        with self.lock:
+            if self.open_streams >= self.max_streams:
+                self.streams_rejected += 1
+                return False
+            self.open_streams += 1
+            return True
+
+    def close_stream(self):
+        """Release a stream slot"""
+        with self.lock:
+            self.open_streams -= 1
+
+    def close(self, session_id):
+        """End a session and return it (or None)"""
+        with self.lock:
+            session = self.sessions.pop(session_id, None)
+        if session is not None:
+            session.close()
+        return session
+
+    def _evict_expired(self):
+        """Drop sessions idle for longer than the TTL (caller holds the lock)"""
+        cutoff = time.time() - self.ttl_seconds
+        # Ordered by last use, so expired sessions are at the front
+        while self.sessions:
+            session_id, session = next(iter(self.sessions.items()))
+            if session.last_seen >= cutoff:
+                break
+            del self.sessions[session_id]
+            session.close()
+            self.expired += 1
+
+    def stats(self):
+        """Get store counters"""
+        with self.lock:
+            return {
+                'activeSessions': len(self.sessions),
+                'maxSessions': self.max_sessions,
+                'ttlSeconds': self.ttl_seconds,
+                'created': self.created,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'openStreams': self.open_streams,
+                'maxStreams': self.max_streams,
+                'streamsRejected': self.streams_rejected
+            }
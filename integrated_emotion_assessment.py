@@ -1,86 +1,115 @@
 import cv2
-from deepface import DeepFace
 import json
 from datetime import datetime
 import time
-from collections import defaultdict
+from collections import deque
 import requests
+import os
+import sys
+
+# Shared camera helpers live with the Python client
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'approach with google adk', 'python-client'))
+
+from frame_source import get_frame_source, release_frame_source
+from capture_pipeline import CapturePipeline
+from emotion_batcher import get_emotion_engine
+from face_tracker import FaceTracker
+from face_detection import crop_face_gray
+from emotion_aggregator import EmotionAggregator
+from emotion_timeline import EmotionTimeline, json_default
+from http_transport import get_http_transport
+from config import HTTP_GENERATION_DEADLINE
 
 # Configuration
 AI_SERVICE_URL = "http://localhost:3000/api/generate-questions-with-emotion"
 DURATION = 20  # seconds for emotion detection
 QUESTION_COUNT = 5  # number of questions to generate
 
-# Load face cascade classifier
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+def collect_emotion_results(pending, timeline, aggregator, wait=False):
+    """
+    Move finished batched analyses from pending into the timeline (in capture order)
+    and fold them into the running aggregator
+    With wait=True, blocks until every pending analysis has finished
+    """
+    while pending:
+        captured, future = pending[0]
+        if not wait and not future.done():
+            break
+        pending.popleft()
+        
+        try:
+            result = future.result(timeout=10)
+        except Exception as e:
+            print(f"Error analyzing face: {e}")
+            continue
+        
+        # Store emotion data stamped with the frame's capture time
+        timeline.append(captured.timestamp, result['dominant_emotion'], result['emotion'])
+        aggregator.update(result['dominant_emotion'], result['emotion'], timestamp=captured.timestamp)
 
 def detect_emotions(duration=20):
     """
     Detect emotions for a specified duration and return emotion summary
     """
-    # Start capturing video
-    cap = cv2.VideoCapture(0)
-    
     # Variables for emotion tracking
     start_time = time.time()
-    emotion_history = []
-    frame_count = 0
+    timeline = EmotionTimeline(start_time)
+    aggregator = EmotionAggregator()
+    last_emotion = None
+    
+    # Capture runs in the shared camera thread; this loop only analyzes the freshest frame
+    pipeline = CapturePipeline(get_frame_source()).start()
+    
+    # Full Haar detection only every few frames; the face box is tracked in between
+    tracker = FaceTracker()
+    
+    # Face crops are queued on the batching engine and analyzed in batches
+    engine = get_emotion_engine()
+    pending = deque()
     
     print(f"Starting {duration}-second emotion detection...")
     print("Analyzing emotions... Please look at the camera")
     print("=" * 60)
     
     while True:
-        # Capture frame-by-frame
-        ret, frame = cap.read()
+        # Take the freshest captured frame (older ones are dropped)
+        captured = pipeline.next_frame()
         
-        if not ret:
+        if captured is None:
             break
         
-        # Convert frame to grayscale
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        # Frames are shared with other consumers - annotate a copy
+        frame = captured.image.copy()
         
-        # Convert grayscale frame to RGB format
-        rgb_frame = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2RGB)
-        
-        # Detect faces in the frame
-        faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        # Detect faces on a downscaled grayscale copy (full detection or tracking);
+        # boxes come back in full-resolution coordinates
+        faces = tracker.update(captured.image)
         
         # Check elapsed time
         elapsed_time = time.time() - start_time
         remaining_time = duration - elapsed_time
         
         for i, (x, y, w, h) in enumerate(faces):
-            # Extract the face ROI (Region of Interest)
-            face_roi = rgb_frame[y:y + h, x:x + w]
+            # Extract the face ROI from the unannotated frame and convert only the ROI
+            # to grayscale - it goes straight to the emotion model
+            face_roi = crop_face_gray(captured.image, (x, y, w, h))
             
-            try:
-                # Perform emotion analysis on the face ROI
-                result = DeepFace.analyze(face_roi, actions=['emotion'], enforce_detection=False)
-                
-                # Get emotion data
-                emotion_data = result[0]['emotion']
-                dominant_emotion = result[0]['dominant_emotion']
-                
-                # Convert emotion scores to regular Python floats
-                emotion_scores = {k: float(v) for k, v in emotion_data.items()}
-                
-                # Store emotion data with timestamp
-                emotion_history.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "elapsed_seconds": round(elapsed_time, 2),
-                    "dominant_emotion": dominant_emotion,
-                    "emotion_scores": emotion_scores
-                })
-                
-                frame_count += 1
-                
-                # Draw rectangle around face and label with predicted emotion
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, dominant_emotion, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+            # Queue the face ROI for batched emotion analysis
+            future = engine.submit(face_roi)
+            future.add_done_callback(lambda _, c=captured: pipeline.mark_analyzed(c))
+            pending.append((captured, future))
             
-            except Exception as e:
-                print(f"Error analyzing face: {e}")
+            # Draw rectangle around face and label with the latest predicted emotion
+            cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
+            if last_emotion:
+                cv2.putText(frame, last_emotion, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
+        
+        # Record whatever has finished so far; wait for the backlog once a full batch is outstanding
+        collect_emotion_results(pending, timeline, aggregator,
+                                wait=len(pending) >= engine.max_batch_size)
+        frame_count = aggregator.samples
+        if len(timeline):
+            last_emotion = timeline.dominant(-1)
         
         # Display countdown and frame count
         cv2.putText(frame, f"Time remaining: {int(remaining_time)}s", (10, 30), 
@@ -101,29 +130,23 @@ def detect_emotions(duration=20):
             print("\nStopped early. Generating summary...")
             break
     
-    # Release the capture and close all windows
-    cap.release()
+    # Release the camera and close all windows
+    pipeline.stop()
+    release_frame_source()
     cv2.destroyAllWindows()
     
+    collect_emotion_results(pending, timeline, aggregator, wait=True)
+    frame_count = aggregator.samples
+    
     # Generate emotion summary
-    if emotion_history:
-        # Calculate emotion statistics
-        emotion_counts = defaultdict(int)
-        emotion_totals = defaultdict(float)
-        
-        for entry in emotion_history:
-            emotion_counts[entry["dominant_emotion"]] += 1
-            for emotion, score in entry["emotion_scores"].items():
-                emotion_totals[emotion] += score
-        
-        # Calculate averages
-        num_samples = len(emotion_history)
-        average_scores = {emotion: round(total / num_samples, 2) 
-                         for emotion, total in emotion_totals.items()}
+    if aggregator.samples:
+        # Averages are kept up to date per sample by the aggregator
+        average_scores = {emotion: round(score, 2) 
+                         for emotion, score in aggregator.average_scores().items()}
         
         # Calculate percentages of dominant emotions
-        emotion_percentages = {emotion: round((count / num_samples) * 100, 2) 
-                              for emotion, count in emotion_counts.items()}
+        emotion_percentages = {emotion: round(percentage, 2) 
+                              for emotion, percentage in aggregator.emotion_percentages().items()}
         
         # Find overall dominant emotion
         overall_dominant = max(emotion_percentages, key=emotion_percentages.get)
@@ -135,15 +158,18 @@ def detect_emotions(duration=20):
         summary = {
             "analysis_duration_seconds": round(time.time() - start_time, 2),
             "total_frames_analyzed": frame_count,
-            "start_time": emotion_history[0]["timestamp"] if emotion_history else None,
-            "end_time": emotion_history[-1]["timestamp"] if emotion_history else None,
+            "start_time": timeline.iso_timestamp(0),
+            "end_time": timeline.iso_timestamp(-1),
             "overall_dominant_emotion": overall_dominant,
             "dominant_emotion_percentages": dict(sorted(emotion_percentages.items(), 
                                                        key=lambda x: x[1], reverse=True)),
             "average_emotion_scores": dict(sorted(average_scores.items(), 
                                                   key=lambda x: x[1], reverse=True)),
             "stress_level": stress_level,
-            "detailed_timeline": emotion_history
+            "frame_latency": pipeline.stats(),
+            "face_tracking": tracker.stats(),
+            # Serialized to the per-sample dict list by json_default
+            "detailed_timeline": timeline
         }
         
         return summary
@@ -233,11 +259,13 @@ def generate_adaptive_questions(emotion_data, topic, student_id="student_001", g
     
     try:
         # Send POST request to AI service
-        response = requests.post(
+        # Pooled keep-alive connection. A slow LLM call is not repeated (only requests the
+        # backend never started are retried), and the student waits at most the deadline
+        response = get_http_transport().post(
             AI_SERVICE_URL,
-            json=payload,
+            data=json.dumps(payload, default=json_default),
             headers={"Content-Type": "application/json"},
-            timeout=60
+            deadline=HTTP_GENERATION_DEADLINE
         )
         
         if response.status_code == 200:
@@ -293,7 +321,7 @@ def main():
         # Save emotion summary
         emotion_filename = f"emotion_summary_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         with open(emotion_filename, 'w') as f:
-            json.dump(emotion_data, f, indent=2)
+            json.dump(emotion_data, f, indent=2, default=json_default)
         
         print("\n" + "=" * 60)
         print("EMOTION ANALYSIS SUMMARY")
@@ -341,7 +369,7 @@ def main():
             }
             
             with open(output_filename, 'w') as f:
-                json.dump(complete_output, f, indent=2)
+                json.dump(complete_output, f, indent=2, default=json_default)
             
             print("\n" + "=" * 60)
             print(f"✅ Complete output saved to: {output_filename}")
@@ -1,141 +1,223 @@
-import cv2
-from deepface import DeepFace
 import json
 from datetime import datetime
 import time
-from collections import defaultdict
+from collections import deque
 import requests
 import threading
+import os
+import sys
+
+# Shared camera helpers live with the Python client
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'approach with google adk', 'python-client'))
+
+from frame_source import get_frame_source, release_frame_source
+from capture_pipeline import CapturePipeline
+from emotion_batcher import get_emotion_engine
+from face_tracker import FaceTracker
+from face_detection import crop_face_gray
+from frame_sampler import AdaptiveFrameSampler
+from convergence import ConvergenceMonitor
+from emotion_aggregator import EmotionAggregator
+from emotion_timeline import EmotionTimeline, json_default
+from http_transport import get_http_transport
+from config import HTTP_GENERATION_DEADLINE
+from question_prefetcher import QuestionPrefetcher
+from emotion_model import get_emotion_model
 
 # Configuration
 AI_SERVICE_URL = "http://localhost:3000/api/generate-questions-with-emotion"
 EMOTION_DETECTION_DURATION = 10  # seconds per question
 TOTAL_QUESTIONS = 5
-
-# Load face cascade classifier
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + 'haarcascade_frontalface_default.xml')
+EARLY_STOP_SAMPLING = True  # Drop to keep-alive sampling once the emotion estimate has converged
+PREFETCH_QUESTIONS = True  # Generate next-question candidates while the student is still answering
 
 # Global variables for emotion tracking
-current_emotion_data = None
+current_emotion_data = None  # Final summary of the question being answered (None until it is done)
+live_emotion_aggregator = None  # Running summary of the question being answered
 emotion_lock = threading.Lock()
-stop_detection = False
 
-def detect_emotions_while_answering(question_text, max_duration=120):
+def collect_emotion_results(pending, timeline, aggregator, monitor=None, wait=False):
+    """
+    Move finished batched analyses from pending into the timeline (in capture order)
+    and fold them into the running aggregator (and convergence monitor, if any)
+    With wait=True, blocks until every pending analysis has finished
+    """
+    while pending:
+        captured, future = pending[0]
+        if not wait and not future.done():
+            break
+        pending.popleft()
+        
+        try:
+            result = future.result(timeout=10)
+        except Exception:
+            continue
+        
+        # Samples keep the frame's capture time
+        timeline.append(captured.timestamp, result['dominant_emotion'], result['emotion'])
+        aggregator.update(result['dominant_emotion'], result['emotion'], timestamp=captured.timestamp)
+        if monitor:
+            monitor.update(result['emotion'], captured.timestamp)
+
+def detect_emotions_while_answering(question_text, stop_event, max_duration=120, early_stop=EARLY_STOP_SAMPLING):
     """
     Detect emotions while student reads and answers the question
-    Runs in background, continuously monitoring emotions
+    Runs in background, continuously monitoring emotions until stop_event is set
+    With early_stop, sampling drops to a low keep-alive rate once the emotion
+    estimate has converged (the summary reports when that happened)
     """
-    global current_emotion_data, stop_detection
-    
-    cap = cv2.VideoCapture(0)
+    global current_emotion_data, live_emotion_aggregator
     
     start_time = time.time()
-    emotion_history = []
-    frame_count = 0
+    timeline = EmotionTimeline(start_time)
+    
+    # Counts/averages are updated per sample, so a summary is available mid-question
+    aggregator = EmotionAggregator()
+    with emotion_lock:
+        live_emotion_aggregator = aggregator
+    
+    # The shared camera's capture thread feeds a drop-oldest queue; this loop is
+    # the inference stage and always analyzes the freshest frame
+    pipeline = CapturePipeline(get_frame_source()).start()
+    
+    # Full Haar detection only every few frames; the face box is tracked in between
+    tracker = FaceTracker()
+    
+    # Face crops are queued on the batching engine and analyzed in batches
+    engine = get_emotion_engine()
+    pending = deque()
+    
+    # Holds the loop to a fps/CPU budget and skips faces that have not changed,
+    # so the student's input() prompt is never starved
+    sampler = AdaptiveFrameSampler()
+    
+    # Watches the running estimate's confidence bound when early stopping is enabled
+    monitor = ConvergenceMonitor() if early_stop else None
     
     # Silent monitoring - no messages printed
     # print(f"\n📹 Camera started - monitoring your emotions while you answer...")
     # print("=" * 60)
     
-    stop_detection = False
-    
-    while not stop_detection:
-        ret, frame = cap.read()
+    # Waiting on the stop event (not sleeping) ends the loop as soon as the answer is in,
+    # even during the ~2 s keep-alive waits after convergence
+    while not stop_event.wait(sampler.wait_time()):
+        captured = pipeline.next_frame()
         
-        if not ret:
+        if captured is None:
             break
         
-        # Convert frame to grayscale
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        rgb_frame = cv2.cvtColor(gray_frame, cv2.COLOR_GRAY2RGB)
+        frame = captured.image
+        work_started = time.time()
         
-        # Detect faces
-        faces = face_cascade.detectMultiScale(gray_frame, scaleFactor=1.1, minNeighbors=5, minSize=(30, 30))
+        # Detect faces on a downscaled grayscale copy (full detection or tracking);
+        # boxes come back in full-resolution coordinates
+        faces = tracker.update(frame)
         
         elapsed_time = time.time() - start_time
         remaining_time = max_duration - elapsed_time
         
-        for (x, y, w, h) in faces:
-            face_roi = rgb_frame[y:y + h, x:x + w]
-            
-            try:
-                result = DeepFace.analyze(face_roi, actions=['emotion'], enforce_detection=False)
-                emotion_data = result[0]['emotion']
-                dominant_emotion = result[0]['dominant_emotion']
-                
-                emotion_scores = {k: float(v) for k, v in emotion_data.items()}
-                
-                emotion_history.append({
-                    "timestamp": datetime.now().isoformat(),
-                    "elapsed_seconds": round(elapsed_time, 2),
-                    "dominant_emotion": dominant_emotion,
-                    "emotion_scores": emotion_scores
-                })
-                
-                frame_count += 1
-                
-                cv2.rectangle(frame, (x, y), (x + w, y + h), (0, 255, 0), 2)
-                cv2.putText(frame, dominant_emotion, (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.9, (0, 255, 0), 2)
-            
-            except Exception as e:
-                pass
+        # Only the face ROI is color-converted; the grayscale crop goes straight
+        # to the emotion model (no second face detection)
+        face_rois = [crop_face_gray(frame, box) for box in faces]
         
-        # Don't display the camera window - run silently in background
-        # Just process the frame without showing it
+        # Skip the frame if the (first) face has not changed meaningfully
+        if face_rois and not sampler.should_analyze(face_rois[0]):
+            face_rois = []
+        
+        for face_roi in face_rois:
+            future = engine.submit(face_roi)
+            future.add_done_callback(lambda _, c=captured: pipeline.mark_analyzed(c))
+            pending.append((captured, future))
+        
+        # Record whatever has finished so far; wait for the backlog once a full
+        # batch is outstanding
+        collect_emotion_results(pending, timeline, aggregator, monitor,
+                                wait=len(pending) >= engine.max_batch_size)
+        
+        if monitor and monitor.converged and sampler.target_fps > monitor.keepalive_fps:
+            # Estimate is tight enough - keep sampling only at a low rate
+            sampler.set_target_fps(monitor.keepalive_fps)
+        
+        # Detection time plus the model time of the submitted crops
+        work = time.time() - work_started + len(face_rois) * engine.average_crop_seconds()
+        sampler.record_work(work, work_started)
         
-        # Non-blocking check (no window, so just a small delay)
-        key = cv2.waitKey(1) & 0xFF
+        # Don't display the camera window - run silently in background
+        # (frames are shared with other consumers, so nothing is drawn on them)
         
         # Check if time's up
         if elapsed_time >= max_duration:
             print("\n⏱️  Time limit reached!")
-            stop_detection = True
+            stop_event.set()
             break
     
-    cap.release()
-    # No windows to close since we're not showing any
+    pipeline.stop()
+    # The shared camera is released at the end of the assessment, not per question
+    
+    collect_emotion_results(pending, timeline, aggregator, monitor, wait=True)
+    frame_count = aggregator.samples
     
     # Generate emotion summary
-    if emotion_history:
-        emotion_counts = defaultdict(int)
-        emotion_totals = defaultdict(float)
-        
-        for entry in emotion_history:
-            emotion_counts[entry["dominant_emotion"]] += 1
-            for emotion, score in entry["emotion_scores"].items():
-                emotion_totals[emotion] += score
-        
-        num_samples = len(emotion_history)
-        average_scores = {emotion: round(total / num_samples, 2) 
-                         for emotion, total in emotion_totals.items()}
-        
-        emotion_percentages = {emotion: round((count / num_samples) * 100, 2) 
-                              for emotion, count in emotion_counts.items()}
-        
-        overall_dominant = max(emotion_percentages, key=emotion_percentages.get)
-        stress_level = calculate_stress_level(average_scores)
-        
+    if aggregator.samples:
         summary = {
             "analysis_duration_seconds": round(time.time() - start_time, 2),
             "total_frames_analyzed": frame_count,
-            "start_time": emotion_history[0]["timestamp"] if emotion_history else None,
-            "end_time": emotion_history[-1]["timestamp"] if emotion_history else None,
-            "overall_dominant_emotion": overall_dominant,
-            "dominant_emotion_percentages": dict(sorted(emotion_percentages.items(), 
-                                                       key=lambda x: x[1], reverse=True)),
-            "average_emotion_scores": dict(sorted(average_scores.items(), 
-                                                  key=lambda x: x[1], reverse=True)),
-            "stress_level": stress_level,
-            "detailed_timeline": emotion_history
+            "start_time": timeline.iso_timestamp(0),
+            "end_time": timeline.iso_timestamp(-1),
+            **summarize_emotion_state(aggregator),
+            "frame_latency": pipeline.stats(),
+            "face_tracking": tracker.stats(),
+            "frame_sampling": sampler.stats(),
+            "convergence": monitor.summary(start_time) if monitor else None,
+            # Serialized to the per-sample dict list by json_default
+            "detailed_timeline": timeline
         }
         
         with emotion_lock:
-            current_emotion_data = summary
+            # A newer question's thread may already have replaced this one
+            if live_emotion_aggregator is aggregator:
+                current_emotion_data = summary
         
         return summary
     else:
         return None
 
+def summarize_emotion_state(aggregator):
+    """Dominant emotion, emotion percentages, average scores and stress level of an aggregator"""
+    average_scores = {emotion: round(score, 2) 
+                     for emotion, score in aggregator.average_scores().items()}
+    
+    emotion_percentages = {emotion: round(percentage, 2) 
+                          for emotion, percentage in aggregator.emotion_percentages().items()}
+    
+    return {
+        "overall_dominant_emotion": max(emotion_percentages, key=emotion_percentages.get),
+        "dominant_emotion_percentages": dict(sorted(emotion_percentages.items(), 
+                                                   key=lambda x: x[1], reverse=True)),
+        "average_emotion_scores": dict(sorted(average_scores.items(), 
+                                              key=lambda x: x[1], reverse=True)),
+        "stress_level": calculate_stress_level(average_scores)
+    }
+
+def partial_emotion_data():
+    """
+    Emotion summary of the question being answered so far (None before the first sample)
+    Used to pick next-question candidates while the student is still answering
+    """
+    with emotion_lock:
+        aggregator = live_emotion_aggregator
+    
+    if aggregator is None or not aggregator.samples:
+        return None
+    
+    try:
+        state = summarize_emotion_state(aggregator)
+    except RuntimeError:
+        # The detection thread added a new emotion mid-read; the next poll retries
+        return None
+    state["total_frames_analyzed"] = aggregator.samples
+    return state
+
 def calculate_stress_level(emotion_scores):
     """Calculate stress level based on emotion scores (1-5 scale)"""
     stress_emotions = {
@@ -165,8 +247,12 @@ def calculate_stress_level(emotion_scores):
     else:
         return 5
 
-def generate_next_question(topic, question_number, student_id, grade, previous_answers=None, emotion_data=None):
-    """Generate the next question based on previous performance and optional emotion data"""
+def generate_next_question(topic, question_number, student_id, grade, previous_answers=None, emotion_data=None,
+                           quiet=False):
+    """
+    Generate the next question based on previous performance and optional emotion data
+    With quiet=True nothing is printed (background prefetch while the student answers)
+    """
     
     student_data = {
         "studentId": student_id,
@@ -192,23 +278,26 @@ def generate_next_question(topic, question_number, student_id, grade, previous_a
         "questionCount": 1  # Generate one question at a time
     }
     
-    print("\n" + "=" * 60)
-    print(f"📡 Generating Question #{question_number}...")
-    print("=" * 60)
-    if emotion_data:
-        print(f"📊 Based on Previous Emotional State:")
-        print(f"   Dominant Emotion: {emotion_data['overall_dominant_emotion']}")
-        print(f"   Stress Level: {emotion_data['stress_level']}/5")
-    else:
-        print("📊 Generating initial question...")
-    print("=" * 60)
+    if not quiet:
+        print("\n" + "=" * 60)
+        print(f"📡 Generating Question #{question_number}...")
+        print("=" * 60)
+        if emotion_data:
+            print(f"📊 Based on Previous Emotional State:")
+            print(f"   Dominant Emotion: {emotion_data['overall_dominant_emotion']}")
+            print(f"   Stress Level: {emotion_data['stress_level']}/5")
+        else:
+            print("📊 Generating initial question...")
+        print("=" * 60)
     
     try:
-        response = requests.post(
+        # Pooled keep-alive connection. A slow LLM call is not repeated (only requests the
+        # backend never started are retried), and the student waits at most the deadline
+        response = get_http_transport().post(
             AI_SERVICE_URL,
-            json=payload,
+            data=json.dumps(payload, default=json_default),
             headers={"Content-Type": "application/json"},
-            timeout=60
+            deadline=HTTP_GENERATION_DEADLINE
         )
         
         if response.status_code == 200:
@@ -219,15 +308,18 @@ def generate_next_question(topic, question_number, student_id, grade, previous_a
                 if questions:
                     return questions[0]
         
-        print(f"❌ Error: Could not generate question (Status: {response.status_code})")
+        if not quiet:
+            print(f"❌ Error: Could not generate question (Status: {response.status_code})")
         return None
             
     except requests.exceptions.ConnectionError:
-        print(f"\n❌ Error: Cannot connect to AI service at {AI_SERVICE_URL}")
-        print("Please make sure the AI service is running.")
+        if not quiet:
+            print(f"\n❌ Error: Cannot connect to AI service at {AI_SERVICE_URL}")
+            print("Please make sure the AI service is running.")
         return None
     except Exception as e:
-        print(f"❌ Error: {e}")
+        if not quiet:
+            print(f"❌ Error: {e}")
         return None
 
 def display_question(question, question_number):
@@ -252,19 +344,22 @@ def display_question(question, question_number):
 
 def get_student_answer_with_emotion_monitoring(question, max_time=120):
     """Get answer from student while monitoring emotions in background"""
-    global stop_detection
+    global current_emotion_data, live_emotion_aggregator
+    
+    # Nothing from the previous question may be attached to this answer
+    with emotion_lock:
+        current_emotion_data = None
+        live_emotion_aggregator = None
     
     # Start emotion detection in background thread (silently - no window)
+    stop_event = threading.Event()
     emotion_thread = threading.Thread(
         target=detect_emotions_while_answering,
-        args=(question.get('questionText', ''), max_time)
+        args=(question.get('questionText', ''), stop_event, max_time)
     )
     emotion_thread.daemon = True
     emotion_thread.start()
     
-    # Small delay to let camera start
-    time.sleep(1)
-    
     print("\n" + "=" * 60)
     print("📊 Monitoring your emotions in background (no camera window)...")
     print("💡 Take your time to think and respond")
@@ -291,7 +386,6 @@ def get_student_answer_with_emotion_monitoring(question, max_time=120):
                 print("⚠️  Please enter a valid number")
             except KeyboardInterrupt:
                 print("\n⚠️  Answer cancelled")
-                stop_detection = True
                 break
     else:
         try:
@@ -302,17 +396,21 @@ def get_student_answer_with_emotion_monitoring(question, max_time=120):
             }
         except KeyboardInterrupt:
             print("\n⚠️  Answer cancelled")
-            stop_detection = True
     
     # Stop emotion detection
-    stop_detection = True
+    stop_event.set()
     
     # Wait for thread to finish
     emotion_thread.join(timeout=2)
     
-    # Get emotion data from the session
-    with emotion_lock:
-        emotion_data = current_emotion_data
+    if emotion_thread.is_alive():
+        # Still collecting its last analyses: use the running estimate, marked partial
+        emotion_data = partial_emotion_data()
+        if emotion_data:
+            emotion_data["partial"] = True
+    else:
+        with emotion_lock:
+            emotion_data = current_emotion_data
     
     return answer_data, emotion_data
 
@@ -351,7 +449,7 @@ def verify_system_ready():
     # 1. Check AI Service
     print("\n1️⃣ Checking AI Service...")
     try:
-        response = requests.get("http://localhost:3000/api/health", timeout=5)
+        response = get_http_transport().get("http://localhost:3000/api/health")
         if response.status_code == 200:
             print("   ✅ AI Service is running")
         else:
@@ -370,12 +468,12 @@ def verify_system_ready():
     # 2. Check Camera
     print("\n2️⃣ Checking Camera...")
     try:
-        test_cap = cv2.VideoCapture(0)
-        if test_cap.isOpened():
-            ret, frame = test_cap.read()
-            if ret and frame is not None:
+        # Opens the shared camera, which then stays open for the whole assessment
+        camera = get_frame_source()
+        if camera.is_opened():
+            frame = camera.wait_for_frame(timeout=3)
+            if frame is not None:
                 print("   ✅ Camera is working")
-                test_cap.release()
             else:
                 print("   ❌ Camera opened but cannot read frames")
                 all_ready = False
@@ -390,13 +488,11 @@ def verify_system_ready():
     # 3. Check DeepFace Model
     print("\n3️⃣ Checking DeepFace Model...")
     try:
-        # Test if DeepFace can analyze (will download model if needed)
+        # Build the emotion model once and run a dummy prediction (will download model if needed)
         print("   ⏳ Loading emotion detection model (first time may take a while)...")
-        test_img = [[100, 100, 100]] * 100  # Simple test image
-        import numpy as np
-        test_img = np.array([test_img] * 100, dtype=np.uint8)
-        # This will verify DeepFace is ready
-        print("   ✅ DeepFace model ready")
+        model = get_emotion_model()
+        model.warmup()
+        print(f"   ✅ DeepFace model ready (loaded in {model.load_seconds:.1f}s)")
     except Exception as e:
         print(f"   ⚠️  DeepFace initialization: {str(e)[:50]}...")
         print("   ℹ️  Will initialize on first use")
@@ -481,21 +577,49 @@ def main():
     correct_count = 0
     previous_emotion_data = None
     
+    # Candidates for question q_num + 1 are generated while question q_num is answered
+    # (one per stress bucket, from the partial emotion estimate); the answer picks one
+    prefetcher = None
+    prefetched = None
+    if PREFETCH_QUESTIONS:
+        prefetcher = QuestionPrefetcher(
+            lambda candidate_emotion_data, question_number, previous_answers: generate_next_question(
+                topic,
+                question_number,
+                student_id,
+                grade,
+                previous_answers,
+                candidate_emotion_data,
+                quiet=True
+            ))
+    
     # Main assessment loop - one question at a time
     for q_num in range(1, total_questions + 1):
         print("\n" + "=" * 60)
         print(f"QUESTION {q_num} OF {total_questions}")
         print("=" * 60)
         
-        # Generate question first (based on previous emotion data if available)
-        question = generate_next_question(
-            topic, 
-            q_num, 
-            student_id, 
-            grade,
-            assessment_data["questions_and_answers"],
-            previous_emotion_data
-        )
+        question = None
+        if prefetched is not None:
+            # Generated while the previous question was being answered
+            try:
+                question = prefetched.result()
+            except Exception:
+                question = None
+            if question:
+                print("⚡ Next question prepared while you were answering")
+            prefetched = None
+        
+        if not question:
+            # Generate question first (based on previous emotion data if available)
+            question = generate_next_question(
+                topic, 
+                q_num, 
+                student_id, 
+                grade,
+                assessment_data["questions_and_answers"],
+                previous_emotion_data
+            )
         
         if not question:
             print(f"\n❌ Failed to generate question {q_num}. Skipping...")
@@ -504,12 +628,18 @@ def main():
         # Display question FIRST
         display_question(question, q_num)
         
+        # Start on the next question's candidates while this one is answered
+        if prefetcher and q_num < total_questions:
+            prefetcher.start(partial_emotion_data, q_num + 1, assessment_data["questions_and_answers"])
+        
         # NOW start emotion detection while student answers (no visible window)
         print("\n� Starting background emotion monitoring...")
         student_answer, emotion_data = get_student_answer_with_emotion_monitoring(question, max_time=120)
         
         if not student_answer:
             print(f"\n⚠️  No answer provided for question {q_num}. Skipping...")
+            if prefetcher:
+                prefetcher.cancel()
             continue
         
         if not emotion_data:
@@ -521,6 +651,10 @@ def main():
                 "average_emotion_scores": {"neutral": 100}
             }
         
+        # Keep the candidate matching the final stress level; the others are dropped
+        if prefetcher and q_num < total_questions:
+            prefetched = prefetcher.commit(emotion_data)
+        
         # Show emotion summary after answering
         print(f"\n📊 Your emotional state while answering:")
         print(f"   Dominant Emotion: {emotion_data['overall_dominant_emotion']}")
@@ -551,6 +685,12 @@ def main():
             print(f"\n⏸️  Take a short break. Next question in 3 seconds...")
             time.sleep(3)
     
+    # Done with the camera for this session
+    release_frame_source()
+    if prefetcher:
+        prefetcher.shutdown()
+        assessment_data["question_prefetch"] = prefetcher.stats()
+    
     # Final summary
     assessment_data["end_time"] = datetime.now().isoformat()
     assessment_data["total_questions"] = total_questions
@@ -568,7 +708,7 @@ def main():
     # Save results
     output_filename = f"realtime_assessment_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
     with open(output_filename, 'w') as f:
-        json.dump(assessment_data, f, indent=2)
+        json.dump(assessment_data, f, indent=2, default=json_default)
     
     print(f"\n💾 Results saved to: {output_filename}")
     print("\n" + "=" * 60)